@@ -1,7 +1,9 @@
+import { spawn } from 'child_process'
 import path from 'path'
 import fs from 'fs'
 
 const OUTPUT_DIR = path.join(process.cwd(), '..', 'output', 'fonts')
+const PREVIEW_SCRIPT = path.join(process.cwd(), '..', 'font-generator', 'preview_renderer.py')
 
 export function getFontFile(fontId: string): string {
   const fontPath = path.join(OUTPUT_DIR, `${fontId}.ttf`)
@@ -18,13 +20,44 @@ export async function getFontPreview(
   text?: string,
   size?: number
 ): Promise<string> {
-  // MVP版本：返回base64编码的预览图
-  // 实际实现可以使用canvas或图片生成库
-  const fontPath = getFontFile(fontId)
-  
-  // 这里应该使用canvas或图片库生成预览图
-  // 暂时返回一个占位符
-  return Promise.resolve('data:image/png;base64,iVBORw0KGgoAAAANSUhEUgAAAAEAAAABCAYAAAAfFcSJAAAADUlEQVR42mNk+M9QDwADhgGAWjR9awAAAABJRU5ErkJggg==')
+  // 确认字体存在后调用Python预览渲染器，返回PNG的data URL
+  getFontFile(fontId)
+
+  const args = [PREVIEW_SCRIPT, '--font-id', fontId, '--fonts-dir', OUTPUT_DIR]
+  if (text) {
+    // 以 --text=值 传递，以 - 开头的文本不会被当作选项
+    args.push(`--text=${text}`)
+  }
+  if (size) {
+    args.push('--size', String(size))
+  }
+
+  return new Promise((resolve, reject) => {
+    const pythonProcess = spawn('python3', args)
+
+    let stdout = ''
+    let stderr = ''
+
+    pythonProcess.stdout.on('data', (data) => {
+      stdout += data.toString()
+    })
+
+    pythonProcess.stderr.on('data', (data) => {
+      stderr += data.toString()
+    })
+
+    pythonProcess.on('close', (code) => {
+      if (code !== 0) {
+        reject(new Error(`预览生成失败: ${stderr || '未知错误'}`))
+        return
+      }
+      resolve(stdout.trim())
+    })
+
+    pythonProcess.on('error', (error) => {
+      reject(new Error(`无法启动预览渲染进程: ${error.message}`))
+    })
+  })
 }
 
 
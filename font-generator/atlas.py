@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+"""
+字形图集
+把一款字体的全部字形按多个字号一次性光栅化并打包到同一张图集，
+同时输出字形矩形与度量的 JSON 索引，前端可直接从图集绘制任意文本；
+也可输出单一字号的有符号距离场图集，在任意缩放下保持清晰
+"""
+
+import argparse
+import json
+import os
+import sys
+from typing import Any, Dict, List, Sequence, Tuple
+
+import numpy as np
+
+from rasterizer import (EMPTY_BITMAP, GlyphBitmap, encode_png, rasterize_edges,
+                        signed_distance_field)
+from preview_renderer import font_source
+from font_store import DEFAULT_FONTS_DIR, font_path_for
+
+DEFAULT_SIZES = (16, 24, 32, 48)
+MAX_ATLAS_WIDTH = 1024
+
+# 距离场图集的默认字号与扩展像素
+DEFAULT_SDF_SIZE = 32
+DEFAULT_SDF_SPREAD = 4.0
+
+
+def pack_shelves(sizes: Sequence[Tuple[int, int]], max_width: int = MAX_ATLAS_WIDTH,
+                 padding: int = 1) -> Tuple[List[Tuple[int, int]], int, int]:
+    """
+    货架式矩形打包：按高度从高到低逐行摆放
+
+    sizes: [(宽, 高), ...]
+    返回: (每个矩形的左上角 [(x, y), ...], 图集宽, 图集高)
+    """
+    positions: List[Tuple[int, int]] = [(0, 0)] * len(sizes)
+    order = sorted(range(len(sizes)), key=lambda i: (-sizes[i][1], -sizes[i][0]))
+    x = y = shelf_height = atlas_width = 0
+    for i in order:
+        w, h = sizes[i]
+        if w == 0 or h == 0:
+            continue
+        if x + w + 2 * padding > max_width and x > 0:
+            y += shelf_height + padding
+            x = shelf_height = 0
+        positions[i] = (x + padding, y + padding)
+        x += w + padding
+        shelf_height = max(shelf_height, h)
+        atlas_width = max(atlas_width, x + padding)
+    return positions, atlas_width, y + shelf_height + 2 * padding if shelf_height else 0
+
+
+def _assemble(digest: str, source, entries: List[Tuple[float, str, GlyphBitmap]],
+              sizes: Sequence[float], max_width: int,
+              padding: int) -> Tuple[np.ndarray, Dict[str, Any]]:
+    """把 (字号, 字形名, 位图) 列表打包为图集并生成索引"""
+    positions, width, height = pack_shelves(
+        [bitmap.coverage.shape[::-1] for _, _, bitmap in entries], max_width, padding)
+    atlas = np.zeros((height, width), dtype=np.uint8)
+
+    glyph_index: Dict[str, Dict[str, Any]] = {}
+    for (size, glyph_name, bitmap), (x, y) in zip(entries, positions):
+        h, w = bitmap.coverage.shape
+        if w and h:
+            atlas[y:y + h, x:x + w] = bitmap.coverage
+        glyph_index.setdefault(f"{size:g}", {})[glyph_name] = {
+            'x': x, 'y': y, 'w': w, 'h': h,
+            'left': bitmap.left, 'top': bitmap.top,
+            'advance': round(source.advances.get(glyph_name, 0) * size / source.units_per_em, 3),
+        }
+
+    index = {
+        'font': {
+            'hash': digest,
+            'unitsPerEm': source.units_per_em,
+            'ascender': source.ascender,
+            'descender': source.descender,
+        },
+        'width': width,
+        'height': height,
+        'sizes': [float(f"{size:g}") for size in sizes],
+        'cmap': {chr(code): glyph_name for code, glyph_name in sorted(source.cmap.items())},
+        'glyphs': glyph_index,
+    }
+    return atlas, index
+
+
+def build_atlas(font_path: str, sizes: Sequence[float] = DEFAULT_SIZES,
+                max_width: int = MAX_ATLAS_WIDTH,
+                padding: int = 1) -> Tuple[np.ndarray, Dict[str, Any]]:
+    """
+    生成多字号字形图集
+
+    每个字形的轮廓只展平一次（FontRasterSource 缓存），各字号复用同一组边
+    返回: ((高, 宽) uint8 覆盖率图集, JSON 索引)
+    """
+    digest, source = font_source(font_path)
+
+    entries: List[Tuple[float, str, GlyphBitmap]] = []
+    for size in sizes:
+        scale = size / source.units_per_em
+        for glyph_name in source.font.getGlyphOrder():
+            a, b = source.edges(glyph_name)
+            bitmap = rasterize_edges(a, b, scale) if len(a) else EMPTY_BITMAP
+            entries.append((size, glyph_name, bitmap))
+
+    return _assemble(digest, source, entries, sizes, max_width, padding)
+
+
+def build_sdf_atlas(font_path: str, size: float = DEFAULT_SDF_SIZE,
+                    spread: float = DEFAULT_SDF_SPREAD,
+                    max_width: int = MAX_ATLAS_WIDTH,
+                    padding: int = 1) -> Tuple[np.ndarray, Dict[str, Any]]:
+    """
+    生成有符号距离场图集
+
+    单一字号的距离场可在任意缩放下重建清晰边缘：着色器以 128 为阈值、
+    按 spread 换算的宽度做平滑过渡。索引中的矩形包含四周 spread 像素的外扩。
+    返回: ((高, 宽) uint8 距离场图集, JSON 索引)
+    """
+    digest, source = font_source(font_path)
+    scale = size / source.units_per_em
+
+    entries: List[Tuple[float, str, GlyphBitmap]] = []
+    for glyph_name in source.font.getGlyphOrder():
+        a, b = source.edges(glyph_name)
+        bitmap = signed_distance_field(a, b, scale, spread) if len(a) else EMPTY_BITMAP
+        entries.append((size, glyph_name, bitmap))
+
+    atlas, index = _assemble(digest, source, entries, [size], max_width, padding)
+    index['sdf'] = {'size': float(f"{size:g}"), 'spread': spread}
+    return atlas, index
+
+
+def atlas_rgba(atlas: np.ndarray) -> np.ndarray:
+    """覆盖率图集转为黑色、透明度即覆盖率的 RGBA 图像"""
+    rgba = np.zeros(atlas.shape + (4,), dtype=np.uint8)
+    rgba[..., 3] = atlas
+    return rgba
+
+
+def main():
+    parser = argparse.ArgumentParser(description='生成多字号字形图集')
+    parser.add_argument('--font-id', required=True, help='字体ID')
+    parser.add_argument('--sizes', default=','.join(map(str, DEFAULT_SIZES)),
+                        help='逗号分隔的字号列表（像素）')
+    parser.add_argument('--fonts-dir', default=DEFAULT_FONTS_DIR, help='已生成字体所在目录')
+    parser.add_argument('--output-dir', required=True, help='图集输出目录')
+    parser.add_argument('--sdf', action='store_true', help='输出有符号距离场图集（使用 --sizes 的第一个字号）')
+    parser.add_argument('--spread', type=float, default=DEFAULT_SDF_SPREAD, help='距离场扩展像素')
+
+    args = parser.parse_args()
+
+    try:
+        sizes = [float(size) for size in args.sizes.split(',') if size.strip()]
+        if not sizes or any(not 0 < size <= 512 for size in sizes):
+            raise ValueError(f"无效的字号列表: {args.sizes}")
+        font_path = font_path_for(args.font_id, args.fonts_dir)
+    except (ValueError, FileNotFoundError) as e:
+        print(f"❌ {e}", file=sys.stderr)
+        sys.exit(1)
+
+    if args.sdf:
+        if args.spread <= 0:
+            print(f"❌ 无效的扩展像素: {args.spread}", file=sys.stderr)
+            sys.exit(1)
+        atlas, index = build_sdf_atlas(font_path, sizes[0], args.spread)
+        suffix, image = 'sdf', atlas
+    else:
+        atlas, index = build_atlas(font_path, sizes)
+        suffix, image = 'atlas', atlas_rgba(atlas)
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    image_path = os.path.join(args.output_dir, f"{args.font_id}.{suffix}.png")
+    index_path = os.path.join(args.output_dir, f"{args.font_id}.{suffix}.json")
+    with open(image_path, 'wb') as f:
+        f.write(encode_png(image))
+    with open(index_path, 'w', encoding='utf-8') as f:
+        json.dump(index, f, ensure_ascii=False, separators=(',', ':'))
+
+    print(f"✅ 图集 {index['width']}×{index['height']}，"
+          f"{len(index['sizes'])} 个字号 × {len(index['cmap'])} 个字符: {image_path}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,227 @@
+#!/usr/bin/env python3
+"""
+生成器基准测试
+分别计时各字符类别的字形设计、二次曲线转换、各表设置与保存，
+以及一组代表性规格（对比度 × 拐角 × 末端 × 笔画宽度）的完整生成；
+每个场景先预热再重复测量，报告中位数与 p95，结果可写为 JSON
+"""
+
+import argparse
+import contextlib
+import copy
+import fnmatch
+import gc
+import io
+import itertools
+import json
+import os
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from typing import Any, Callable, Dict, List, Tuple
+
+# 基准规格：未指定字符集，生成默认的 A-Z、a-z、0-9 与常用标点
+BASE_SPEC = {
+    'metadata': {'specVersion': '1.0', 'fontId': 'benchmark'},
+    'basicInfo': {'fontFamily': 'Benchmark', 'fontName': 'Benchmark-Regular'},
+    'designParameters': {
+        'metrics': {'unitsPerEm': 1000, 'xHeight': 520, 'capHeight': 720,
+                    'ascender': 850, 'descender': -220},
+    },
+    'styleDefinition': {},
+    'characterSet': {},
+}
+
+# 完整生成的规格矩阵
+MATRIX = {
+    'contrast': ('low', 'high'),
+    'corners': ('sharp', 'soft'),
+    'terminals': ('straight', 'curved'),
+    'strokeWidth': (60, 120),
+}
+
+DEFAULT_WARMUP = 2
+DEFAULT_REPEAT = 10
+
+
+def make_spec(contrast: str = 'medium', corners: str = 'rounded',
+              terminals: str = 'straight', stroke_width: float = 80) -> Dict[str, Any]:
+    """基准规格的一个变体（已规范化）"""
+    from spec_parser import normalize_spec
+
+    spec = copy.deepcopy(BASE_SPEC)
+    spec['designParameters']['proportions'] = {'contrast': contrast, 'strokeWidth': stroke_width}
+    spec['styleDefinition']['visualStyle'] = {'corners': corners, 'terminals': terminals}
+    return normalize_spec(spec)
+
+
+def matrix_specs() -> List[Tuple[str, Dict[str, Any]]]:
+    """[(场景名, 规格), ...]，场景名形如 build.high-soft-curved-120"""
+    specs = []
+    for contrast, corners, terminals, stroke_width in itertools.product(*MATRIX.values()):
+        name = f"build.{contrast}-{corners}-{terminals}-{stroke_width}"
+        specs.append((name, make_spec(contrast, corners, terminals, stroke_width)))
+    return specs
+
+
+def percentile(samples: List[float], q: float) -> float:
+    """最近秩百分位数"""
+    ordered = sorted(samples)
+    rank = max(1, -(-len(ordered) * q // 100))
+    return ordered[int(rank) - 1]
+
+
+def summarize(samples: List[float]) -> Dict[str, Any]:
+    """样本（秒）的统计，单位毫秒"""
+    return {
+        'median_ms': round(statistics.median(samples) * 1000, 3),
+        'p95_ms': round(percentile(samples, 95) * 1000, 3),
+        'min_ms': round(min(samples) * 1000, 3),
+        'max_ms': round(max(samples) * 1000, 3),
+        'runs': len(samples),
+    }
+
+
+def measure(fn: Callable[[], Any], warmup: int, repeat: int) -> List[float]:
+    """预热 warmup 次后重复调用 repeat 次，返回每次耗时（秒）"""
+    for _ in range(warmup):
+        fn()
+    gc.collect()
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def _design_scenarios() -> List[Tuple[str, Callable[[], Any]]]:
+    """各字符类别的 GlyphDesigner.create_glyph"""
+    from design_params import DesignParams
+    from generator import glyph_plan
+    from glyph_designer import GlyphDesigner
+    from spec_parser import CATEGORY_DEFAULTS
+
+    spec = make_spec()
+    designer = GlyphDesigner(DesignParams.from_spec(spec))
+    metrics = spec['designParameters']['metrics']
+    classes = {key: list(chars) for key, chars in CATEGORY_DEFAULTS.items() if chars}
+
+    scenarios = []
+    for class_name, chars in classes.items():
+        plan = [(char, width, height) for _, char, width, height in glyph_plan(metrics, chars)]
+
+        def design(plan=plan):
+            for char, width, height in plan:
+                designer.create_glyph(char, width, height)
+        scenarios.append((f"design.{class_name}", design))
+    return scenarios
+
+
+def run_benchmarks(warmup: int = DEFAULT_WARMUP, repeat: int = DEFAULT_REPEAT,
+                   pattern: str = '*',
+                   progress: Callable[[str, Dict[str, Any]], None] = None) -> Dict[str, Dict[str, Any]]:
+    """
+    运行名称匹配 pattern（fnmatch）的全部场景
+
+    返回: {场景名: 统计}；stage.* 场景来自同一组基准生成中的逐阶段耗时
+    """
+    from build_stages import BuildStages
+    from generator import create_minimal_font
+
+    results: Dict[str, Dict[str, Any]] = {}
+    stdout = sys.stdout
+
+    def record(name, samples):
+        results[name] = summarize(samples)
+        if progress:
+            with contextlib.redirect_stdout(stdout):
+                progress(name, results[name])
+
+    tmp_dir = tempfile.mkdtemp(prefix='ezfont-bench-')
+    output_path = os.path.join(tmp_dir, 'benchmark.ttf')
+    try:
+        # 生成过程的日志不计入输出
+        with contextlib.redirect_stdout(io.StringIO()):
+            for name, fn in _design_scenarios():
+                if fnmatch.fnmatch(name, pattern):
+                    record(name, measure(fn, warmup, repeat))
+
+            spec = make_spec()
+            runs: List[BuildStages] = []
+
+            def build_with_stages():
+                stages = BuildStages()
+                create_minimal_font(spec, output_path, stages=stages)
+                runs.append(stages)
+
+            # 先生成一次得到阶段名，有匹配的阶段时才测量
+            build_with_stages()
+            stage_names = [f"stage.{stage}" for stage in runs[0].timings]
+            if any(fnmatch.fnmatch(name, pattern) for name in stage_names):
+                runs.clear()
+                measure(build_with_stages, warmup, repeat)
+                for name in stage_names:
+                    if fnmatch.fnmatch(name, pattern):
+                        stage = name[len('stage.'):]
+                        record(name, [stages.timings[stage] for stages in runs[warmup:]])
+
+            for name, spec in matrix_specs():
+                if fnmatch.fnmatch(name, pattern):
+                    record(name, measure(lambda: create_minimal_font(spec, output_path),
+                                         warmup, repeat))
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+    return results
+
+
+def environment() -> Dict[str, Any]:
+    """结果的运行环境信息"""
+    import fontTools
+    import numpy
+
+    return {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'fonttools': fontTools.version,
+        'numpy': numpy.__version__,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='生成器基准测试')
+    parser.add_argument('--warmup', type=int, default=DEFAULT_WARMUP, help='每个场景的预热次数')
+    parser.add_argument('--repeat', type=int, default=DEFAULT_REPEAT, help='每个场景的测量次数')
+    parser.add_argument('--filter', default='*', help='只运行名称匹配的场景（如 "build.*"）')
+    parser.add_argument('--output', help='结果 JSON 输出路径')
+
+    args = parser.parse_args()
+    if args.warmup < 0 or args.repeat < 1:
+        print("❌ --warmup 不能为负，--repeat 至少为 1", file=sys.stderr)
+        sys.exit(1)
+
+    def progress(name, stats):
+        print(f"{name:<36} 中位数 {stats['median_ms']:>9.3f} ms   p95 {stats['p95_ms']:>9.3f} ms")
+
+    results = run_benchmarks(args.warmup, args.repeat, args.filter, progress)
+    if not results:
+        print(f"❌ 没有匹配的场景: {args.filter}", file=sys.stderr)
+        sys.exit(1)
+
+    if args.output:
+        report = {
+            'environment': environment(),
+            'warmup': args.warmup,
+            'repeat': args.repeat,
+            'results': results,
+        }
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"✅ {len(results)} 个场景的结果已写入: {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -5,7 +5,10 @@
 """
 
 import math
-from typing import Tuple, List, Optional
+from array import array
+from typing import Dict, Tuple, List, Optional
+
+import numpy as np
 
 Point = Tuple[float, float]
 
@@ -191,6 +194,207 @@ def apply_contrast(stroke_width: float, angle: float, contrast: str) -> float:
     return adjusted_width
 
 
+# ==================== 紧凑路径 ====================
+
+# 路径操作码及每个操作携带的点数
+# OP_END 结束开放轮廓（endPath），命令列表形式记为 'E'
+OP_MOVE, OP_LINE, OP_QUAD, OP_CUBIC, OP_CLOSE, OP_END = range(6)
+_OP_COMMANDS = ('M', 'L', 'Q', 'C', 'Z', 'E')
+_OP_POINTS = (1, 1, 2, 3, 0, 0)
+
+
+class Path:
+    """
+    紧凑的数组存储路径
+
+    操作码存放在 array('B')，坐标平铺存放在 array('d')，每条命令不再单独分配
+    元组和列表。实现了Pen协议（可直接作为 glyph.draw 的目标记录轮廓），
+    可绘制到任意fontTools Pen，支持批量仿射变换与拼接。
+    复合字形的组件按 glyph_set（如 TTFont.getGlyphSet()）分解为轮廓记录。
+    迭代/下标访问仍返回旧的 (命令, 点列表) 形式以兼容原有用法。
+    """
+
+    __slots__ = ('ops', 'coords', 'glyph_set')
+
+    def __init__(self, ops: Optional[array] = None, coords: Optional[array] = None,
+                 glyph_set=None):
+        self.ops = ops if ops is not None else array('B')
+        self.coords = coords if coords is not None else array('d')
+        self.glyph_set = glyph_set
+
+    # ---------- 构建（Pen协议） ----------
+
+    def moveTo(self, pt: Point):
+        self.ops.append(OP_MOVE)
+        self.coords.extend(pt)
+
+    def lineTo(self, pt: Point):
+        self.ops.append(OP_LINE)
+        self.coords.extend(pt)
+
+    def qCurveTo(self, *points: Point):
+        """
+        二次曲线；多个离线点时按隐含在线点拆分为单段二次曲线
+
+        末尾为 None 表示整条轮廓没有在线点（TrueType 允许），
+        以最后与第一个离线点的中点作为起点（同 fontTools decomposeQuadraticSegment）
+        """
+        if points[-1] is None:
+            off_curves = points[:-1]
+            start = lerp(off_curves[-1], off_curves[0], 0.5)
+            self.moveTo(start)
+            self.qCurveTo(*off_curves, start)
+            return
+        for i in range(len(points) - 2):
+            self.ops.append(OP_QUAD)
+            self.coords.extend(points[i])
+            self.coords.extend(lerp(points[i], points[i + 1], 0.5))
+        if len(points) == 1:
+            self.lineTo(points[0])
+            return
+        self.ops.append(OP_QUAD)
+        self.coords.extend(points[-2])
+        self.coords.extend(points[-1])
+
+    def curveTo(self, *points: Point):
+        """三次曲线；超过三个点时按TrueType约定拆分（成对离线点之间为隐含在线点）"""
+        if len(points) == 3:
+            self.ops.append(OP_CUBIC)
+            for pt in points:
+                self.coords.extend(pt)
+            return
+        from fontTools.pens.basePen import decomposeSuperBezierSegment
+        for segment in decomposeSuperBezierSegment(points):
+            self.curveTo(*segment)
+
+    def closePath(self):
+        self.ops.append(OP_CLOSE)
+
+    def endPath(self):
+        self.ops.append(OP_END)
+
+    def addComponent(self, glyphName: str, transformation):
+        """把组件字形按变换分解为轮廓（同 fontTools DecomposingPen）"""
+        from fontTools.pens.basePen import MissingComponentError
+        from fontTools.pens.transformPen import TransformPen
+        if self.glyph_set is None:
+            raise MissingComponentError(f"分解组件 {glyphName} 需要提供 glyph_set")
+        if glyphName not in self.glyph_set:
+            raise MissingComponentError(glyphName)
+        self.glyph_set[glyphName].draw(TransformPen(self, transformation))
+
+    # ---------- 输出 ----------
+
+    def draw(self, pen):
+        """按顺序回放到任意fontTools Pen"""
+        coords = self.coords
+        i = 0
+        for op in self.ops:
+            if op == OP_MOVE:
+                pen.moveTo((coords[i], coords[i + 1]))
+                i += 2
+            elif op == OP_LINE:
+                pen.lineTo((coords[i], coords[i + 1]))
+                i += 2
+            elif op == OP_QUAD:
+                pen.qCurveTo((coords[i], coords[i + 1]), (coords[i + 2], coords[i + 3]))
+                i += 4
+            elif op == OP_CUBIC:
+                pen.curveTo((coords[i], coords[i + 1]), (coords[i + 2], coords[i + 3]),
+                            (coords[i + 4], coords[i + 5]))
+                i += 6
+            elif op == OP_CLOSE:
+                pen.closePath()
+            else:
+                pen.endPath()
+
+    def points(self) -> np.ndarray:
+        """全部坐标的 (N, 2) 视图（不复制）"""
+        return np.frombuffer(self.coords, dtype=float).reshape(-1, 2)
+
+    def bounds(self) -> Optional[Tuple[float, float, float, float]]:
+        """控制点包围盒 (xmin, ymin, xmax, ymax)"""
+        if not self.coords:
+            return None
+        pts = self.points()
+        xmin, ymin = pts.min(axis=0)
+        xmax, ymax = pts.max(axis=0)
+        return (float(xmin), float(ymin), float(xmax), float(ymax))
+
+    # ---------- 批量操作 ----------
+
+    def transform(self, matrix) -> 'Path':
+        """原地应用仿射变换（fontTools Transform 或六元组 (xx, xy, yx, yy, dx, dy)）"""
+        if self.coords:
+            xx, xy, yx, yy, dx, dy = matrix
+            linear = np.array([[xx, xy], [yx, yy]], dtype=float)
+            moved = self.points() @ linear + (dx, dy)
+            self.coords = array('d', moved.tobytes())
+        return self
+
+    def transformed(self, matrix) -> 'Path':
+        """返回变换后的新路径"""
+        return self.copy().transform(matrix)
+
+    def copy(self) -> 'Path':
+        return Path(array('B', self.ops), array('d', self.coords), self.glyph_set)
+
+    def extend(self, other: 'Path') -> 'Path':
+        """原地拼接另一条路径"""
+        self.ops.extend(other.ops)
+        self.coords.extend(other.coords)
+        return self
+
+    def __add__(self, other: 'Path') -> 'Path':
+        return self.copy().extend(other)
+
+    @classmethod
+    def concat(cls, paths: List['Path']) -> 'Path':
+        """拼接多条路径"""
+        result = cls()
+        for path in paths:
+            result.extend(path)
+        return result
+
+    @classmethod
+    def from_commands(cls, commands: List[Tuple[str, List[Point]]]) -> 'Path':
+        """由旧的 [(命令, 点列表), ...] 形式构建"""
+        path = cls()
+        for cmd, pts in commands:
+            path.ops.append(_OP_COMMANDS.index(cmd))
+            for pt in pts:
+                path.coords.extend(pt)
+        return path
+
+    # ---------- 兼容旧的命令列表接口 ----------
+
+    def __len__(self) -> int:
+        return len(self.ops)
+
+    def __iter__(self):
+        coords = self.coords
+        i = 0
+        for op in self.ops:
+            n = _OP_POINTS[op]
+            yield (_OP_COMMANDS[op],
+                   [(coords[i + 2 * k], coords[i + 2 * k + 1]) for k in range(n)])
+            i += 2 * n
+
+    def __getitem__(self, index: int) -> Tuple[str, List[Point]]:
+        if index < 0:
+            index += len(self.ops)
+        offset = sum(_OP_POINTS[op] for op in self.ops[:index]) * 2
+        n = _OP_POINTS[self.ops[index]]
+        pts = [(self.coords[offset + 2 * k], self.coords[offset + 2 * k + 1]) for k in range(n)]
+        return (_OP_COMMANDS[self.ops[index]], pts)
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, Path) and self.ops == other.ops and self.coords == other.coords
+
+    def __repr__(self) -> str:
+        return f"Path({len(self.ops)} ops, {len(self.coords) // 2} points)"
+
+
 def create_rounded_rectangle(x: float, y: float, width: float, height: float, 
                             corner_radius: float) -> List[Tuple[str, List[Point]]]:
     """
@@ -322,3 +526,297 @@ def rotate_point(point: Point, angle: float, center: Point = (0, 0)) -> Point:
     
     # 平移回去
     return (new_x + cx, new_y + cy)
+
+
+# ==================== 相交检测 ====================
+
+def _cross(a: Point, b: Point) -> float:
+    """二维叉积"""
+    return a[0] * b[1] - a[1] * b[0]
+
+
+def segment_intersection(p1: Point, p2: Point, p3: Point, p4: Point,
+                         eps: float = 1e-9) -> Optional[Tuple[float, float]]:
+    """
+    计算线段p1-p2与线段p3-p4的交点参数
+
+    返回: (t, u)，交点为 lerp(p1, p2, t) == lerp(p3, p4, u)；
+          不相交或平行时返回None。端点接触不计为相交。
+    """
+    r = (p2[0] - p1[0], p2[1] - p1[1])
+    s = (p4[0] - p3[0], p4[1] - p3[1])
+    denom = _cross(r, s)
+    if denom == 0:
+        return None
+    qp = (p3[0] - p1[0], p3[1] - p1[1])
+    t = _cross(qp, s) / denom
+    u = _cross(qp, r) / denom
+    if eps < t < 1 - eps and eps < u < 1 - eps:
+        return (t, u)
+    return None
+
+
+def _split_curve(points: List[Point], t: float = 0.5) -> Tuple[List[Point], List[Point]]:
+    """
+    de Casteljau 分割任意阶贝塞尔曲线
+
+    返回: (前半段控制点, 后半段控制点)
+    """
+    left = [points[0]]
+    right = [points[-1]]
+    current = list(points)
+    while len(current) > 1:
+        current = [lerp(current[i], current[i + 1], t) for i in range(len(current) - 1)]
+        left.append(current[0])
+        right.append(current[-1])
+    return left, right[::-1]
+
+
+def _bounds(points: List[Point]) -> Tuple[float, float, float, float]:
+    """控制点包围盒 (xmin, ymin, xmax, ymax)"""
+    xs = [p[0] for p in points]
+    ys = [p[1] for p in points]
+    return (min(xs), min(ys), max(xs), max(ys))
+
+
+def _bounds_overlap(a: Tuple[float, float, float, float],
+                    b: Tuple[float, float, float, float]) -> bool:
+    """包围盒是否重叠"""
+    return a[0] <= b[2] and b[0] <= a[2] and a[1] <= b[3] and b[1] <= a[3]
+
+
+def _collinear(points: List[Point], tolerance: float) -> bool:
+    """所有点是否都位于同一条直线附近"""
+    start, end = points[0], max(points, key=lambda p: distance(points[0], p))
+    length = distance(start, end)
+    if length == 0:
+        return True
+    d = ((end[0] - start[0]) / length, (end[1] - start[1]) / length)
+    return all(abs(_cross(d, (p[0] - start[0], p[1] - start[1]))) <= tolerance
+               for p in points)
+
+
+def curve_intersections(curve1: List[Point], curve2: List[Point],
+                        tolerance: float = 0.5,
+                        max_depth: int = 32) -> List[Tuple[float, float]]:
+    """
+    通过包围盒递归细分求两条贝塞尔曲线的交点
+
+    curve1, curve2: 控制点列表（2个点为直线，3个为二次，4个为三次）
+    tolerance: 包围盒小于该尺寸时视为收敛
+    返回: [(t1, t2), ...] 两条曲线上的交点参数
+    """
+    results: List[Tuple[float, float]] = []
+    found: List[Point] = []
+
+    def recurse(c1, t1_lo, t1_hi, c2, t2_lo, t2_hi, depth):
+        b1 = _bounds(c1)
+        b2 = _bounds(c2)
+        if not _bounds_overlap(b1, b2):
+            return
+        size1 = max(b1[2] - b1[0], b1[3] - b1[1])
+        size2 = max(b2[2] - b2[0], b2[3] - b2[1])
+        if (size1 <= tolerance and size2 <= tolerance) or depth >= max_depth:
+            center = ((b1[0] + b1[2]) / 2, (b1[1] + b1[3]) / 2)
+            # 相邻细分块可能收敛到同一交点
+            for p in found:
+                if distance(p, center) <= tolerance * 2:
+                    return
+            found.append(center)
+            results.append(((t1_lo + t1_hi) / 2, (t2_lo + t2_hi) / 2))
+            return
+        # 细分较大的曲线
+        if size1 >= size2:
+            mid = (t1_lo + t1_hi) / 2
+            left, right = _split_curve(c1)
+            recurse(left, t1_lo, mid, c2, t2_lo, t2_hi, depth + 1)
+            recurse(right, mid, t1_hi, c2, t2_lo, t2_hi, depth + 1)
+        else:
+            mid = (t2_lo + t2_hi) / 2
+            left, right = _split_curve(c2)
+            recurse(c1, t1_lo, t1_hi, left, t2_lo, mid, depth + 1)
+            recurse(c1, t1_lo, t1_hi, right, mid, t2_hi, depth + 1)
+
+    if len(curve1) == 2 and len(curve2) == 2:
+        hit = segment_intersection(curve1[0], curve1[1], curve2[0], curve2[1])
+        return [hit] if hit else []
+    # 共线重叠的曲线没有穿越点（与直线段平行时的处理一致）
+    if _collinear(list(curve1) + list(curve2), tolerance):
+        return []
+
+    recurse(list(curve1), 0.0, 1.0, list(curve2), 0.0, 1.0, 0)
+    return results
+
+
+def _near_endpoint(segment: List[Point], point: Point, tolerance: float) -> bool:
+    """点是否位于曲线段任一端点附近"""
+    return min(distance(point, segment[0]), distance(point, segment[-1])) <= tolerance
+
+
+def contour_self_intersections(segments: List[List[Point]],
+                               tolerance: float = 0.5) -> List[Tuple[int, int, Point]]:
+    """
+    检测单条闭合轮廓的自相交
+
+    segments: 首尾相接的曲线段列表，每段为控制点列表
+    返回: [(段下标i, 段下标j, 交点), ...]
+    段与段在端点处的接触（如相邻段的公共端点）不计为相交。
+    """
+    count = len(segments)
+    bounds = [_bounds(seg) for seg in segments]
+    hits = []
+    for i in range(count):
+        for j in range(i + 1, count):
+            if not _bounds_overlap(bounds[i], bounds[j]):
+                continue
+            for t1, t2 in curve_intersections(segments[i], segments[j], tolerance):
+                point = _split_curve(segments[i], t1)[1][0]
+                # 端点处的接触（相邻段的公共端点、T形接点）不计为相交
+                if _near_endpoint(segments[i], point, tolerance * 2) or \
+                        _near_endpoint(segments[j], point, tolerance * 2):
+                    continue
+                hits.append((i, j, point))
+    return hits
+
+
+def flatten_quadratic_contours(coords: np.ndarray, flags: np.ndarray,
+                               end_pts: List[int],
+                               steps: int = 8) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    将TrueType二次轮廓展平为折线（向量化）
+
+    coords: (N, 2) 轮廓点；flags: (N,) 点标志（bit0 为在线点）
+    end_pts: 各轮廓最后一个点的下标
+    steps: 每段二次曲线的细分数
+    返回: (边起点 (E, 2), 边终点 (E, 2), 每条边所属轮廓 (E,))，边按轮廓顺序排列
+    """
+    coords = np.asarray(coords, dtype=float).reshape(-1, 2)
+    if len(coords) == 0:
+        empty = np.zeros((0, 2))
+        return empty, empty, np.zeros(0, dtype=np.intp)
+
+    on = (np.asarray(flags) & 1) != 0
+    end_pts = np.asarray(end_pts, dtype=np.intp)
+    starts = np.concatenate([[0], end_pts[:-1] + 1])
+    idx = np.arange(len(coords))
+    contour_of = np.repeat(np.arange(len(end_pts)), end_pts - starts + 1)
+
+    nxt = idx + 1
+    nxt[end_pts] = starts
+    prv = idx - 1
+    prv[starts] = end_pts
+
+    # 每个点产生的边数：在线点→下一个在线点为1条直线；离线点为steps条曲线边
+    lines = on & on[nxt]
+    curves = ~on
+    counts = np.where(lines, 1, np.where(curves, steps, 0))
+
+    src = np.repeat(idx, counts)
+    is_curve = curves[src]
+
+    # 直线边为 (在线点, 下一点)；曲线边只对离线点求值
+    a = coords[src]
+    b = coords[nxt[src]]
+    ctrl = coords[idx[curves]]
+    prev_pt = coords[prv[curves]]
+    next_pt = coords[nxt[curves]]
+    q0 = np.where(on[prv[curves]][:, None], prev_pt, (prev_pt + ctrl) * 0.5)
+    q2 = np.where(on[nxt[curves]][:, None], next_pt, (next_pt + ctrl) * 0.5)
+
+    # 每段曲线的 steps + 1 个采样点，相邻采样点构成一条边
+    t = np.linspace(0.0, 1.0, steps + 1)[None, :, None]
+    mt = 1 - t
+    samples = mt * mt * q0[:, None] + 2 * mt * t * ctrl[:, None] + t * t * q2[:, None]
+    a[is_curve] = samples[:, :-1].reshape(-1, 2)
+    b[is_curve] = samples[:, 1:].reshape(-1, 2)
+    return a, b, contour_of[src]
+
+
+def find_intersections(glyphs: Dict[str, object],
+                       steps: int = 8,
+                       eps: float = 1e-6,
+                       self_only: bool = False) -> Dict[str, List[Tuple[int, int, Point]]]:
+    """
+    批量检测整套TrueType字形的轮廓相交
+
+    所有字形先展平为折线边，再按 (字形, xmin) 排序做一次扫描线配对，
+    只对包围盒重叠的边对做向量化的线段相交测试。
+    self_only 为真时按 (轮廓, xmin) 排序，只配对同一轮廓的边（跳过轮廓间的配对）。
+    返回: {字形名: [(轮廓a, 轮廓b, 交点), ...]}，a == b 表示轮廓自相交；
+          没有相交的字形不出现在结果中。
+    """
+    names = []
+    coord_parts, flag_parts, end_parts, contour_glyph = [], [], [], []
+    total = 0
+    for name, glyph in glyphs.items():
+        if getattr(glyph, 'numberOfContours', 0) <= 0:
+            continue
+        coord_parts.append(np.frombuffer(glyph.coordinates.array, dtype=float))
+        flag_parts.append(np.frombuffer(glyph.flags, dtype=np.uint8))
+        end_parts.append(np.asarray(glyph.endPtsOfContours, dtype=np.intp) + total)
+        contour_glyph.append(np.full(len(glyph.endPtsOfContours), len(names), dtype=np.intp))
+        total += len(flag_parts[-1])
+        names.append(name)
+
+    if not names:
+        return {}
+
+    # 整套字形一次展平，轮廓编号为全局编号
+    a, b, contour = flatten_quadratic_contours(
+        np.concatenate(coord_parts), np.concatenate(flag_parts),
+        np.concatenate(end_parts), steps)
+    contour_glyph = np.concatenate(contour_glyph)
+    contour_base = np.concatenate([[0], np.flatnonzero(np.diff(contour_glyph)) + 1])
+    glyph_id = contour_glyph[contour]
+
+    lo = np.minimum(a, b)
+    hi = np.maximum(a, b)
+    # 字形（或轮廓）编号编入排序键，使扫描只在同一字形（或轮廓）内配对
+    group = contour if self_only else glyph_id
+    span = hi[:, 0].max() - lo[:, 0].min() + 1
+    base = lo[:, 0].min()
+    key_lo = group * span + (lo[:, 0] - base)
+    key_hi = group * span + (hi[:, 0] - base)
+
+    order = np.argsort(key_lo, kind='stable')
+    sorted_lo = key_lo[order]
+    stop = np.searchsorted(sorted_lo, key_hi[order], side='right')
+    position = np.arange(len(order))
+    counts = np.maximum(stop - position - 1, 0)
+    i_sorted = np.repeat(position, counts)
+    j_sorted = i_sorted + 1 + np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+    i = order[i_sorted]
+    j = order[j_sorted]
+
+    # 同一轮廓中首尾相接的边只在公共端点接触：按边下标排除（边按轮廓顺序排列）
+    edge = np.arange(len(a))
+    first = np.flatnonzero(np.concatenate([[True], contour[1:] != contour[:-1]]))
+    next_edge = edge + 1
+    next_edge[np.concatenate([first[1:], [len(a)]]) - 1] = first
+
+    # y方向包围盒过滤（按列取值，避免 (N, 2) 的花式索引）
+    lo_y, hi_y = lo[:, 1], hi[:, 1]
+    keep = ((lo_y[i] <= hi_y[j]) & (lo_y[j] <= hi_y[i])
+            & (next_edge[i] != j) & (next_edge[j] != i))
+    i, j = i[keep], j[keep]
+
+    ax, ay = a[:, 0], a[:, 1]
+    dx, dy = b[:, 0] - ax, b[:, 1] - ay
+    rx, ry = dx[i], dy[i]
+    sx, sy = dx[j], dy[j]
+    qx, qy = ax[j] - ax[i], ay[j] - ay[i]
+    denom = rx * sy - ry * sx
+    valid = denom != 0
+    safe = np.where(valid, denom, 1.0)
+    t = (qx * sy - qy * sx) / safe
+    u = (qx * ry - qy * rx) / safe
+    hit = valid & (t > eps) & (t < 1 - eps) & (u > eps) & (u < 1 - eps)
+    r = np.stack([rx, ry], axis=1)
+
+    results: Dict[str, List[Tuple[int, int, Point]]] = {}
+    points = a[i[hit]] + r[hit] * t[hit, None]
+    for gi, ci, cj, p in zip(glyph_id[i[hit]], contour[i[hit]], contour[j[hit]], points):
+        ci, cj = sorted((ci - contour_base[gi], cj - contour_base[gi]))
+        results.setdefault(names[gi], []).append(
+            (int(ci), int(cj), (float(p[0]), float(p[1]))))
+    return results
@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""
+嵌入式位图字形（EBLC/EBDT）
+在生成时把字形按若干小字号（ppem）预先光栅化并写入字体，
+客户端在这些字号下直接贴图，不再实时光栅化未经微调的轮廓
+"""
+
+from typing import Dict, List, Sequence, Tuple
+
+# NumPy 与光栅化器在生成位图时才导入：生成器命令行解析字号（含指纹缓存命中）只需要 parse_strike_sizes
+
+DEFAULT_STRIKE_SIZES = (10, 11, 12, 13, 14)
+DEFAULT_BIT_DEPTH = 8
+BIT_DEPTHS = (1, 2, 4, 8)
+
+# 位图度量以有符号字节存储，字号再大就可能溢出
+MAX_STRIKE_PPEM = 100
+
+# EBLC/EBDT 位图数据格式 1：小度量、按字节对齐的行
+INDEX_FORMAT = 1
+IMAGE_FORMAT = 1
+
+
+def parse_strike_sizes(value: str) -> List[int]:
+    """解析逗号分隔的 ppem 列表（去重并排序）"""
+    try:
+        sizes = sorted({int(size) for size in value.split(',') if size.strip()})
+    except ValueError:
+        raise ValueError(f"无效的位图字号列表: {value}")
+    if any(not 0 < size <= MAX_STRIKE_PPEM for size in sizes):
+        raise ValueError(f"位图字号必须在 1-{MAX_STRIKE_PPEM} 之间: {value}")
+    return sizes
+
+
+def pack_rows(coverage: 'np.ndarray', bit_depth: int) -> bytes:
+    """把 uint8 覆盖率量化到 bit_depth 位，并按行对齐到字节打包（高位在前）"""
+    import numpy as np
+
+    if bit_depth == 8:
+        return coverage.tobytes()
+    per_byte = 8 // bit_depth
+    height, width = coverage.shape
+    levels = (coverage.astype(np.uint16) * ((1 << bit_depth) - 1) + 127) // 255
+    padded = np.zeros((height, -(-width // per_byte) * per_byte), dtype=np.uint16)
+    padded[:, :width] = levels
+    shifts = np.arange(per_byte - 1, -1, -1) * bit_depth
+    packed = (padded.reshape(height, -1, per_byte) << shifts).sum(axis=2)
+    return packed.astype(np.uint8).tobytes()
+
+
+def _line_metrics(font, scale: float, bitmaps: Dict[str, 'GlyphBitmap'],
+                  advances: Dict[str, int]):
+    """一个字号的 sbitLineMetrics（横排；竖排沿用同一组值）"""
+    from fontTools.ttLib.tables.E_B_L_C_ import SbitLineMetrics
+
+    hhea = font['hhea']
+    metrics = SbitLineMetrics()
+    metrics.ascender = round(hhea.ascent * scale)
+    metrics.descender = round(hhea.descent * scale)
+    metrics.widthMax = max(advances.values())
+    metrics.caretSlopeNumerator = hhea.caretSlopeRise
+    metrics.caretSlopeDenominator = hhea.caretSlopeRun
+    metrics.caretOffset = 0
+    metrics.minOriginSB = min(bitmap.left for bitmap in bitmaps.values())
+    metrics.minAdvanceSB = min(advances[name] - bitmap.left - bitmap.coverage.shape[1]
+                               for name, bitmap in bitmaps.items())
+    metrics.maxBeforeBL = max(bitmap.top for bitmap in bitmaps.values())
+    metrics.minAfterBL = min(bitmap.top - bitmap.coverage.shape[0] for bitmap in bitmaps.values())
+    metrics.pad1 = metrics.pad2 = 0
+    return metrics
+
+
+def _strike(font, ppem: int, bit_depth: int, bitmaps: Dict[str, 'GlyphBitmap']):
+    """由一个字号的字形位图生成 EBLC 的 Strike 与 EBDT 的字形数据"""
+    from fontTools.ttLib.tables.BitmapGlyphMetrics import SmallGlyphMetrics
+    from fontTools.ttLib.tables.E_B_D_T_ import ebdt_bitmap_format_1
+    from fontTools.ttLib.tables.E_B_L_C_ import Strike, eblc_index_sub_table_1
+
+    scale = ppem / font['head'].unitsPerEm
+    hmtx = font['hmtx']
+    advances = {name: round(hmtx[name][0] * scale) for name in bitmaps}
+
+    glyph_data = {}
+    for name, bitmap in bitmaps.items():
+        height, width = bitmap.coverage.shape
+        glyph = ebdt_bitmap_format_1(None, None)
+        glyph.metrics = SmallGlyphMetrics()
+        glyph.metrics.height = height
+        glyph.metrics.width = width
+        glyph.metrics.BearingX = bitmap.left
+        glyph.metrics.BearingY = bitmap.top
+        glyph.metrics.Advance = advances[name]
+        glyph.imageData = pack_rows(bitmap.coverage, bit_depth)
+        glyph_data[name] = glyph
+
+    strike = Strike()
+    size_table = strike.bitmapSizeTable
+    size_table.colorRef = 0
+    size_table.hori = _line_metrics(font, scale, bitmaps, advances)
+    size_table.vert = _line_metrics(font, scale, bitmaps, advances)
+    size_table.ppemX = size_table.ppemY = ppem
+    size_table.bitDepth = bit_depth
+    size_table.flags = 1  # 横排度量
+
+    # 字形 ID 必须递增；格式 1 的索引子表允许中间跳过空字形
+    index = eblc_index_sub_table_1(None, None)
+    index.indexFormat = INDEX_FORMAT
+    index.imageFormat = IMAGE_FORMAT
+    index.names = sorted(bitmaps, key=font.getGlyphID)
+    index.locations = []
+    strike.indexSubTables = [index]
+    return strike, glyph_data
+
+
+def add_bitmap_strikes(font, sizes: Sequence[int] = DEFAULT_STRIKE_SIZES,
+                       bit_depth: int = DEFAULT_BIT_DEPTH) -> Tuple[int, int]:
+    """
+    为字体（TTFont）写入各 ppem 的位图字形，替换已有的 EBLC/EBDT
+
+    每个字形的轮廓只展平一次，全部字号的全部字形在一次 rasterize_batch 中光栅化。
+    sizes 为空时只移除已有的位图字形。
+    返回: (字号数, 位图字形数)
+    """
+    from fontTools.ttLib import newTable
+    from rasterizer import glyph_edges, rasterize_batch
+
+    if bit_depth not in BIT_DEPTHS:
+        raise ValueError(f"位深必须是 {'/'.join(map(str, BIT_DEPTHS))} 之一: {bit_depth}")
+    for tag in ('EBLC', 'EBDT'):
+        if tag in font:
+            del font[tag]
+    if not sizes:
+        return 0, 0
+
+    glyf = font['glyf']
+    units_per_em = font['head'].unitsPerEm
+    edges = {name: glyph_edges(glyf, name) for name in font.getGlyphOrder()}
+    names = [name for name, (a, _) in edges.items() if len(a)]
+    if not names:
+        return 0, 0
+
+    bitmaps = rasterize_batch([(*edges[name], ppem / units_per_em)
+                               for ppem in sizes for name in names])
+
+    eblc = newTable('EBLC')
+    eblc.version = 2.0
+    eblc.strikes = []
+    ebdt = newTable('EBDT')
+    ebdt.version = 2.0
+    ebdt.strikeData = []
+    count = 0
+    for i, ppem in enumerate(sizes):
+        strike_bitmaps = {name: bitmap
+                          for name, bitmap in zip(names, bitmaps[i * len(names):(i + 1) * len(names)])
+                          if bitmap.coverage.size}
+        if not strike_bitmaps:
+            continue
+        strike, glyph_data = _strike(font, ppem, bit_depth, strike_bitmaps)
+        eblc.strikes.append(strike)
+        ebdt.strikeData.append(glyph_data)
+        count += len(glyph_data)
+
+    if eblc.strikes:
+        font['EBLC'] = eblc
+        font['EBDT'] = ebdt
+    return len(eblc.strikes), count
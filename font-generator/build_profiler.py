@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""
+构建剖析
+在生成流程的各阶段（见 build_stages）前后挂接 cProfile 或 tracemalloc，
+按阶段把 pstats、折叠调用栈或内存分配排行写入指定目录，文件名带字体ID
+"""
+
+import cProfile
+import os
+import pstats
+import tracemalloc
+from collections import Counter, OrderedDict, defaultdict
+from typing import Dict, List, Optional
+
+from build_stages import BuildStages
+
+PROFILE_MODES = ('cpu', 'mem')
+
+# 每个阶段报告的内存分配条目数
+TOP_ALLOCATIONS = 25
+
+# 折叠调用栈的最大深度与最小分摊时间（微秒），防止调用图中的环与细枝无限展开
+MAX_STACK_DEPTH = 64
+MIN_STACK_MICROS = 1.0
+
+
+def _stage_file_name(font_id: str, stage: str, suffix: str) -> str:
+    # 阶段名可能含 '/'（如 OS/2）
+    return f"{font_id}.{stage.replace('/', '_')}{suffix}"
+
+
+def _label(func) -> str:
+    filename, line, name = func
+    if filename == '~':
+        return name
+    return f"{name} ({os.path.basename(filename)}:{line})"
+
+
+def collapsed_stacks(stats: pstats.Stats) -> Dict[str, int]:
+    """
+    由 pstats 的调用关系生成折叠调用栈（flamegraph.pl / speedscope 格式）
+
+    cProfile 只记录调用者与被调用者的边，函数的自身耗时按各条边的累计耗时比例分摊到调用栈，
+    因此是近似值。返回: {"a;b;c": 微秒}
+    """
+    entries = stats.stats
+    callees = defaultdict(dict)
+    for func, (_, _, _, _, callers) in entries.items():
+        for caller, edge in callers.items():
+            callees[caller][func] = edge
+    roots = [func for func, (_, _, _, _, callers) in entries.items() if not callers]
+
+    stacks: Counter = Counter()
+
+    def walk(func, stack, budget, depth):
+        _, _, tottime, cumtime, _ = entries[func]
+        scale = budget / cumtime if cumtime else 0.0
+        stack = stack + [_label(func)]
+        if tottime * scale * 1e6 >= MIN_STACK_MICROS:
+            stacks[';'.join(stack)] += tottime * scale * 1e6
+        if depth >= MAX_STACK_DEPTH:
+            return
+        for callee, (_, _, _, edge_cumtime) in callees[func].items():
+            share = edge_cumtime * scale
+            if callee in entries and share * 1e6 >= MIN_STACK_MICROS and _label(callee) not in stack:
+                walk(callee, stack, share, depth + 1)
+
+    for root in roots:
+        walk(root, [], entries[root][3], 0)
+    return {stack: int(round(micros)) for stack, micros in stacks.items() if micros >= 0.5}
+
+
+class CpuProfileStages(BuildStages):
+    """每个阶段一个 cProfile.Profile，同名阶段多次进入时累加"""
+
+    def __init__(self, memory_limit: Optional[int] = None):
+        super().__init__(memory_limit)
+        self.profiles: 'OrderedDict[str, cProfile.Profile]' = OrderedDict()
+        self._active: List[cProfile.Profile] = []
+
+    def enter(self, name: str):
+        # 同一线程只能有一个活动的剖析器：嵌套阶段时暂停外层
+        if self._active:
+            self._active[-1].disable()
+        profile = self.profiles.setdefault(name, cProfile.Profile())
+        self._active.append(profile)
+        profile.enable()
+
+    def exit(self, name: str):
+        self._active.pop().disable()
+        if self._active:
+            self._active[-1].enable()
+
+    def dump(self, output_dir: str, font_id: str) -> List[str]:
+        """写出每个阶段的 <字体ID>.<阶段>.pstats 与 .collapsed，返回写入的路径"""
+        os.makedirs(output_dir, exist_ok=True)
+        paths = []
+        for name, profile in self.profiles.items():
+            stats = pstats.Stats(profile)
+            pstats_path = os.path.join(output_dir, _stage_file_name(font_id, name, '.pstats'))
+            stats.dump_stats(pstats_path)
+            collapsed_path = os.path.join(output_dir, _stage_file_name(font_id, name, '.collapsed'))
+            with open(collapsed_path, 'w', encoding='utf-8') as f:
+                for stack, micros in sorted(collapsed_stacks(stats).items()):
+                    f.write(f"{stack} {micros}\n")
+            paths.extend([pstats_path, collapsed_path])
+        return paths
+
+
+class MemoryProfileStages(BuildStages):
+    """
+    按阶段比较 tracemalloc 快照，记录各阶段新增内存最多的分配位置
+
+    未在跟踪时于第一个阶段开始跟踪，dump() 时停止
+    """
+
+    def __init__(self, frames: int = 1, top: int = TOP_ALLOCATIONS,
+                 memory_limit: Optional[int] = None):
+        super().__init__(memory_limit)
+        self.frames = frames
+        self.top = top
+        self.allocations: 'OrderedDict[str, List[tracemalloc.StatisticDiff]]' = OrderedDict()
+        self._snapshots: List[tracemalloc.Snapshot] = []
+        self._started = False
+
+    def _snapshot(self) -> tracemalloc.Snapshot:
+        # 排除剖析自身（阶段记录、快照）的分配
+        return tracemalloc.take_snapshot().filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                                   'build_*.py')),
+            tracemalloc.Filter(False, '<frozen *>'),
+            tracemalloc.Filter(False, '<unknown>'),
+        ))
+
+    def enter(self, name: str):
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(self.frames)
+            self._started = True
+        self._snapshots.append(self._snapshot())
+
+    def exit(self, name: str):
+        before = self._snapshots.pop()
+        diffs = self._snapshot().compare_to(before, 'traceback' if self.frames > 1 else 'lineno')
+        self.allocations.setdefault(name, []).extend(diffs[:self.top])
+
+    def dump(self, output_dir: str, font_id: str) -> List[str]:
+        """写出 <字体ID>.tracemalloc.txt（各阶段的分配排行），返回写入的路径"""
+        if self._started:
+            tracemalloc.stop()
+            self._started = False
+        os.makedirs(output_dir, exist_ok=True)
+        path = os.path.join(output_dir, f"{font_id}.tracemalloc.txt")
+        with open(path, 'w', encoding='utf-8') as f:
+            for name, diffs in self.allocations.items():
+                diffs = sorted(diffs, key=lambda diff: diff.size_diff, reverse=True)[:self.top]
+                total = sum(diff.size_diff for diff in diffs)
+                f.write(f"== {name}（{self.timings.get(name, 0.0) * 1000:.3f} ms，"
+                        f"前 {len(diffs)} 项净增 {total / 1024:.1f} KiB）\n")
+                for diff in diffs:
+                    f.write(f"{diff}\n")
+                f.write("\n")
+        return [path]
+
+
+def profile_stages(mode: str, memory_limit: Optional[int] = None) -> BuildStages:
+    """按剖析模式创建挂接到各阶段的 BuildStages（memory_limit 见 BuildStages）"""
+    if mode == 'cpu':
+        return CpuProfileStages(memory_limit)
+    if mode == 'mem':
+        return MemoryProfileStages(memory_limit=memory_limit)
+    raise ValueError(f"未知的剖析模式: {mode}（可选: {', '.join(PROFILE_MODES)}）")
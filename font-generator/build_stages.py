@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+构建阶段记录
+生成流程把各阶段（设计、二次曲线转换、各表设置、保存）包在 stage() 中，
+默认只累计耗时；基准测试、剖析与内存统计通过子类在阶段前后挂接。
+设置内存上限时，每个阶段结束后检查进程峰值 RSS，超出即中止生成
+"""
+
+import sys
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Optional
+
+try:
+    import resource
+except ImportError:
+    # Windows 没有 resource 模块，不统计 RSS
+    resource = None
+
+MB = 1024 * 1024
+
+
+class MemoryLimitExceeded(MemoryError):
+    """生成过程的峰值 RSS 超出内存上限"""
+
+
+def peak_rss() -> Optional[int]:
+    """
+    进程迄今的峰值常驻内存（字节）
+
+    返回: 平台不支持时为 None
+    """
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux 以 KiB 为单位，macOS 以字节为单位
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+class BuildStages:
+    """
+    按阶段累计耗时（秒）
+
+    同名阶段多次进入时耗时累加；子类重写 enter() / exit() 即可在每个阶段前后附加统计。
+    memory_limit（字节）非空时，阶段结束后峰值 RSS 超出上限即抛出 MemoryLimitExceeded
+    """
+
+    def __init__(self, memory_limit: Optional[int] = None):
+        self.timings: 'OrderedDict[str, float]' = OrderedDict()
+        self.memory_limit = memory_limit
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        self.enter(name)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.timings[name] = self.timings.get(name, 0.0) + time.perf_counter() - start
+            self.exit(name)
+        self.check_memory(name)
+
+    def enter(self, name: str):
+        pass
+
+    def exit(self, name: str):
+        pass
+
+    def check_memory(self, name: str):
+        if self.memory_limit is None:
+            return
+        peak = peak_rss()
+        if peak is not None and peak > self.memory_limit:
+            raise MemoryLimitExceeded(
+                f"阶段 {name} 后峰值内存 {peak / MB:.1f} MB 超出上限 {self.memory_limit / MB:.1f} MB")
+
+    def report(self) -> Dict[str, float]:
+        """各阶段耗时（毫秒）"""
+        return {name: round(seconds * 1000, 3) for name, seconds in self.timings.items()}
+
+
+class MemoryStages(BuildStages):
+    """
+    按阶段统计内存
+
+    每个阶段记录结束时的进程峰值 RSS、该阶段抬高的峰值 RSS，以及 tracemalloc 统计的
+    净增分配与阶段内分配峰值（相对阶段开始时）。未在跟踪时于第一个阶段开始跟踪，
+    stop() 时停止；同名阶段多次进入时增量累加、峰值取大
+    """
+
+    def __init__(self, memory_limit: Optional[int] = None):
+        super().__init__(memory_limit)
+        self.memory: 'OrderedDict[str, Dict[str, int]]' = OrderedDict()
+        self._starts = []
+        self._started = False
+
+    def enter(self, name: str):
+        import tracemalloc
+
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started = True
+        current, peak = tracemalloc.get_traced_memory()
+        # 阶段可能嵌套：重置峰值前把外层阶段迄今的峰值记下
+        if self._starts:
+            self._starts[-1]['peak'] = max(self._starts[-1]['peak'], peak)
+        tracemalloc.reset_peak()
+        self._starts.append({'current': current, 'peak': current, 'rss': peak_rss() or 0})
+
+    def exit(self, name: str):
+        import tracemalloc
+
+        start = self._starts.pop()
+        current, peak = tracemalloc.get_traced_memory()
+        peak = max(peak, start['peak'])
+        rss = peak_rss() or 0
+        entry = self.memory.setdefault(name, {'rssPeak': 0, 'rssGrowth': 0,
+                                              'allocated': 0, 'allocatedPeak': 0})
+        entry['rssPeak'] = max(entry['rssPeak'], rss)
+        entry['rssGrowth'] += rss - start['rss']
+        entry['allocated'] += current - start['current']
+        entry['allocatedPeak'] = max(entry['allocatedPeak'], peak - start['current'])
+        if self._starts:
+            self._starts[-1]['peak'] = max(self._starts[-1]['peak'], peak)
+
+    def stop(self):
+        """停止由本对象开始的 tracemalloc 跟踪"""
+        import tracemalloc
+
+        if self._started:
+            tracemalloc.stop()
+            self._started = False
+
+    def memory_report(self) -> Dict[str, Dict[str, Any]]:
+        """各阶段内存（MB）：rssPeak、rssGrowth、allocated、allocatedPeak"""
+        return {name: {key: round(value / MB, 3) for key, value in entry.items()}
+                for name, entry in self.memory.items()}
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+字形设计参数
+把设计规格解析为不可变、可哈希的参数对象，供生成器与字形设计器共用，
+也可直接作为字形级/字体级缓存的键
+"""
+
+from dataclasses import dataclass, field, fields, replace
+from typing import Any, Dict
+
+# corners → 圆角半径占笔画宽度的比例
+CORNER_FACTORS = {
+    'sharp': 0.0,
+    'rounded': 0.3,
+    'soft': 0.5
+}
+
+# contrast → 水平笔画宽度占笔画宽度的比例（增强视觉差异）
+CONTRAST_FACTORS = {
+    'none': 1.0,
+    'low': 0.75,
+    'medium': 0.6,
+    'high': 0.4
+}
+
+
+@dataclass(frozen=True)
+class DesignParams:
+    """
+    已解析的字形设计参数
+
+    派生值（corner_radius, horizontal_stroke）在构造时计算，不能单独指定；
+    需要修改参数时使用 with_changes() 生成新对象。
+    """
+
+    # 度量
+    units_per_em: int = 1000
+    cap_height: int = 750
+    x_height: int = 550
+    ascender: int = 850
+    descender: int = -220
+
+    # 比例
+    stroke_width: float = 80.0
+    contrast: str = 'medium'
+
+    # 视觉样式
+    terminals: str = 'straight'
+    corners: str = 'rounded'
+    aperture: str = 'open'
+    axis: str = 'vertical'
+    stress: str = 'none'
+
+    # 派生参数
+    corner_radius: float = field(init=False)
+    horizontal_stroke: float = field(init=False)
+
+    def __post_init__(self):
+        object.__setattr__(self, 'stroke_width', float(self.stroke_width))
+        object.__setattr__(self, 'corner_radius',
+                           self.stroke_width * CORNER_FACTORS.get(self.corners, 0.3))
+        object.__setattr__(self, 'horizontal_stroke',
+                           self.stroke_width * CONTRAST_FACTORS.get(self.contrast, 0.7))
+
+    @classmethod
+    def from_spec(cls, spec: Dict[str, Any]) -> 'DesignParams':
+        """
+        从完整的设计规格（FontDesignSpec）解析
+
+        规格应已经过 spec_parser.normalize_spec 校验；缺失字段使用类默认值
+        """
+        design = spec.get('designParameters', {})
+        return cls.from_dict({
+            'metrics': design.get('metrics', {}),
+            'proportions': design.get('proportions', {}),
+            'visualStyle': spec.get('styleDefinition', {}).get('visualStyle', {}),
+        })
+
+    @classmethod
+    def from_dict(cls, design_params: Dict[str, Any]) -> 'DesignParams':
+        """
+        从 {metrics, proportions, visualStyle} 形式的嵌套字典解析
+        （GlyphDesigner 原有的参数格式）
+        """
+        metrics = design_params.get('metrics', {})
+        proportions = design_params.get('proportions', {})
+        visual_style = design_params.get('visualStyle', {})
+        values = {
+            'units_per_em': metrics.get('unitsPerEm'),
+            'cap_height': metrics.get('capHeight'),
+            'x_height': metrics.get('xHeight'),
+            'ascender': metrics.get('ascender'),
+            'descender': metrics.get('descender'),
+            'stroke_width': proportions.get('strokeWidth'),
+            'contrast': proportions.get('contrast'),
+            'terminals': visual_style.get('terminals'),
+            'corners': visual_style.get('corners'),
+            'aperture': visual_style.get('aperture'),
+            'axis': visual_style.get('axis'),
+            'stress': visual_style.get('stress'),
+        }
+        return cls(**{k: v for k, v in values.items() if v is not None})
+
+    def with_changes(self, **changes) -> 'DesignParams':
+        """返回修改了部分参数的新对象（派生值重新计算）"""
+        return replace(self, **changes)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """全部参数（含派生值）的字典形式"""
+        return {f.name: getattr(self, f.name) for f in fields(self)}
@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+内存映射字体存储
+以 lazy=True 在内存映射文件上打开已生成的字体：只读取并解析调用方实际访问的表，
+映射的页面由操作系统按需载入、与其他进程共享；打开的句柄数有上限
+"""
+
+import mmap
+import os
+from collections import OrderedDict
+from typing import Dict, NamedTuple, Tuple
+
+# 与后端 OUTPUT_DIR 一致
+DEFAULT_FONTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'output', 'fonts')
+
+
+def font_path_for(font_id: str, fonts_dir: str = DEFAULT_FONTS_DIR) -> str:
+    """字体ID对应的TTF路径（拒绝包含路径分隔符的ID）"""
+    if not font_id or os.path.basename(font_id) != font_id or font_id.startswith('.'):
+        raise ValueError(f"无效的字体ID: {font_id!r}")
+    path = os.path.join(fonts_dir, f"{font_id}.ttf")
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"字体文件不存在: {path}")
+    return path
+
+
+class _MappedReader:
+    """
+    内存映射上的只读文件对象
+
+    每个 TTFont 各持有一个读取器（独立的读取位置），共享同一块映射
+    """
+
+    def __init__(self, buffer: mmap.mmap, name: str):
+        self._buffer = buffer
+        self._pos = 0
+        self.name = name
+
+    def read(self, size: int = -1) -> bytes:
+        end = len(self._buffer) if size is None or size < 0 else self._pos + size
+        data = self._buffer[self._pos:end]
+        self._pos += len(data)
+        return data
+
+    def seek(self, offset: int, whence: int = os.SEEK_SET) -> int:
+        if whence == os.SEEK_CUR:
+            offset += self._pos
+        elif whence == os.SEEK_END:
+            offset += len(self._buffer)
+        self._pos = max(offset, 0)
+        return self._pos
+
+    def tell(self) -> int:
+        return self._pos
+
+    def seekable(self) -> bool:
+        return True
+
+    def close(self):
+        # 映射由所有读取器共享，随最后一个引用释放
+        pass
+
+
+class _Handle(NamedTuple):
+    stamp: Tuple[int, int]
+    buffer: mmap.mmap
+    font: object
+
+
+def _stamp(font_path: str) -> Tuple[int, int]:
+    stat = os.stat(font_path)
+    return stat.st_mtime_ns, stat.st_size
+
+
+class FontStore:
+    """
+    按路径复用内存映射字体句柄的有界池
+
+    open() 返回池中共享的只读 TTFont；load() 在同一映射上新建 TTFont，供需要修改字体
+    的调用方（如子集化）使用。超过 max_open 时淘汰最久未用的句柄：池不再引用它，
+    映射在调用方释放最后一个引用后自动解除，已取得的 TTFont 仍可继续使用。
+    文件被替换（修改时间或大小变化）后重新映射。
+    """
+
+    def __init__(self, max_open: int = 64):
+        self.max_open = max_open
+        self._handles: 'OrderedDict[str, _Handle]' = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._handles)
+
+    def _handle(self, font_path: str) -> _Handle:
+        from fontTools.ttLib import TTFont
+
+        key = os.path.abspath(font_path)
+        stamp = _stamp(key)
+        handle = self._handles.get(key)
+        if handle is not None and handle.stamp == stamp:
+            self._handles.move_to_end(key)
+            self.hits += 1
+            return handle
+
+        self.misses += 1
+        with open(key, 'rb') as f:
+            if stamp[1] == 0:
+                raise ValueError(f"字体文件为空: {font_path}")
+            buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        handle = _Handle(stamp, buffer, TTFont(_MappedReader(buffer, key), lazy=True))
+        self._handles[key] = handle
+        self._handles.move_to_end(key)
+        while len(self._handles) > self.max_open:
+            self._handles.popitem(last=False)
+            self.evictions += 1
+        return handle
+
+    def open(self, font_path: str):
+        """池中共享的只读 TTFont（表在首次访问时才读取与解析）"""
+        return self._handle(font_path).font
+
+    def load(self, font_path: str):
+        """在共享映射上新建的 TTFont，可以修改而不影响其他调用方"""
+        from fontTools.ttLib import TTFont
+
+        handle = self._handle(font_path)
+        return TTFont(_MappedReader(handle.buffer, handle.font.reader.file.name), lazy=True)
+
+    def open_id(self, font_id: str, fonts_dir: str = DEFAULT_FONTS_DIR):
+        """按字体ID打开（拒绝包含路径分隔符的ID）"""
+        return self.open(font_path_for(font_id, fonts_dir))
+
+    def clear(self):
+        """清空句柄池"""
+        self._handles.clear()
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            'open': len(self._handles),
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+        }
+
+
+# 进程内共享的字体存储
+font_store = FontStore()
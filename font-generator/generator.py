@@ -8,120 +8,29 @@ import json
 import sys
 import argparse
 import os
-from pathlib import Path
-from fontTools.ttLib import TTFont
-from fontTools.pens.recordingPen import RecordingPen
-from fontTools.pens.transformPen import TransformPen
-from fontTools.misc.transform import Transform
-try:
-    from fontTools.fontBuilder import FontBuilder
-except ImportError:
-    # 如果FontBuilder不可用，使用替代方案
-    FontBuilder = None
-import math
-
-# 导入专业字形设计器
-try:
-    from glyph_designer import GlyphDesigner
-    PROFESSIONAL_MODE = True
-except ImportError:
-    print("警告: 无法导入专业字形设计器，使用简化模式")
-    PROFESSIONAL_MODE = False
+import shutil
+import time
+# 模块级只导入标准库与轻量的规格/阶段模块：命令行参数检查、规格校验失败与指纹缓存命中
+# 都不需要 fontTools、NumPy 与字形设计器，它们在实际生成时才于函数内导入
+from spec_parser import (normalize_spec, spec_fingerprint, expand_character_set, SpecValidationError,
+                         DEFAULT_CHARACTERS)
+from build_stages import MB, BuildStages, MemoryLimitExceeded, MemoryStages
 
 def load_spec(spec_path):
     """加载设计规格JSON"""
     with open(spec_path, 'r', encoding='utf-8') as f:
         return json.load(f)
 
-def generate_char_path(char, spec):
-    """根据字符和规格生成SVG路径"""
-    design_params = spec['designParameters']
-    metrics = design_params['metrics']
-    proportions = design_params['proportions']
-    visual_style = spec['styleDefinition']['visualStyle']
-    
-    units_per_em = metrics['unitsPerEm']
-    x_height = metrics['xHeight']
-    cap_height = metrics['capHeight']
-    stroke_width = proportions['strokeWidth']
-    
-    # 字符宽度（根据字符类型确定）
-    if char.isupper():
-        char_height = cap_height
-    elif char.islower():
-        char_height = x_height
-    else:
-        char_height = x_height
-    
-    # 基础字符宽度
-    char_width = int(char_height * 0.6)
-    
-    # 生成简单的字符路径（MVP版本使用参数化模板）
-    return generate_template_char(char, char_width, char_height, stroke_width, visual_style, units_per_em)
-
-def generate_template_char(char, width, height, stroke_width, visual_style, units_per_em):
-    """基于模板生成字符路径"""
-    # MVP版本：使用简单的几何形状组合生成字符
-    # 实际实现应该根据字符特征生成更复杂的路径
-    
-    path_data = []
-    
-    if char in 'ABCDEFGHIJKLMNOPQRSTUVWXYZ':
-        # 大写字母：使用矩形和直线组合
-        if char in 'I':
-            # I: 单竖线
-            path_data.append(f'M {width//2} 0 L {width//2} {height}')
-        elif char in 'O':
-            # O: 圆形
-            center_x = width // 2
-            center_y = height // 2
-            radius = min(width, height) // 2 - stroke_width // 2
-            path_data.append(f'M {center_x + radius} {center_y} A {radius} {radius} 0 0 1 {center_x} {center_y - radius} A {radius} {radius} 0 0 1 {center_x - radius} {center_y} A {radius} {radius} 0 0 1 {center_x} {center_y + radius} A {radius} {radius} 0 0 1 {center_x + radius} {center_y} Z')
-        else:
-            # 其他字母：使用矩形框架
-            path_data.append(f'M {stroke_width//2} {stroke_width//2} L {width - stroke_width//2} {stroke_width//2} L {width - stroke_width//2} {height - stroke_width//2} L {stroke_width//2} {height - stroke_width//2} Z')
-    
-    elif char in 'abcdefghijklmnopqrstuvwxyz':
-        # 小写字母：类似处理但高度较小
-        if char in 'i':
-            path_data.append(f'M {width//2} 0 L {width//2} {height}')
-        elif char in 'o':
-            center_x = width // 2
-            center_y = height // 2
-            radius = min(width, height) // 2 - stroke_width // 2
-            path_data.append(f'M {center_x + radius} {center_y} A {radius} {radius} 0 0 1 {center_x} {center_y - radius} A {radius} {radius} 0 0 1 {center_x - radius} {center_y} A {radius} {radius} 0 0 1 {center_x} {center_y + radius} A {radius} {radius} 0 0 1 {center_x + radius} {center_y} Z')
-        else:
-            path_data.append(f'M {stroke_width//2} {stroke_width//2} L {width - stroke_width//2} {stroke_width//2} L {width - stroke_width//2} {height - stroke_width//2} L {stroke_width//2} {height - stroke_width//2} Z')
-    
-    elif char.isdigit():
-        # 数字：使用圆形和矩形组合
-        if char in '0':
-            center_x = width // 2
-            center_y = height // 2
-            radius = min(width, height) // 2 - stroke_width // 2
-            path_data.append(f'M {center_x + radius} {center_y} A {radius} {radius} 0 0 1 {center_x} {center_y - radius} A {radius} {radius} 0 0 1 {center_x - radius} {center_y} A {radius} {radius} 0 0 1 {center_x} {center_y + radius} A {radius} {radius} 0 0 1 {center_x + radius} {center_y} Z')
-        else:
-            path_data.append(f'M {stroke_width//2} {stroke_width//2} L {width - stroke_width//2} {stroke_width//2} L {width - stroke_width//2} {height - stroke_width//2} L {stroke_width//2} {height - stroke_width//2} Z')
-    
-    else:
-        # 标点符号：使用简单形状
-        if char == '.':
-            center_x = width // 2
-            center_y = height // 2
-            radius = stroke_width // 2
-            path_data.append(f'M {center_x + radius} {center_y} A {radius} {radius} 0 0 1 {center_x} {center_y - radius} A {radius} {radius} 0 0 1 {center_x - radius} {center_y} A {radius} {radius} 0 0 1 {center_x} {center_y + radius} A {radius} {radius} 0 0 1 {center_x + radius} {center_y} Z')
-        else:
-            path_data.append(f'M {stroke_width//2} {stroke_width//2} L {width - stroke_width//2} {stroke_width//2} L {width - stroke_width//2} {height - stroke_width//2} L {stroke_width//2} {height - stroke_width//2} Z')
-    
-    return ' '.join(path_data)
+# 任何字体都包含的字形
+REQUIRED_GLYPHS = ('.notdef', 'space')
 
-def create_font(spec, output_path):
-    """创建字体文件"""
+def create_font(spec, output_path, strike_sizes=(), bit_depth=8, stages=None, glyph_report=None):
+    """创建字体文件（strike_sizes 非空时嵌入这些 ppem 的位图字形；stages、glyph_report 见 create_minimal_font）"""
     print(f"🎨 开始生成字体文件...")
     
     # MVP版本：直接使用简化的 TrueType 字体生成
     # 后续版本将实现完整的字形绘制和样式应用
-    success = create_minimal_font(spec, output_path)
+    success = create_minimal_font(spec, output_path, strike_sizes, bit_depth, stages, glyph_report)
     
     if success:
         print(f"✅ 字体文件已成功生成: {output_path}")
@@ -129,336 +38,845 @@ def create_font(spec, output_path):
         print(f"❌ 字体文件生成失败")
         raise Exception("字体生成失败")
 
-def create_minimal_font(spec, output_path):
-    """创建专业级 TrueType 字体文件"""
-    print(f"📝 正在创建专业级 TrueType 字体文件...")
-    print(f"✨ 使用参数化贝塞尔曲线字形设计")
+def create_glyph_for_char_fallback(char, width, height):
+    """为特定字符创建简化的字形（专业设计器失败时的后备方案）"""
+    from fontTools.pens.ttGlyphPen import TTGlyphPen
     
+    pen = TTGlyphPen(None)
+    margin = width // 10
+    stroke = width // 8
+
+    # 根据字符类型创建不同的形状
+    if char.isupper():
+        # 大写字母：使用垂直线条 + 水平线条组合
+        # 左侧垂直线
+        pen.moveTo((margin, 0))
+        pen.lineTo((margin + stroke, 0))
+        pen.lineTo((margin + stroke, height))
+        pen.lineTo((margin, height))
+        pen.closePath()
+
+        # 顶部水平线
+        pen.moveTo((margin, height - stroke))
+        pen.lineTo((width - margin, height - stroke))
+        pen.lineTo((width - margin, height))
+        pen.lineTo((margin, height))
+        pen.closePath()
+
+    elif char.islower():
+        # 小写字母：使用较小的形状
+        # 中间垂直线
+        center_x = width // 2
+        pen.moveTo((center_x - stroke // 2, 0))
+        pen.lineTo((center_x + stroke // 2, 0))
+        pen.lineTo((center_x + stroke // 2, height))
+        pen.lineTo((center_x - stroke // 2, height))
+        pen.closePath()
+
+    elif char.isdigit():
+        # 数字：使用圆形轮廓
+        # 外框
+        pen.moveTo((margin, 0))
+        pen.lineTo((width - margin, 0))
+        pen.lineTo((width - margin, height))
+        pen.lineTo((margin, height))
+        pen.closePath()
+
+        # 内框（挖空）
+        inner_margin = margin + stroke
+        pen.moveTo((inner_margin, stroke))
+        pen.lineTo((inner_margin, height - stroke))
+        pen.lineTo((width - inner_margin, height - stroke))
+        pen.lineTo((width - inner_margin, stroke))
+        pen.closePath()
+
+    elif char in '.,;:':
+        # 标点符号：小圆点
+        center_x = width // 2
+        center_y = height // 4
+        radius = stroke
+        pen.moveTo((center_x - radius, center_y - radius))
+        pen.lineTo((center_x + radius, center_y - radius))
+        pen.lineTo((center_x + radius, center_y + radius))
+        pen.lineTo((center_x - radius, center_y + radius))
+        pen.closePath()
+
+    elif char in '!?':
+        # 感叹号问号：垂直线
+        center_x = width // 2
+        pen.moveTo((center_x - stroke // 2, height // 3))
+        pen.lineTo((center_x + stroke // 2, height // 3))
+        pen.lineTo((center_x + stroke // 2, height))
+        pen.lineTo((center_x - stroke // 2, height))
+        pen.closePath()
+
+    else:
+        # 其他符号：简单矩形
+        pen.moveTo((margin, 0))
+        pen.lineTo((width - margin, 0))
+        pen.lineTo((width - margin, height))
+        pen.lineTo((margin, height))
+        pen.closePath()
+
+    return pen.glyph(), margin
+
+def base_glyph_width(metrics):
+    """字符基础宽度（由 xHeight 推算，过窄时使用 400）"""
+    base_width = int(metrics['xHeight'] * 0.6)
+    if base_width < 300:
+        base_width = 400
+    return base_width
+
+def requested_characters(spec):
+    """
+    规格 characterSet 要求的字符
+    
+    按类别顺序排列（范围展开、说明文字丢弃，见 expand_character_set）；
+    未指定任何字符时返回默认字符集。
+    """
+    expanded = expand_character_set(spec.get('characterSet') or {})
+    return ''.join(expanded.values()) or DEFAULT_CHARACTERS
+
+def glyph_name_for(char):
+    """字形名：ASCII 可见字符直接使用字符本身，其余使用 uniXXXX"""
+    code = ord(char)
+    if 33 <= code < 127:
+        return char
+    return f"uni{code:04X}" if code <= 0xFFFF else f"u{code:X}"
+
+def glyph_plan(metrics, characters=DEFAULT_CHARACTERS):
+    """
+    计算需要设计的字符及其尺寸
+    
+    大写字母与数字使用 capHeight，小写字母使用 xHeight，其余按标点处理
+    返回: [(字形名, 字符, 宽度, 高度), ...]，按字形顺序排列（不含必需字形）
+    """
+    base_width = base_glyph_width(metrics)
+    punctuation_width = base_width // 2
+    
+    plan = []
+    for char in characters:
+        if char.isupper() or char.isdigit():
+            plan.append((glyph_name_for(char), char, base_width, metrics['capHeight']))
+        elif char.islower():
+            plan.append((glyph_name_for(char), char, base_width, metrics['xHeight']))
+        else:
+            plan.append((glyph_name_for(char), char, punctuation_width, metrics['xHeight'] // 2))
+    return plan
+
+def design_glyph(designer, char, width, height):
+    """
+    用专业设计器生成单个字形，失败时使用后备方案
+    
+    返回: (字形, 左侧边距)
+    """
     try:
-        from fontTools import fontBuilder
-        from fontTools.pens.ttGlyphPen import TTGlyphPen
-        from glyph_designer import GlyphDesigner
-        
-        metrics = spec['designParameters']['metrics']
-        basic_info = spec['basicInfo']
-        visual_style = spec['styleDefinition']['visualStyle']
-        proportions = spec['designParameters']['proportions']
-        
-        # 创建 FontBuilder 实例
-        fb = fontBuilder.FontBuilder(unitsPerEm=metrics['unitsPerEm'], isTTF=True)
-        
-        # 准备字形设计器参数
-        designer_params = {
-            'strokeWidth': proportions.get('strokeWidth', 80),
-            'contrast': proportions.get('contrast', 'medium'),
-            'terminals': visual_style.get('terminals', 'straight'),
-            'corners': visual_style.get('corners', 'rounded'),
-            'aperture': visual_style.get('aperture', 'semi-open'),
-            'axis': visual_style.get('axis', 'vertical'),
-            'stress': visual_style.get('stress', 'vertical'),
-            'capHeight': metrics['capHeight'],
-            'xHeight': metrics['xHeight'],
-            'unitsPerEm': metrics['unitsPerEm']
-        }
+        return designer.create_glyph(char, width, height)
+    except Exception as e:
+        print(f"⚠️  字符 {char} 生成失败，使用后备方案: {e}")
+        return create_glyph_for_char_fallback(char, width, height)
+
+def create_special_glyphs():
+    """
+    创建 .notdef 与 space 字形
+    
+    返回: (字形字典, 度量字典)
+    """
+    from fontTools.pens.ttGlyphPen import TTGlyphPen
+    
+    # .notdef 字形（必需）- 使用问号框表示
+    pen_notdef = TTGlyphPen(None)
+    margin = 50
+    pen_notdef.moveTo((margin, 0))
+    pen_notdef.lineTo((500 - margin, 0))
+    pen_notdef.lineTo((500 - margin, 700))
+    pen_notdef.lineTo((margin, 700))
+    pen_notdef.closePath()
+    
+    # space 字形（空白）
+    pen_space = TTGlyphPen(None)
+    
+    glyphs = {'.notdef': pen_notdef.glyph(), 'space': pen_space.glyph()}
+    metrics_dict = {'.notdef': (500, margin), 'space': (250, 0)}
+    return glyphs, metrics_dict
+
+def setup_name_table(fb, basic_info):
+    """设置名称表（只依赖 basicInfo）"""
+    fb.setupNameTable({
+        'familyName': basic_info['fontFamily'],
+        'styleName': 'Regular',
+        'uniqueFontIdentifier': f"{basic_info['fontFamily']}-Regular-1.0",
+        'fullName': basic_info['fontName'],
+        'version': 'Version 1.0',
+        'psName': basic_info['fontFamily'].replace(' ', '') + '-Regular',
+        'designer': 'QuickFont AI',
+        'description': 'Generated by QuickFont AI',
+        'vendorURL': 'https://quickfont.ai',
+    })
+
+def setup_horizontal_header(fb, metrics):
+    """设置水平头部信息（只依赖 ascender/descender）"""
+    fb.setupHorizontalHeader(
+        ascent=metrics['ascender'],
+        descent=metrics['descender']
+    )
+
+def setup_os2(fb, metrics):
+    """
+    设置 OS/2 表
+    
+    依赖 ascender/descender；xAvgCharWidth 由已设置的水平度量重新计算
+    """
+    fb.setupOS2(
+        sTypoAscender=metrics['ascender'],
+        sTypoDescender=metrics['descender'],
+        sTypoLineGap=200,
+        usWinAscent=metrics['ascender'],
+        usWinDescent=abs(metrics['descender'])
+    )
+
+class LazyGlyphSet:
+    """
+    按需设计的字形集合
+    
+    字形顺序与 cmap 由规格直接得出，查询时不设计任何字形；字形在首次被
+    请求（子集、预览、构建字体）时才设计并批量转换为二次曲线，之后复用。
+    keep_source_stats 为真时保留每个字形转换前的轮廓统计（供逐字形成本报告使用）。
+    """
+    
+    def __init__(self, spec, keep_source_stats=False):
+        from design_params import DesignParams
         
-        # 创建字形设计器
-        designer = GlyphDesigner(designer_params)
+        self.spec = spec
+        self.metrics = spec['designParameters']['metrics']
+        self.params = DesignParams.from_spec(spec)
+        self._designer = None
         
-        print(f"🎨 设计参数: strokeWidth={designer_params['strokeWidth']}, "
-              f"contrast={designer_params['contrast']}, "
-              f"terminals={designer_params['terminals']}")
+        plan = glyph_plan(self.metrics, requested_characters(spec))
+        self._plan = {glyph_name: (char, width, height) for glyph_name, char, width, height in plan}
+        self.glyph_order = list(REQUIRED_GLYPHS) + [glyph_name for glyph_name, _, _, _ in plan]
+        self.cmap = {ord(char): glyph_name for glyph_name, char, _, _ in plan}
+        self.cmap[32] = 'space'  # 空格
         
-        # 字形字典和度量
-        glyphs = {}
-        metrics_dict = {}  # {glyph_name: (width, lsb)}
+        # 已设计（已转换为二次曲线）的字形与度量 {glyph_name: (width, lsb)}
+        self._glyphs = {}
+        self._metrics = {}
+        # 每个字形的设计耗时（秒）与转换前的轮廓统计
+        self.design_times = {}
+        self.source_stats = {} if keep_source_stats else None
+    
+    def __len__(self):
+        return len(self.glyph_order)
+    
+    def __contains__(self, glyph_name):
+        return glyph_name in REQUIRED_GLYPHS or glyph_name in self._plan
+    
+    @property
+    def designed(self):
+        """已设计的字形名"""
+        return [glyph_name for glyph_name in self.glyph_order if glyph_name in self._glyphs]
+    
+    @property
+    def designer(self):
+        if self._designer is None:
+            from glyph_designer import GlyphDesigner
+            self._designer = GlyphDesigner(self.params)
+        return self._designer
+    
+    def char_for(self, glyph_name):
+        """字形对应的字符（必需字形为 None）"""
+        entry = self._plan.get(glyph_name)
+        return entry[0] if entry else None
+    
+    def glyph_names_for_text(self, text):
+        """文本所需的字形名（按字形顺序，含必需字形；cmap 中没有的字符忽略）"""
+        needed = {self.cmap[ord(char)] for char in text if ord(char) in self.cmap}
+        return [glyph_name for glyph_name in self.glyph_order
+                if glyph_name in needed or glyph_name in REQUIRED_GLYPHS]
+    
+    def design(self, glyph_names=None, stages=None):
+        """
+        设计尚未设计的字形（整批一次转换为二次曲线）
         
-        # 旧的创建字形函数（作为后备）
-        def create_glyph_for_char_fallback(char, width, height):
-            """为特定字符创建简化的字形"""
-            pen = TTGlyphPen(None)
-            margin = width // 10
-            stroke = width // 8
+        glyph_names: 省略时设计全部字形
+        stages: 记录设计、转换、简化各阶段的 BuildStages
+        返回: (字形字典, 度量字典)，只含请求的字形
+        """
+        if glyph_names is None:
+            glyph_names = self.glyph_order
+        if stages is None:
+            stages = BuildStages()
+        missing = [glyph_name for glyph_name in glyph_names if glyph_name not in self._glyphs]
+        if missing:
+            # 设计器（及其导入）在计时开始前创建，不计入第一个字形的设计耗时
+            designer = self.designer
+            glyphs = {}
+            with stages.stage('design'):
+                special_glyphs, special_metrics = create_special_glyphs()
+                for glyph_name in missing:
+                    if glyph_name in special_glyphs:
+                        glyphs[glyph_name] = special_glyphs[glyph_name]
+                        self._metrics[glyph_name] = special_metrics[glyph_name]
+                        continue
+                    char, width, height = self._plan[glyph_name]
+                    start = time.perf_counter()
+                    glyph, lsb = design_glyph(designer, char, width, height)
+                    self.design_times[glyph_name] = time.perf_counter() - start
+                    glyphs[glyph_name] = glyph
+                    self._metrics[glyph_name] = (width, lsb)
             
-            # 根据字符类型创建不同的形状
-            if char.isupper():
-                # 大写字母：使用垂直线条 + 水平线条组合
-                # 左侧垂直线
-                pen.moveTo((margin, 0))
-                pen.lineTo((margin + stroke, 0))
-                pen.lineTo((margin + stroke, height))
-                pen.lineTo((margin, height))
-                pen.closePath()
-                
-                # 顶部水平线
-                pen.moveTo((margin, height - stroke))
-                pen.lineTo((width - margin, height - stroke))
-                pen.lineTo((width - margin, height))
-                pen.lineTo((margin, height))
-                pen.closePath()
-                
-            elif char.islower():
-                # 小写字母：使用较小的形状
-                # 中间垂直线
-                center_x = width // 2
-                pen.moveTo((center_x - stroke // 2, 0))
-                pen.lineTo((center_x + stroke // 2, 0))
-                pen.lineTo((center_x + stroke // 2, height))
-                pen.lineTo((center_x - stroke // 2, height))
-                pen.closePath()
-                
-            elif char.isdigit():
-                # 数字：使用圆形轮廓
-                # 外框
-                pen.moveTo((margin, 0))
-                pen.lineTo((width - margin, 0))
-                pen.lineTo((width - margin, height))
-                pen.lineTo((margin, height))
-                pen.closePath()
-                
-                # 内框（挖空）
-                inner_margin = margin + stroke
-                pen.moveTo((inner_margin, stroke))
-                pen.lineTo((inner_margin, height - stroke))
-                pen.lineTo((width - inner_margin, height - stroke))
-                pen.lineTo((width - inner_margin, stroke))
-                pen.closePath()
-                
-            elif char in '.,;:':
-                # 标点符号：小圆点
-                center_x = width // 2
-                center_y = height // 4
-                radius = stroke
-                pen.moveTo((center_x - radius, center_y - radius))
-                pen.lineTo((center_x + radius, center_y - radius))
-                pen.lineTo((center_x + radius, center_y + radius))
-                pen.lineTo((center_x - radius, center_y + radius))
-                pen.closePath()
-                
-            elif char in '!?':
-                # 感叹号问号：垂直线
-                center_x = width // 2
-                pen.moveTo((center_x - stroke // 2, height // 3))
-                pen.lineTo((center_x + stroke // 2, height // 3))
-                pen.lineTo((center_x + stroke // 2, height))
-                pen.lineTo((center_x - stroke // 2, height))
-                pen.closePath()
-                
-            else:
-                # 其他符号：简单矩形
-                pen.moveTo((margin, 0))
-                pen.lineTo((width - margin, 0))
-                pen.lineTo((width - margin, height))
-                pen.lineTo((margin, height))
-                pen.closePath()
+            if self.source_stats is not None:
+                from glyph_report import outline_stats
+                for glyph_name, glyph in glyphs.items():
+                    self.source_stats[glyph_name] = outline_stats(glyph)
             
-            return pen.glyph(), margin
-        
-        # .notdef 字形（必需）- 使用问号框表示
-        pen_notdef = TTGlyphPen(None)
-        margin = 50
-        pen_notdef.moveTo((margin, 0))
-        pen_notdef.lineTo((500 - margin, 0))
-        pen_notdef.lineTo((500 - margin, 700))
-        pen_notdef.lineTo((margin, 700))
-        pen_notdef.closePath()
-        glyphs['.notdef'] = pen_notdef.glyph()
-        metrics_dict['.notdef'] = (500, margin)
-        
-        # space 字形（空白）
-        pen_space = TTGlyphPen(None)
-        glyphs['space'] = pen_space.glyph()
-        metrics_dict['space'] = (250, 0)
-        
-        # 计算基础宽度
-        base_width = int(metrics['xHeight'] * 0.6)
-        if base_width < 300:
-            base_width = 400
-        
-        print(f"📐 基础字符宽度: {base_width}")
-        
-        # 使用专业字形设计器生成所有字符
-        print(f"🎨 使用专业设计器生成字形...")
-        
-        # A-Z 大写字母
-        for i in range(65, 91):
-            char = chr(i)
-            try:
-                glyph, lsb = designer.create_glyph(char, base_width, metrics['capHeight'])
-                glyphs[char] = glyph
-                metrics_dict[char] = (base_width, lsb)
-            except Exception as e:
-                print(f"⚠️  字符 {char} 生成失败，使用后备方案: {e}")
-                glyph, lsb = create_glyph_for_char_fallback(char, base_width, metrics['capHeight'])
-                glyphs[char] = glyph
-                metrics_dict[char] = (base_width, lsb)
-        
-        # a-z 小写字母
-        for i in range(97, 123):
-            char = chr(i)
-            try:
-                glyph, lsb = designer.create_glyph(char, base_width, metrics['xHeight'])
-                glyphs[char] = glyph
-                metrics_dict[char] = (base_width, lsb)
-            except Exception as e:
-                print(f"⚠️  字符 {char} 生成失败，使用后备方案: {e}")
-                glyph, lsb = create_glyph_for_char_fallback(char, base_width, metrics['xHeight'])
-                glyphs[char] = glyph
-                metrics_dict[char] = (base_width, lsb)
-        
-        # 0-9 数字
-        for i in range(48, 58):
-            char = chr(i)
-            try:
-                glyph, lsb = designer.create_glyph(char, base_width, metrics['capHeight'])
-                glyphs[char] = glyph
-                metrics_dict[char] = (base_width, lsb)
-            except Exception as e:
-                print(f"⚠️  字符 {char} 生成失败，使用后备方案: {e}")
-                glyph, lsb = create_glyph_for_char_fallback(char, base_width, metrics['capHeight'])
-                glyphs[char] = glyph
-                metrics_dict[char] = (base_width, lsb)
-        
-        # 常用标点符号
-        punctuation_width = base_width // 2
-        for char in '.,;:!?\'"()-[]{}/@#$%&*+=<>':
-            try:
-                glyph, lsb = designer.create_glyph(char, punctuation_width, metrics['xHeight'] // 2)
-                glyphs[char] = glyph
-                metrics_dict[char] = (punctuation_width, lsb)
-            except Exception as e:
-                print(f"⚠️  字符 {char} 生成失败，使用后备方案: {e}")
-                glyph, lsb = create_glyph_for_char_fallback(char, punctuation_width, metrics['xHeight'] // 2)
-                glyphs[char] = glyph
-                metrics_dict[char] = (punctuation_width, lsb)
-        
-        print(f"✅ 成功生成 {len(glyphs)} 个字形")
+            # 整套字形的三次贝塞尔曲线一次性批量转换为二次贝塞尔，再整批删除冗余点
+            from quadratic_converter import glyphs_to_quadratic
+            from outline_simplifier import simplify_glyphs
+            with stages.stage('quadratic'):
+                glyphs = glyphs_to_quadratic(glyphs, max_err=1.0)
+            with stages.stage('simplify'):
+                self._glyphs.update(simplify_glyphs(glyphs))
         
-        # 设置字形顺序
-        glyph_order = ['.notdef', 'space']
-        glyph_order.extend([chr(i) for i in range(65, 91)])  # A-Z
-        glyph_order.extend([chr(i) for i in range(97, 123)])  # a-z
-        glyph_order.extend([chr(i) for i in range(48, 58)])  # 0-9
-        glyph_order.extend(list('.,;:!?\'"()-[]{}/@#$%&*+=<>'))
+        return ({glyph_name: self._glyphs[glyph_name] for glyph_name in glyph_names},
+                {glyph_name: self._metrics[glyph_name] for glyph_name in glyph_names})
+    
+    def glyph(self, glyph_name):
+        """
+        单个字形（需要时才设计）
         
+        返回: (二次曲线 TTGlyph, (宽度, 左侧边距))
+        """
+        glyphs, metrics_dict = self.design([glyph_name])
+        return glyphs[glyph_name], metrics_dict[glyph_name]
+
+# 构建字体时设置的表
+BUILD_TABLES = ('head', 'hhea', 'maxp', 'OS/2', 'hmtx', 'cmap', 'loca', 'glyf', 'name', 'post')
+
+def import_build_modules():
+    """
+    导入实际生成用到的模块（字形设计器、NumPy、fontTools 及各表的实现）
+    
+    在第一个阶段开始前调用，导入耗时不计入设计、name 等阶段的计时、剖析与内存统计；
+    参数检查、规格校验与缓存命中路径不调用
+    """
+    import glyph_designer
+    import quadratic_converter
+    import outline_simplifier
+    import bezier_utils
+    from fontTools import fontBuilder
+    from fontTools.ttLib import getTableModule
+    
+    for tag in BUILD_TABLES:
+        getTableModule(tag)
+
+def build_font(spec, glyph_set=None, glyph_names=None, stages=None):
+    """
+    按规格构建字体（不写文件）
+    
+    glyph_set: 可复用的 LazyGlyphSet，已设计的字形不会重复设计
+    glyph_names: 只包含这些字形（必需字形总是包含）；省略时包含规格要求的全部字符
+    stages: 记录各阶段耗时的 BuildStages（基准测试、剖析与内存统计按阶段挂接）
+    返回: TTFont 对象
+    """
+    from fontTools import fontBuilder
+    from bezier_utils import find_intersections
+    from glyph_designer import SELF_OVERLAPPING_CHARS
+    
+    import_build_modules()
+    metrics = spec['designParameters']['metrics']
+    basic_info = spec['basicInfo']
+    if stages is None:
+        stages = BuildStages()
+    
+    # 创建 FontBuilder 实例
+    fb = fontBuilder.FontBuilder(unitsPerEm=metrics['unitsPerEm'], isTTF=True)
+    
+    # 按需设计的字形集合（生成器与设计器共用同一份不可变设计参数）
+    if glyph_set is None:
+        glyph_set = LazyGlyphSet(spec)
+    params = glyph_set.params
+    
+    print(f"🎨 设计参数: strokeWidth={params.stroke_width:g}, "
+          f"contrast={params.contrast}, "
+          f"terminals={params.terminals}, "
+          f"corners={params.corners}")
+    
+    # 设置字形顺序
+    glyph_order = glyph_set.glyph_order
+    if glyph_names is not None:
+        wanted = set(glyph_names)
+        glyph_order = [glyph_name for glyph_name in glyph_order
+                       if glyph_name in wanted or glyph_name in REQUIRED_GLYPHS]
+    with stages.stage('glyphOrder'):
         fb.setupGlyphOrder(glyph_order)
-        
-        # 设置字符映射（Unicode -> 字形名称）
-        cmap = {}
-        for glyph_name in glyph_order:
-            if glyph_name not in ['.notdef', 'space']:
-                cmap[ord(glyph_name)] = glyph_name
-        cmap[32] = 'space'  # 空格
-        fb.setupCharacterMap(cmap)
-        
-        # 设置字形表（TrueType格式）
-        # 如果有三次贝塞尔曲线，fontTools会自动转换为二次贝塞尔
-        try:
-            from cu2qu.pens import Cu2QuPen
-            from fontTools.pens.recordingPen import RecordingPen
-            from fontTools.pens.ttGlyphPen import TTGlyphPen as TTGlyphPenReplay
-            
-            # 转换所有字形从三次贝塞尔到二次贝塞尔
-            converted_glyphs = {}
-            for glyph_name, glyph in glyphs.items():
-                if glyph_name in ['.notdef', 'space']:
-                    converted_glyphs[glyph_name] = glyph
-                    continue
-                
-                try:
-                    # 创建录制pen来捕获原始字形的绘制操作
-                    recording_pen = RecordingPen()
-                    glyph.draw(recording_pen, glyphs)
-                    
-                    # 创建cu2qu转换pen
-                    new_pen = TTGlyphPenReplay(None)
-                    cu2qu_pen = Cu2QuPen(new_pen, 1.0)  # 1.0 is max_err
-                    
-                    # 重放并转换
-                    recording_pen.replay(cu2qu_pen)
-                    converted_glyphs[glyph_name] = new_pen.glyph()
-                except Exception as e:
-                    print(f"⚠️  字形 {glyph_name} 转换失败，使用原始字形: {e}")
-                    converted_glyphs[glyph_name] = glyph
-            
-            fb.setupGlyf(converted_glyphs)
-            print("✅ 字形已转换为二次贝塞尔曲线")
-        except ImportError:
-            print("⚠️  cu2qu未安装，尝试直接使用字形...")
-            fb.setupGlyf(glyphs)
-        
-        # 设置水平度量
+    
+    print(f"📐 基础字符宽度: {base_glyph_width(metrics)}")
+    
+    # 使用专业字形设计器生成字符（已设计的字形直接复用）
+    print(f"🎨 使用专业设计器生成字形...")
+    converted_glyphs, metrics_dict = glyph_set.design(glyph_order, stages)
+    print(f"✅ 成功生成 {len(converted_glyphs)} 个字形")
+    
+    # 设置字符映射（Unicode -> 字形名称）
+    included = set(glyph_order)
+    with stages.stage('cmap'):
+        fb.setupCharacterMap({code: glyph_name for code, glyph_name in glyph_set.cmap.items()
+                              if glyph_name in included})
+    
+    # 设置字形表（TrueType格式）
+    with stages.stage('glyf'):
+        fb.setupGlyf(converted_glyphs)
+    print("✅ 字形已转换为二次贝塞尔曲线")
+
+    # 构建期轮廓自相交检查（仅告警，不中断生成）：只检查同一轮廓内的边，
+    # 设计器按笔画叠加构造的已知字符不检查
+    with stages.stage('intersections'):
+        checked = {name: glyph for name, glyph in converted_glyphs.items()
+                   if glyph_set.char_for(name) not in SELF_OVERLAPPING_CHARS}
+        intersecting = list(find_intersections(checked, self_only=True))
+    if intersecting:
+        print(f"⚠️  {len(intersecting)} 个字形存在轮廓自相交: {', '.join(intersecting)}")
+    
+    # 设置水平度量
+    with stages.stage('hmtx'):
         fb.setupHorizontalMetrics(metrics_dict)
-        
-        # 设置字体头部信息
+    
+    # 设置字体头部信息
+    with stages.stage('head'):
         fb.setupHead(unitsPerEm=metrics['unitsPerEm'])
-        
-        # 设置水平头部信息
-        fb.setupHorizontalHeader(
-            ascent=metrics['ascender'],
-            descent=metrics['descender']
-        )
-        
-        # 设置最大轮廓信息
+    
+    # 设置水平头部信息
+    with stages.stage('hhea'):
+        setup_horizontal_header(fb, metrics)
+    
+    # 设置最大轮廓信息
+    with stages.stage('maxp'):
         fb.setupMaxp()
-        
-        # 设置名称表
-        fb.setupNameTable({
-            'familyName': basic_info['fontFamily'],
-            'styleName': 'Regular',
-            'uniqueFontIdentifier': f"{basic_info['fontFamily']}-Regular-1.0",
-            'fullName': basic_info['fontName'],
-            'version': 'Version 1.0',
-            'psName': basic_info['fontFamily'].replace(' ', '') + '-Regular',
-            'designer': 'QuickFont AI',
-            'description': 'Generated by QuickFont AI',
-            'vendorURL': 'https://quickfont.ai',
-        })
-        
-        # 设置 OS/2 表
-        fb.setupOS2(
-            sTypoAscender=metrics['ascender'],
-            sTypoDescender=metrics['descender'],
-            sTypoLineGap=200,
-            usWinAscent=metrics['ascender'],
-            usWinDescent=abs(metrics['descender'])
-        )
-        
-        # 设置 post 表
+    
+    # 设置名称表
+    with stages.stage('name'):
+        setup_name_table(fb, basic_info)
+    
+    # 设置 OS/2 表
+    with stages.stage('OS/2'):
+        setup_os2(fb, metrics)
+    
+    # 设置 post 表
+    with stages.stage('post'):
         fb.setupPost()
+    
+    return fb.font
+
+def replace_file(output_path, write):
+    """
+    先由 write(临时路径) 写出临时文件再原子替换
+    
+    并发请求不会读到半个文件；内存映射旧文件的读取方（font_store）继续看到旧内容
+    """
+    tmp_path = f"{output_path}.{os.getpid()}.tmp"
+    write(tmp_path)
+    os.replace(tmp_path, output_path)
+
+def save_font(font, output_path):
+    """原子地保存字体文件"""
+    replace_file(output_path, font.save)
+
+def create_minimal_font(spec, output_path, strike_sizes=(), bit_depth=8, stages=None,
+                        glyph_report=None):
+    """
+    创建专业级 TrueType 字体文件
+    
+    stages: 记录各阶段（含位图字形与保存）的 BuildStages
+    glyph_report: 逐字形复杂度与成本报告（JSON）的输出路径，按设计耗时降序
+    """
+    print(f"📝 正在创建专业级 TrueType 字体文件...")
+    print(f"✨ 使用参数化贝塞尔曲线字形设计")
+    if stages is None:
+        stages = BuildStages()
+    
+    try:
+        glyph_set = LazyGlyphSet(spec, keep_source_stats=bool(glyph_report))
+        font = build_font(spec, glyph_set=glyph_set, stages=stages)
+        if strike_sizes:
+            with stages.stage('bitmapStrikes'):
+                embed_bitmap_strikes(font, strike_sizes, bit_depth)
         
         # 保存字体文件
-        fb.save(output_path)
+        with stages.stage('save'):
+            save_font(font, output_path)
         print(f"✅ 成功创建 TrueType 字体文件: {output_path}")
-        print(f"📊 包含 {len(glyphs)} 个字形")
+        print(f"📊 包含 {len(font.getGlyphOrder())} 个字形")
+        
+        if glyph_report:
+            from glyph_report import format_report, glyph_costs, sort_by_cost, write_report
+            entries = sort_by_cost(glyph_costs(glyph_set, font))
+            write_report(entries, glyph_report)
+            print(f"📊 逐字形成本报告已写入: {glyph_report}（耗时最高的字形）:")
+            print(format_report(entries, limit=10))
         
         return True
         
+    except MemoryLimitExceeded:
+        # 超出内存上限不是生成错误，交给调用方干净地中止
+        raise
     except Exception as e:
         import traceback
         print(f"❌ 创建字体失败: {e}")
         print(traceback.format_exc())
         return False
 
+def embed_bitmap_strikes(font, strike_sizes, bit_depth=8):
+    """嵌入小字号位图字形（替换已有的 EBLC/EBDT；strike_sizes 为空时移除）"""
+    from bitmap_strikes import add_bitmap_strikes
+    
+    strikes, glyphs = add_bitmap_strikes(font, strike_sizes, bit_depth)
+    if strikes:
+        print(f"🔲 嵌入 {strikes} 个位图字号（{bit_depth} 位），共 {glyphs} 个位图字形")
+
+# ---------- 增量重建 ----------
+
+# 变更后必须完整重建的字段（改变整套坐标系）
+FULL_REBUILD_FIELDS = ('designParameters.metrics.unitsPerEm',)
+
+# 非字形表 → 依赖的规格字段；glyf/hmtx 按字形更新，head/hhea/maxp 的统计值保存时自动重算
+TABLE_DEPENDENCIES = {
+    'name': ('basicInfo.fontFamily', 'basicInfo.fontName'),
+    'hhea': ('designParameters.metrics.ascender', 'designParameters.metrics.descender'),
+    'OS/2': ('designParameters.metrics.ascender', 'designParameters.metrics.descender',
+             # xAvgCharWidth 随字符宽度变化
+             'designParameters.metrics.xHeight'),
+}
+
+# 字形依赖缓存 {(设计参数, 字符, 宽度, 高度): 读取过的参数名集合}
+_glyph_dependencies = {}
+_GLYPH_DEPENDENCIES_LIMIT = 8192
+
+def _record_dependencies(params, char, width, height, reads):
+    if len(_glyph_dependencies) >= _GLYPH_DEPENDENCIES_LIMIT:
+        _glyph_dependencies.clear()
+    _glyph_dependencies[(params, char, width, height)] = reads
+
+def glyph_dependencies(params, char, width, height):
+    """
+    字形依赖的设计参数名集合
+    
+    未缓存时在给定参数下追踪一次设计过程（结果字形丢弃）
+    """
+    key = (params, char, width, height)
+    if key not in _glyph_dependencies:
+        from glyph_designer import TracingGlyphDesigner
+        designer = TracingGlyphDesigner(params)
+        _, reads = designer.trace(lambda: design_glyph(designer, char, width, height))
+        _record_dependencies(params, char, width, height, reads)
+    return _glyph_dependencies[key]
+
+class RebuildPlan:
+    """增量重建计划：变更字段、需要重建的表与字形"""
+    
+    def __init__(self, changed_fields, full_rebuild=False, tables=(), glyphs=()):
+        self.changed_fields = tuple(changed_fields)
+        self.full_rebuild = full_rebuild
+        self.tables = tuple(tables)
+        self.glyphs = tuple(glyphs)
+    
+    def __repr__(self):
+        if self.full_rebuild:
+            return f"RebuildPlan(full, changed={list(self.changed_fields)})"
+        return (f"RebuildPlan(changed={list(self.changed_fields)}, "
+                f"tables={list(self.tables)}, glyphs={len(self.glyphs)})")
+
+def plan_rebuild(old_spec, new_spec):
+    """
+    对比新旧规格，计算受变更影响的表与字形
+    
+    字形依赖由追踪设计器得到：只有读取过已变更参数、或尺寸发生变化的字形才需要重建
+    """
+    from design_params import DesignParams
+    from spec_parser import FINGERPRINT_FIELDS, fingerprint_inputs
+    from dataclasses import fields
+    
+    old_spec = normalize_spec(old_spec)
+    new_spec = normalize_spec(new_spec)
+    old_inputs = fingerprint_inputs(old_spec)
+    new_inputs = fingerprint_inputs(new_spec)
+    changed = [path for path in FINGERPRINT_FIELDS if old_inputs[path] != new_inputs[path]]
+    
+    if any(path in FULL_REBUILD_FIELDS for path in changed):
+        return RebuildPlan(changed, full_rebuild=True)
+    
+    old_plan = glyph_plan(old_spec['designParameters']['metrics'], requested_characters(old_spec))
+    new_plan = glyph_plan(new_spec['designParameters']['metrics'], requested_characters(new_spec))
+    # 字符集变化会改变字形顺序与 cmap，完整重建
+    if [g[0] for g in old_plan] != [g[0] for g in new_plan]:
+        return RebuildPlan(changed, full_rebuild=True)
+    
+    old_params = DesignParams.from_spec(old_spec)
+    new_params = DesignParams.from_spec(new_spec)
+    changed_params = {f.name for f in fields(DesignParams)
+                      if getattr(old_params, f.name) != getattr(new_params, f.name)}
+    
+    glyphs = []
+    for (glyph_name, char, width, height), (_, _, new_width, new_height) in zip(old_plan, new_plan):
+        if (width, height) != (new_width, new_height):
+            glyphs.append(glyph_name)
+            continue
+        if not changed_params:
+            continue
+        reads = glyph_dependencies(old_params, char, width, height)
+        if reads & changed_params:
+            glyphs.append(glyph_name)
+        else:
+            # 读取过的参数都未变，新参数下执行路径相同，依赖集合可直接沿用
+            _record_dependencies(new_params, char, width, height, reads)
+    
+    tables = [tag for tag, deps in TABLE_DEPENDENCIES.items()
+              if any(path in changed for path in deps)]
+    return RebuildPlan(changed, tables=tables, glyphs=glyphs)
+
+def rebuild_font(old_spec, new_spec, font, stages=None):
+    """
+    增量重建：只重新设计受影响的字形与表，并原地修补已生成的字体
+    
+    font: 由 old_spec 生成的 TTFont 对象或字体文件路径
+    stages: 记录各阶段的 BuildStages（阶段名与完整生成相同）
+    返回: (TTFont, RebuildPlan)；需要完整重建时返回新构建的 TTFont
+    """
+    from design_params import DesignParams
+    from glyph_designer import TracingGlyphDesigner
+    from quadratic_converter import glyphs_to_quadratic
+    from outline_simplifier import simplify_glyphs
+    from fontTools.fontBuilder import FontBuilder
+    from fontTools.ttLib import TTFont
+    
+    import_build_modules()
+    new_spec = normalize_spec(new_spec)
+    plan = plan_rebuild(old_spec, new_spec)
+    print(f"🔍 {plan}")
+    if stages is None:
+        stages = BuildStages()
+    if plan.full_rebuild:
+        return build_font(new_spec, stages=stages), plan
+    
+    if not isinstance(font, TTFont):
+        font = TTFont(font)
+    metrics = new_spec['designParameters']['metrics']
+    
+    if plan.glyphs:
+        params = DesignParams.from_spec(new_spec)
+        designer = TracingGlyphDesigner(params)
+        sizes = {glyph_name: (char, width, height)
+                 for glyph_name, char, width, height
+                 in glyph_plan(metrics, requested_characters(new_spec))}
+        glyphs = {}
+        hmtx = font['hmtx']
+        with stages.stage('design'):
+            for glyph_name in plan.glyphs:
+                char, width, height = sizes[glyph_name]
+                (glyph, lsb), reads = designer.trace(
+                    lambda: design_glyph(designer, char, width, height))
+                _record_dependencies(params, char, width, height, reads)
+                glyphs[glyph_name] = glyph
+                hmtx[glyph_name] = (int(round(width)), int(round(lsb)))
+        
+        with stages.stage('quadratic'):
+            glyphs = glyphs_to_quadratic(glyphs, max_err=1.0)
+        with stages.stage('simplify'):
+            glyphs = simplify_glyphs(glyphs)
+        glyf = font['glyf']
+        for glyph_name, glyph in glyphs.items():
+            glyf[glyph_name] = glyph
+    
+    fb = FontBuilder(font=font)
+    if 'hhea' in plan.tables:
+        # hmtx 的解析依赖 hhea.numberOfHMetrics，替换 hhea 前先加载
+        font['hmtx']
+    if 'name' in plan.tables:
+        with stages.stage('name'):
+            setup_name_table(fb, new_spec['basicInfo'])
+    if 'hhea' in plan.tables:
+        with stages.stage('hhea'):
+            setup_horizontal_header(fb, metrics)
+            # 新建的 hhea 表只在 glyf 已加载时才会于保存时重算统计值，这里显式重算
+            font['hhea'].recalc(font)
+    if 'OS/2' in plan.tables:
+        with stages.stage('OS/2'):
+            setup_os2(fb, metrics)
+    
+    print(f"✅ 增量重建 {len(plan.glyphs)} 个字形, {len(plan.tables)} 个表")
+    return font, plan
+
+def fingerprint_cache_path(output_dir, fingerprint, variant=''):
+    """
+    按规格指纹存放已生成字体的路径（同一输出目录下的所有请求共享）
+    
+    variant: 影响输出但不属于规格的生成选项（如位图字号），区分同一规格的不同产物
+    """
+    suffix = f"-{variant}" if variant else ''
+    return os.path.join(output_dir, '.cache', f"{fingerprint}{suffix}.ttf")
+
+# 指纹缓存的上限：超过任一项时淘汰最久未用的字体
+FINGERPRINT_CACHE_MAX_FILES = 512
+FINGERPRINT_CACHE_MAX_BYTES = 256 * MB
+
+def evict_fingerprint_cache(cache_dir, max_files=FINGERPRINT_CACHE_MAX_FILES,
+                            max_bytes=FINGERPRINT_CACHE_MAX_BYTES):
+    """
+    按修改时间淘汰指纹缓存中最久未用的字体（命中时刷新修改时间），
+    直到文件数不超过 max_files 且总大小不超过 max_bytes
+    
+    返回: 淘汰的文件数
+    """
+    entries = [(e.path, e.stat()) for e in os.scandir(cache_dir)
+               if e.is_file() and not e.name.endswith('.tmp')]
+    entries.sort(key=lambda entry: entry[1].st_mtime_ns)
+    total = sum(stat.st_size for _, stat in entries)
+    count = len(entries)
+    evicted = 0
+    for path, stat in entries:
+        if count <= max_files and total <= max_bytes:
+            break
+        try:
+            os.remove(path)
+        except OSError:
+            continue
+        count -= 1
+        total -= stat.st_size
+        evicted += 1
+    return evicted
+
 def main():
     parser = argparse.ArgumentParser(description='生成字体文件')
     parser.add_argument('--spec', required=True, help='设计规格JSON文件路径')
     parser.add_argument('--output', required=True, help='输出目录')
     parser.add_argument('--font-id', required=True, help='字体ID')
+    parser.add_argument('--no-cache', action='store_true', help='忽略指纹缓存，强制重新生成')
+    parser.add_argument('--previous-spec', help='上一版设计规格JSON（与 --previous-font 一起使用时增量重建）')
+    parser.add_argument('--previous-font', help='由上一版规格生成的字体文件')
+    parser.add_argument('--bitmap-strikes', default='',
+                        help='逗号分隔的 ppem 列表，为这些小字号嵌入预光栅化的位图字形（如 10,11,12,13,14）')
+    parser.add_argument('--bitmap-depth', type=int, default=8, choices=(1, 2, 4, 8),
+                        help='位图字形的位深')
+    parser.add_argument('--profile',
+                        help='按阶段剖析本次生成（cpu: pstats 与折叠调用栈；mem: tracemalloc 分配排行），不使用指纹缓存')
+    parser.add_argument('--profile-dir', help='剖析结果目录（默认 <输出目录>/.profiles）')
+    parser.add_argument('--memory-limit', type=float,
+                        help='内存上限（MB）：任一阶段后进程峰值 RSS 超出即中止生成')
+    parser.add_argument('--memory-report', action='store_true',
+                        help='随生成结果输出各阶段的峰值 RSS 与 tracemalloc 分配增量')
+    parser.add_argument('--import-report', action='store_true',
+                        help='在 -X importtime 下运行本条命令，随后输出各模块的导入耗时')
+    parser.add_argument('--glyph-report',
+                        help='逐字形复杂度与成本报告（JSON）的输出路径；完整生成，不使用指纹缓存与增量重建')
     
     args = parser.parse_args()
     
-    # 加载规格
+    if args.import_report:
+        from import_report import format_import_report, run_with_import_report
+        argv = [arg for arg in sys.argv[1:] if arg != '--import-report']
+        code, elapsed, costs = run_with_import_report(os.path.abspath(__file__), argv)
+        print(format_import_report(costs, elapsed))
+        sys.exit(code)
+    
+    # 加载并校验规格（在任何字形工作之前拒绝无效规格）
     spec = load_spec(args.spec)
+    try:
+        spec = normalize_spec(spec)
+    except SpecValidationError as e:
+        print(f"❌ {e}", file=sys.stderr)
+        sys.exit(1)
+    
+    strike_sizes = []
+    if args.bitmap_strikes:
+        from bitmap_strikes import parse_strike_sizes
+        try:
+            strike_sizes = parse_strike_sizes(args.bitmap_strikes)
+        except ValueError as e:
+            print(f"❌ {e}", file=sys.stderr)
+            sys.exit(1)
+    strike_variant = (f"s{'_'.join(map(str, strike_sizes))}d{args.bitmap_depth}"
+                      if strike_sizes else '')
     
     # 确保输出目录存在
     os.makedirs(args.output, exist_ok=True)
-    
-    # 生成字体文件
     output_path = os.path.join(args.output, f"{args.font_id}.ttf")
-    create_font(spec, output_path)
+    
+    memory_limit = int(args.memory_limit * MB) if args.memory_limit else None
+    # 剖析时总是实际生成
+    if args.profile:
+        from build_profiler import profile_stages
+        try:
+            stages = profile_stages(args.profile, memory_limit)
+        except ValueError as e:
+            print(f"❌ {e}", file=sys.stderr)
+            sys.exit(1)
+        if args.memory_report:
+            print("⚠️  剖析时不输出逐阶段内存统计（--profile mem 已包含分配排行）")
+    elif args.memory_report:
+        stages = MemoryStages(memory_limit)
+    else:
+        stages = BuildStages(memory_limit)
+    
+    # 输出相同的请求直接复用已生成的字体
+    fingerprint = spec_fingerprint(spec)
+    cached_path = fingerprint_cache_path(args.output, fingerprint, strike_variant)
+    if not args.no_cache and not args.profile and not args.glyph_report and os.path.exists(cached_path):
+        try:
+            replace_file(output_path, lambda tmp_path: shutil.copyfile(cached_path, tmp_path))
+            # 刷新修改时间，淘汰时按最近使用排序
+            os.utime(cached_path)
+        except OSError:
+            # 缓存文件刚被并发请求淘汰，照常生成
+            pass
+        else:
+            print(f"♻️  规格指纹 {fingerprint[:12]} 命中缓存，跳过生成")
+            print(f"成功生成字体: {output_path}")
+            return
+    
+    # 生成字体文件（提供上一版规格与字体时只重建受影响的部分）
+    try:
+        if (args.previous_spec and args.previous_font and os.path.exists(args.previous_font)
+                and not args.glyph_report):
+            try:
+                font, _ = rebuild_font(load_spec(args.previous_spec), spec, args.previous_font, stages)
+                # 上一版字体中的位图字形已过期，按当前选项重新生成（或移除）
+                with stages.stage('bitmapStrikes'):
+                    embed_bitmap_strikes(font, strike_sizes, args.bitmap_depth)
+                with stages.stage('save'):
+                    save_font(font, output_path)
+            except MemoryLimitExceeded:
+                raise
+            except SpecValidationError as e:
+                print(f"⚠️  上一版规格无效，完整重建: {e}")
+                create_font(spec, output_path, strike_sizes, args.bitmap_depth, stages)
+            except Exception as e:
+                # 上一版字体缺表、截断、损坏或由旧版生成器构建，无法增量修补
+                print(f"⚠️  无法基于上一版字体增量重建，完整重建: {type(e).__name__}: {e}")
+                create_font(spec, output_path, strike_sizes, args.bitmap_depth, stages)
+        else:
+            create_font(spec, output_path, strike_sizes, args.bitmap_depth, stages, args.glyph_report)
+    except MemoryLimitExceeded as e:
+        print(f"❌ {e}", file=sys.stderr)
+        sys.exit(1)
+    
+    if args.profile:
+        profile_dir = args.profile_dir or os.path.join(args.output, '.profiles')
+        paths = stages.dump(profile_dir, args.font_id)
+        print(f"🔍 剖析结果（{args.profile}，{len(paths)} 个文件）已写入: {profile_dir}")
+    
+    # 写入指纹缓存
+    os.makedirs(os.path.dirname(cached_path), exist_ok=True)
+    replace_file(cached_path, lambda tmp_path: shutil.copyfile(output_path, tmp_path))
+    evict_fingerprint_cache(os.path.dirname(cached_path))
     
     print(f"成功生成字体: {output_path}")
+    
+    if isinstance(stages, MemoryStages):
+        stages.stop()
+        print(f"📈 各阶段内存（MB，峰值 RSS 及本阶段抬高量 / tracemalloc 净增及阶段内峰值）:")
+        for name, entry in stages.memory_report().items():
+            print(f"   {name:<14} RSS {entry['rssPeak']:8.1f} (+{entry['rssGrowth']:.1f})"
+                  f"   分配 {entry['allocated']:+8.3f} (峰值 {entry['allocatedPeak']:.3f})")
 
 if __name__ == '__main__':
     main()
-
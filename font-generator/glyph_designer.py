@@ -5,12 +5,18 @@
 """
 
 import math
-from typing import Dict, List, Tuple, Optional
+from dataclasses import fields
+from typing import Any, Callable, Dict, FrozenSet, List, Set, Tuple, Optional, Union
 from fontTools.pens.ttGlyphPen import TTGlyphPen
 import bezier_utils as bez
+from design_params import DesignParams
 
 Point = Tuple[float, float]
 
+# 轮廓自相交属于预期的字符：斜笔、弧形笔画在转角与端点处按笔画叠加构造，
+# 非零填充规则下渲染正确（构建期检查不对它们告警）
+SELF_OVERLAPPING_CHARS = frozenset(',237ACGKSVYZcegkrsvyz')
+
 
 class GlyphDesigner:
     """
@@ -18,59 +24,39 @@ class GlyphDesigner:
     根据设计参数生成专业级字形
     """
     
-    def __init__(self, design_params: Dict):
+    def __init__(self, design_params: Union[DesignParams, Dict]):
         """
         初始化设计器
         
-        design_params包含:
+        design_params: DesignParams 对象（推荐，由 DesignParams.from_spec 解析），
+        或包含以下键的嵌套字典:
         - metrics: 字体度量信息
         - proportions: 比例信息（strokeWidth, contrast等）
         - visualStyle: 视觉样式（terminals, corners等）
         """
-        self.metrics = design_params.get('metrics', {})
-        self.proportions = design_params.get('proportions', {})
-        self.visual_style = design_params.get('visualStyle', {})
+        if not isinstance(design_params, DesignParams):
+            design_params = DesignParams.from_dict(design_params)
+        self.params = design_params
         
         # 提取关键参数
-        self.units_per_em = self.metrics.get('unitsPerEm', 1000)
-        self.cap_height = self.metrics.get('capHeight', 750)
-        self.x_height = self.metrics.get('xHeight', 550)
-        self.ascender = self.metrics.get('ascender', 850)
-        self.descender = self.metrics.get('descender', -220)
-        
-        self.stroke_width = self.proportions.get('strokeWidth', 80)
-        self.contrast = self.proportions.get('contrast', 'medium')
-        
-        self.terminals = self.visual_style.get('terminals', 'straight')
-        self.corners = self.visual_style.get('corners', 'rounded')
-        self.aperture = self.visual_style.get('aperture', 'open')
-        self.axis = self.visual_style.get('axis', 'vertical')
-        self.stress = self.visual_style.get('stress', 'none')
-        
-        # 计算派生参数
-        self.corner_radius = self._calculate_corner_radius()
-        self.horizontal_stroke = self._calculate_horizontal_stroke()
-        
-    def _calculate_corner_radius(self) -> float:
-        """根据corners参数计算圆角半径"""
-        corner_factors = {
-            'sharp': 0.0,
-            'rounded': 0.3,
-            'soft': 0.5
-        }
-        factor = corner_factors.get(self.corners, 0.3)
-        return self.stroke_width * factor
-    
-    def _calculate_horizontal_stroke(self) -> float:
-        """根据contrast参数计算水平笔画宽度（增强视觉差异）"""
-        contrast_factors = {
-            'none': 1.0,
-            'low': 0.75,    # 从0.85改为0.75，增强差异
-            'medium': 0.6,  # 从0.70改为0.60
-            'high': 0.4     # 从0.50改为0.40
-        }
-        factor = contrast_factors.get(self.contrast, 0.7)
-        return self.stroke_width * factor
+        self.units_per_em = design_params.units_per_em
+        self.cap_height = design_params.cap_height
+        self.x_height = design_params.x_height
+        self.ascender = design_params.ascender
+        self.descender = design_params.descender
+        
+        self.stroke_width = design_params.stroke_width
+        self.contrast = design_params.contrast
+        
+        self.terminals = design_params.terminals
+        self.corners = design_params.corners
+        self.aperture = design_params.aperture
+        self.axis = design_params.axis
+        self.stress = design_params.stress
+        
+        # 派生参数（由 DesignParams 预先计算）
+        self.corner_radius = design_params.corner_radius
+        self.horizontal_stroke = design_params.horizontal_stroke
     
     def _apply_terminal(self, pen: TTGlyphPen, p1: Point, p2: Point, 
                        terminal_type: str = 'end'):
@@ -111,6 +97,15 @@ class GlyphDesigner:
         返回: (TTGlyph对象, 左侧边距)
         """
         pen = TTGlyphPen(None)
+        margin = self.draw_glyph(pen, char, width, height)
+        return pen.glyph(), margin
+    
+    def draw_glyph(self, pen, char: str, width: float, height: float) -> float:
+        """
+        把单个字符的轮廓画到任意 fontTools 笔上（SVGPathPen、RecordingPen 等）
+        
+        返回: 左侧边距
+        """
         margin = width * 0.1
         
         # 根据字符调用相应的设计方法
@@ -135,7 +130,20 @@ class GlyphDesigner:
         else:
             self._create_punctuation(pen, char, width, height, margin)
         
-        return pen.glyph(), margin
+        return margin
+    
+    def routine_name(self, char: str) -> str:
+        """draw_glyph 为该字符调用的设计方法名（与其分派规则一致）"""
+        if char.isupper():
+            name = f'_create_{char.lower()}'
+            return name if hasattr(self, name) else '_create_default_uppercase'
+        if char.islower():
+            name = f'_create_{char}'
+            return name if hasattr(self, name) else '_create_default_lowercase'
+        if char.isdigit():
+            name = f'_create_digit_{char}'
+            return name if hasattr(self, name) else '_create_default_digit'
+        return '_create_punctuation'
     
     # ==================== 大写字母设计 ====================
     
@@ -2263,3 +2271,41 @@ class GlyphDesigner:
             pen.lineTo((w - m, h * 0.6))
             pen.lineTo((m, h * 0.6))
             pen.closePath()
+
+
+# ==================== 参数依赖追踪 ====================
+
+# 设计器上与 DesignParams 字段同名的参数属性
+PARAM_ATTRIBUTES = frozenset(f.name for f in fields(DesignParams))
+
+
+class TracingGlyphDesigner(GlyphDesigner):
+    """
+    记录字形设计过程中读取了哪些设计参数的设计器
+
+    字形设计是参数的确定性函数：只要本次读取过的参数取值不变，
+    执行路径与输出就完全相同。增量重建据此判断哪些字形需要重新设计。
+    读取 self.params 视为依赖全部参数。
+    """
+
+    def __init__(self, design_params: Union[DesignParams, Dict]):
+        super().__init__(design_params)
+        self.reads: Set[str] = set()
+
+    def __getattribute__(self, name: str):
+        if name in PARAM_ATTRIBUTES:
+            object.__getattribute__(self, 'reads').add(name)
+        elif name == 'params':
+            object.__getattribute__(self, 'reads').update(PARAM_ATTRIBUTES)
+        return object.__getattribute__(self, name)
+
+    def trace(self, design: Callable[[], Any]) -> Tuple[Any, FrozenSet[str]]:
+        """
+        执行一次设计调用并记录参数读取
+
+        返回: (调用结果, 读取过的参数名集合)
+        """
+        reads = object.__getattribute__(self, 'reads')
+        reads.clear()
+        result = design()
+        return result, frozenset(reads)
@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+单字形轮廓接口
+直接用字形设计器把选中字符画成 SVG 路径字符串或 JSON 坐标，
+不做二次曲线转换、不建表、不写字体文件，供参数编辑时的实时字形预览使用
+"""
+
+import argparse
+import json
+import sys
+from functools import lru_cache, partial
+from typing import Any, Dict, List
+
+from fontTools.pens.basePen import BasePen
+from fontTools.pens.recordingPen import RecordingPen
+from fontTools.pens.roundingPen import RoundingPen
+from fontTools.pens.svgPathPen import SVGPathPen
+from fontTools.pens.transformPen import TransformPen
+
+from design_params import DesignParams
+from glyph_designer import GlyphDesigner
+from spec_parser import normalize_spec, SpecValidationError
+
+FORMATS = ('svg', 'json')
+
+
+class CommandPen(BasePen):
+    """
+    把轮廓记录为紧凑的JSON命令列表
+
+    每条命令形如 ["M", x, y]、["L", x, y]、["Q", x1, y1, x, y]、
+    ["C", x1, y1, x2, y2, x, y]、["Z"]；多控制点的二次曲线被拆成单段
+    """
+
+    def __init__(self):
+        super().__init__(None)
+        self.commands: List[List[Any]] = []
+
+    def _moveTo(self, pt):
+        self.commands.append(['M', *pt])
+
+    def _lineTo(self, pt):
+        self.commands.append(['L', *pt])
+
+    def _qCurveToOne(self, pt1, pt2):
+        self.commands.append(['Q', *pt1, *pt2])
+
+    def _curveToOne(self, pt1, pt2, pt3):
+        self.commands.append(['C', *pt1, *pt2, *pt3])
+
+    def _closePath(self):
+        self.commands.append(['Z'])
+
+
+@lru_cache(maxsize=16)
+def _designer_for(params: DesignParams) -> GlyphDesigner:
+    """同一组设计参数复用同一个设计器"""
+    return GlyphDesigner(params)
+
+
+def _record_glyph(designer: GlyphDesigner, char: str, width: float, height: float):
+    """
+    记录字符轮廓，设计器失败时使用生成器的后备字形
+
+    返回: (RecordingPen, 左侧边距)
+    """
+    recording = RecordingPen()
+    try:
+        margin = designer.draw_glyph(recording, char, width, height)
+    except Exception as e:
+        from generator import create_glyph_for_char_fallback
+        print(f"⚠️  字符 {char} 生成失败，使用后备方案: {e}", file=sys.stderr)
+        recording = RecordingPen()
+        glyph, margin = create_glyph_for_char_fallback(char, width, height)
+        glyph.draw(recording, None)
+    return recording, margin
+
+
+def glyph_outlines(spec: Dict[str, Any],
+                   characters: str,
+                   fmt: str = 'svg',
+                   precision: int = 0,
+                   flip_y: bool = False) -> Dict[str, Dict[str, Any]]:
+    """
+    生成选中字符的轮廓
+
+    fmt: 'svg' 返回路径字符串，'json' 返回命令列表
+    precision: 坐标保留的小数位数（0 为整数，与字体中的坐标一致）
+    flip_y: 转换为 y 轴向下的 SVG 坐标系（ascender 处为 y=0）；默认保持字体坐标系
+    返回: {字符: {'name', 'advance', 'lsb', 'path' 或 'commands'}}，空白字符忽略
+    """
+    from generator import glyph_plan
+
+    if fmt not in FORMATS:
+        raise ValueError(f"不支持的格式: {fmt}，可选: {', '.join(FORMATS)}")
+
+    spec = normalize_spec(spec)
+    metrics = spec['designParameters']['metrics']
+    designer = _designer_for(DesignParams.from_spec(spec))
+
+    round_func = partial(round, ndigits=precision) if precision > 0 else round
+    ntos = (lambda v: f"{v:g}") if precision > 0 else str
+    wanted = ''.join(dict.fromkeys(char for char in characters if not char.isspace()))
+
+    outlines = {}
+    for glyph_name, char, width, height in glyph_plan(metrics, wanted):
+        recording, margin = _record_glyph(designer, char, width, height)
+
+        out_pen = SVGPathPen(None, ntos=ntos) if fmt == 'svg' else CommandPen()
+        pen = RoundingPen(out_pen, roundFunc=round_func)
+        if flip_y:
+            pen = TransformPen(pen, (1, 0, 0, -1, 0, metrics['ascender']))
+        recording.replay(pen)
+
+        outline = {'name': glyph_name, 'advance': width, 'lsb': round_func(margin)}
+        if fmt == 'svg':
+            outline['path'] = out_pen.getCommands()
+        else:
+            outline['commands'] = out_pen.commands
+        outlines[char] = outline
+    return outlines
+
+
+def main():
+    parser = argparse.ArgumentParser(description='输出字符轮廓（SVG路径或JSON坐标）')
+    parser.add_argument('--spec', required=True, help='设计规格JSON文件路径')
+    parser.add_argument('--chars', required=True, help='需要输出轮廓的字符')
+    parser.add_argument('--format', default='svg', choices=FORMATS, help='输出格式')
+    parser.add_argument('--precision', type=int, default=0, help='坐标小数位数')
+    parser.add_argument('--flip-y', action='store_true', help='输出 y 轴向下的SVG坐标')
+
+    args = parser.parse_args()
+
+    with open(args.spec, 'r', encoding='utf-8') as f:
+        spec = json.load(f)
+    try:
+        outlines = glyph_outlines(spec, args.chars, args.format, args.precision, args.flip_y)
+    except SpecValidationError as e:
+        print(f"❌ {e}", file=sys.stderr)
+        sys.exit(1)
+
+    json.dump(outlines, sys.stdout, ensure_ascii=False, separators=(',', ':'))
+    print()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+逐字形复杂度与成本报告
+列出每个字形的轮廓数、在线/离线点数、二次曲线转换前后的线段与曲线段数、
+编译后的字节数与设计耗时，按成本排序，用于找出主导生成耗时与文件大小的 _create_* 方法
+"""
+
+import json
+from collections import OrderedDict
+from typing import Any, Dict, List
+
+from fontTools.ttLib.tables._g_l_y_f import flagCubic, flagOnCurve
+
+# 报告可按这些成本排序
+SORT_KEYS = ('designMs', 'bytes', 'points')
+
+
+def outline_stats(glyph) -> Dict[str, int]:
+    """
+    TTGlyph 轮廓的统计
+
+    返回: contours、onCurve、offCurve、lines（在线点到在线点的直线段）、
+          cubics（三次曲线段，每对三次离线点一段）、quadratics（二次曲线段，每个二次离线点一段）
+    """
+    stats = {'contours': 0, 'onCurve': 0, 'offCurve': 0,
+             'lines': 0, 'cubics': 0, 'quadratics': 0}
+    if glyph.numberOfContours <= 0:
+        return stats
+
+    flags = glyph.flags
+    start = 0
+    for end in glyph.endPtsOfContours:
+        stats['contours'] += 1
+        for i in range(start, end + 1):
+            flag = flags[i]
+            if flag & flagOnCurve:
+                stats['onCurve'] += 1
+                # 轮廓闭合：最后一点的下一点是起点
+                if flags[i + 1 if i < end else start] & flagOnCurve:
+                    stats['lines'] += 1
+            elif flag & flagCubic:
+                stats['offCurve'] += 1
+                stats['cubics'] += 1
+            else:
+                stats['offCurve'] += 1
+                stats['quadratics'] += 1
+        start = end + 1
+    stats['cubics'] //= 2
+    return stats
+
+
+def glyph_costs(glyph_set, font) -> List[Dict[str, Any]]:
+    """
+    字体中每个字形的复杂度与成本
+
+    glyph_set: 以 keep_source_stats=True 设计过这些字形的 LazyGlyphSet
+    font: 由 glyph_set 构建的 TTFont
+    返回: 按字形顺序的条目列表
+    """
+    glyf = font['glyf']
+    designer = glyph_set.designer
+    entries = []
+    for glyph_name in font.getGlyphOrder():
+        glyph = glyf[glyph_name]
+        after = outline_stats(glyph)
+        before = glyph_set.source_stats.get(glyph_name, after)
+        char = glyph_set.char_for(glyph_name)
+        entries.append(OrderedDict([
+            ('glyph', glyph_name),
+            ('char', char),
+            ('routine', designer.routine_name(char) if char is not None else None),
+            ('contours', after['contours']),
+            ('onCurve', after['onCurve']),
+            ('offCurve', after['offCurve']),
+            ('points', after['onCurve'] + after['offCurve']),
+            ('segmentsBefore', {'lines': before['lines'],
+                                'curves': before['cubics'] + before['quadratics']}),
+            ('segmentsAfter', {'lines': after['lines'], 'curves': after['quadratics']}),
+            ('bytes', len(glyph.compile(glyf))),
+            ('designMs', round(glyph_set.design_times.get(glyph_name, 0.0) * 1000, 3)),
+        ]))
+    return entries
+
+
+def sort_by_cost(entries: List[Dict[str, Any]], key: str = 'designMs') -> List[Dict[str, Any]]:
+    """按成本降序排列（同成本时按字节数、点数）"""
+    if key not in SORT_KEYS:
+        raise ValueError(f"未知的排序键: {key}（可选: {', '.join(SORT_KEYS)}）")
+    return sorted(entries, key=lambda entry: (entry[key], entry['bytes'], entry['points']),
+                  reverse=True)
+
+
+def routine_totals(entries: List[Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+    """按设计方法汇总字形数、设计耗时与字节数（按耗时降序）"""
+    totals: Dict[str, Dict[str, Any]] = {}
+    for entry in entries:
+        routine = entry['routine'] or '(内置)'
+        total = totals.setdefault(routine, {'glyphs': 0, 'designMs': 0.0, 'bytes': 0})
+        total['glyphs'] += 1
+        total['designMs'] += entry['designMs']
+        total['bytes'] += entry['bytes']
+    for total in totals.values():
+        total['designMs'] = round(total['designMs'], 3)
+    return dict(sorted(totals.items(), key=lambda item: item[1]['designMs'], reverse=True))
+
+
+def write_report(entries: List[Dict[str, Any]], path: str):
+    """写出 JSON 报告（字形条目与按设计方法的汇总）"""
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({'glyphs': entries, 'routines': routine_totals(entries)},
+                  f, ensure_ascii=False, indent=2)
+
+
+def format_report(entries: List[Dict[str, Any]], limit: int = 20) -> str:
+    """前 limit 个字形的文本表"""
+    lines = [f"{'字形':<14} {'方法':<26} {'轮廓':>4} {'在线':>5} {'离线':>5} "
+             f"{'曲线段(前→后)':>14} {'字节':>6} {'设计 ms':>9}"]
+    for entry in entries[:limit]:
+        curves = f"{entry['segmentsBefore']['curves']}→{entry['segmentsAfter']['curves']}"
+        lines.append(f"{entry['glyph']:<14} {entry['routine'] or '-':<26} {entry['contours']:>4} "
+                     f"{entry['onCurve']:>5} {entry['offCurve']:>5} {curves:>14} "
+                     f"{entry['bytes']:>6} {entry['designMs']:>9.3f}")
+    return '\n'.join(lines)
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+导入耗时报告
+在 python -X importtime 下重新运行同一条命令，解析每个模块的导入耗时（自身 / 含子模块），
+用来确认命令行参数检查、规格校验失败与缓存命中等路径没有加载不需要的重型依赖
+"""
+
+import re
+import subprocess
+import sys
+import time
+from typing import List, NamedTuple, Sequence, Tuple
+
+# -X importtime 的输出行: "import time: <自身 us> | <累计 us> | <缩进><模块名>"
+_IMPORTTIME_LINE = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)\s*$')
+
+
+class ImportCost(NamedTuple):
+    module: str
+    self_us: int
+    cumulative_us: int
+    depth: int
+
+
+def parse_importtime(stderr: str) -> Tuple[List[ImportCost], List[str]]:
+    """
+    拆分 -X importtime 的标准错误输出
+
+    返回: (按导入完成顺序的模块耗时, 其余的标准错误行)
+    """
+    costs = []
+    other = []
+    for line in stderr.splitlines():
+        match = _IMPORTTIME_LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, module = match.groups()
+            # 顶层导入缩进 1 个空格，每深一层多 2 个
+            costs.append(ImportCost(module, int(self_us), int(cumulative_us), (len(indent) - 1) // 2))
+        elif not line.startswith('import time:'):
+            other.append(line)
+    return costs, other
+
+
+def run_with_import_report(script: str, argv: Sequence[str]) -> Tuple[int, float, List[ImportCost]]:
+    """
+    以 -X importtime 运行 script argv，标准输出直接透传，非导入耗时的标准错误原样转发
+
+    返回: (退出码, 运行耗时（秒）, 模块耗时)
+    """
+    start = time.perf_counter()
+    result = subprocess.run([sys.executable, '-X', 'importtime', script, *argv],
+                            stderr=subprocess.PIPE, text=True)
+    elapsed = time.perf_counter() - start
+    costs, other = parse_importtime(result.stderr)
+    for line in other:
+        print(line, file=sys.stderr)
+    return result.returncode, elapsed, costs
+
+
+def format_import_report(costs: List[ImportCost], elapsed: float, limit: int = 25) -> str:
+    """按累计耗时降序的前 limit 个模块，以及导入总耗时"""
+    total_us = sum(cost.self_us for cost in costs)
+    lines = [f"🔍 导入 {len(costs)} 个模块共 {total_us / 1000:.1f} ms（进程总耗时 {elapsed * 1000:.1f} ms）",
+             f"{'累计 ms':>9} {'自身 ms':>9}  模块"]
+    for cost in sorted(costs, key=lambda cost: cost.cumulative_us, reverse=True)[:limit]:
+        lines.append(f"{cost.cumulative_us / 1000:>9.1f} {cost.self_us / 1000:>9.1f}  "
+                     f"{'  ' * cost.depth}{cost.module}")
+    return '\n'.join(lines)
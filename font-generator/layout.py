@@ -0,0 +1,318 @@
+#!/usr/bin/env python3
+"""
+轻量排版引擎
+从字体构建 cmap、步进与字偶距的查找数组（首次使用时加载并缓存），
+整批把文本映射为字形与位置，支持按目标宽度断行；
+输出的字形行（GlyphRun）同时供预览光栅化与前端使用
+"""
+
+import argparse
+import json
+import sys
+from collections import OrderedDict
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence
+
+import numpy as np
+
+from font_store import DEFAULT_FONTS_DIR, font_path_for, font_store
+from subsetter import font_hash
+
+SPACE = ord(' ')
+
+
+class GlyphRun(NamedTuple):
+    """
+    一行排版结果
+
+    glyph_ids: (N,) 字形下标（在字体字形顺序中的位置）
+    x: (N,) 各字形原点相对行首的横坐标（像素）
+    y: 基线相对段落顶部的纵坐标（像素，向下为正）
+    width: 行宽（像素，不含行尾空格）
+    """
+    text: str
+    glyph_ids: np.ndarray
+    x: np.ndarray
+    y: float
+    width: float
+
+    def to_dict(self, glyph_order: Sequence[str]) -> Dict[str, Any]:
+        """JSON 形式：字形名与坐标（保留两位小数）"""
+        return {
+            'text': self.text,
+            'glyphs': [glyph_order[gid] for gid in self.glyph_ids],
+            'x': np.round(self.x, 2).tolist(),
+            'y': round(self.y, 2),
+            'width': round(self.width, 2),
+        }
+
+
+class FontLayout:
+    """
+    单款字体的排版数据
+
+    字体在首次排版时才加载；cmap 保存为排序后的码位数组配合 searchsorted 查找，
+    字偶距保存为 (左字形 × 字形数 + 右字形) 的排序键数组
+    """
+
+    def __init__(self, font_path: str):
+        self.font_path = font_path
+        self._loaded = False
+
+    def _load(self):
+        font = font_store.open(self.font_path)
+        self.glyph_order = font.getGlyphOrder()
+        glyph_ids = {name: gid for gid, name in enumerate(self.glyph_order)}
+        self.units_per_em = font['head'].unitsPerEm
+        self.ascender = font['hhea'].ascent
+        self.descender = font['hhea'].descent
+        self.line_gap = font['hhea'].lineGap
+
+        cmap = sorted((font.getBestCmap() or {}).items())
+        self.codepoints = np.array([code for code, _ in cmap], dtype=np.int64)
+        self.cmap_ids = np.array([glyph_ids[name] for _, name in cmap], dtype=np.intp)
+
+        hmtx = font['hmtx'].metrics
+        self.advances = np.array([hmtx[name][0] for name in self.glyph_order], dtype=float)
+
+        pairs = _kerning_pairs(font, glyph_ids)
+        keys = np.array([left * len(self.glyph_order) + right for left, right in pairs],
+                        dtype=np.int64)
+        order = np.argsort(keys)
+        self.kern_keys = keys[order]
+        self.kern_values = np.array(list(pairs.values()), dtype=float)[order]
+        self._loaded = True
+
+    def __getattr__(self, name):
+        # 任何排版数据首次被访问时加载字体
+        if name.startswith('_') or self.__dict__.get('_loaded'):
+            raise AttributeError(name)
+        self._load()
+        return getattr(self, name)
+
+    def glyph_ids(self, codepoints: np.ndarray) -> np.ndarray:
+        """码位数组 → 字形下标数组（不在 cmap 中的为 0，即 .notdef）"""
+        if len(self.codepoints) == 0:
+            return np.zeros(len(codepoints), dtype=np.intp)
+        pos = np.minimum(np.searchsorted(self.codepoints, codepoints), len(self.codepoints) - 1)
+        return np.where(self.codepoints[pos] == codepoints, self.cmap_ids[pos], 0)
+
+    def advance_units(self, glyph_ids: np.ndarray) -> np.ndarray:
+        """各字形的步进（字体单位），已加上与下一个字形之间的字偶距"""
+        advances = self.advances[glyph_ids]
+        if len(self.kern_keys) and len(glyph_ids) > 1:
+            keys = glyph_ids[:-1].astype(np.int64) * len(self.glyph_order) + glyph_ids[1:]
+            pos = np.minimum(np.searchsorted(self.kern_keys, keys), len(self.kern_keys) - 1)
+            advances[:-1] += np.where(self.kern_keys[pos] == keys, self.kern_values[pos], 0.0)
+        return advances
+
+    def line_height(self, size: float) -> float:
+        """行高（像素）"""
+        return (self.ascender - self.descender + self.line_gap) * size / self.units_per_em
+
+    def layout_line(self, text: str, size: float, y: float = 0.0) -> GlyphRun:
+        """单行排版（不断行）"""
+        codepoints = _codepoints(text)
+        glyph_ids = self.glyph_ids(codepoints)
+        pen = np.cumsum(self.advance_units(glyph_ids)) * (size / self.units_per_em)
+        x = np.concatenate([[0.0], pen[:-1]]) if len(pen) else pen
+        return GlyphRun(text, glyph_ids, x, y, float(pen[-1]) if len(pen) else 0.0)
+
+    def layout_lines(self, texts: Sequence[str], size: float) -> List[GlyphRun]:
+        """
+        整批单行排版
+
+        所有文本拼接后只做一次 cmap 与字偶距查找，再按文本切分；
+        用于目录页等大量短预览文本
+        """
+        if not texts:
+            return []
+        lengths = np.array([len(text) for text in texts])
+        glyph_ids = self.glyph_ids(_codepoints(''.join(texts)))
+        advances = self.advance_units(glyph_ids) * (size / self.units_per_em)
+        # 拼接处不应用跨文本的字偶距
+        ends = np.cumsum(lengths)
+        last = ends[lengths > 0] - 1
+        advances[last] = self.advances[glyph_ids[last]] * (size / self.units_per_em)
+
+        runs = []
+        pen = np.cumsum(advances)
+        for text, start, end in zip(texts, ends - lengths, ends):
+            origin = pen[start - 1] if start > 0 else 0.0
+            x = np.concatenate([[origin], pen[start:end - 1]]) - origin if end > start else pen[:0]
+            width = float(pen[end - 1] - origin) if end > start else 0.0
+            runs.append(GlyphRun(text, glyph_ids[start:end], x, 0.0, width))
+        return runs
+
+    def layout_paragraph(self, text: str, size: float,
+                         max_width: Optional[float] = None,
+                         line_height: Optional[float] = None) -> List[GlyphRun]:
+        """
+        段落排版：按换行符分段，超过 max_width（像素）时在空格处断行
+
+        单词本身超宽时在字符处断开；行尾空格不计入行宽
+        返回: 各行的 GlyphRun，y 为基线位置
+        """
+        if line_height is None:
+            line_height = self.line_height(size)
+        ascent = self.ascender * size / self.units_per_em
+        scale = size / self.units_per_em
+
+        runs = []
+        for paragraph in text.split('\n'):
+            codepoints = _codepoints(paragraph)
+            glyph_ids = self.glyph_ids(codepoints)
+            pen = np.cumsum(self.advance_units(glyph_ids)) * scale
+            for start, end in _break_lines(codepoints, pen, max_width):
+                origin = pen[start - 1] if start > 0 else 0.0
+                x = np.concatenate([[origin], pen[start:end - 1]]) - origin if end > start else pen[:0]
+                # 行宽不含行尾空格
+                visible = end
+                while visible > start and codepoints[visible - 1] == SPACE:
+                    visible -= 1
+                width = float(pen[visible - 1] - origin) if visible > start else 0.0
+                y = ascent + len(runs) * line_height
+                runs.append(GlyphRun(paragraph[start:end], glyph_ids[start:end], x, y, width))
+        return runs
+
+
+def _codepoints(text: str) -> np.ndarray:
+    return np.frombuffer(text.encode('utf-32-le'), dtype=np.uint32).astype(np.int64)
+
+
+def _break_lines(codepoints: np.ndarray, pen: np.ndarray,
+                 max_width: Optional[float]) -> List[tuple]:
+    """
+    贪心断行
+
+    pen: 每个字符之后的累计步进
+    返回: [(起始下标, 结束下标), ...]，结束下标不含；断行处的空格归入上一行
+    """
+    n = len(codepoints)
+    if max_width is None or n == 0 or pen[-1] <= max_width:
+        return [(0, n)]
+
+    spaces = np.nonzero(codepoints == SPACE)[0]
+    lines = []
+    start = 0
+    while start < n:
+        origin = pen[start - 1] if start > 0 else 0.0
+        fit = int(np.searchsorted(pen, origin + max_width, side='right'))
+        if fit >= n:
+            lines.append((start, n))
+            break
+        # 行内最后一个空格（超宽的字符本身是空格时也可在此断开），行首的空格不算
+        first = start
+        while first < n and codepoints[first] == SPACE:
+            first += 1
+        k = np.searchsorted(spaces, fit, side='right') - 1
+        if k >= 0 and spaces[k] > first:
+            end = int(spaces[k]) + 1
+        else:
+            end = max(fit, start + 1)
+        # 下一行跳过连续空格
+        while end < n and codepoints[end] == SPACE:
+            end += 1
+        lines.append((start, end))
+        start = end
+    return lines
+
+
+def _kerning_pairs(font, glyph_ids: Dict[str, int]) -> Dict[tuple, float]:
+    """
+    读取字偶距对 {(左字形下标, 右字形下标): 调整量}
+
+    支持 kern 表格式0 与 GPOS PairPos（格式1 与格式2 的 XAdvance）；
+    同一字形对以 kern 表优先
+    """
+    pairs: Dict[tuple, float] = {}
+
+    if 'GPOS' in font:
+        lookups = font['GPOS'].table.LookupList
+        for lookup in (lookups.Lookup if lookups else []):
+            for subtable in lookup.SubTable:
+                if lookup.LookupType == 9:
+                    subtable = subtable.ExtSubTable
+                if getattr(subtable, 'LookupType', lookup.LookupType) != 2:
+                    continue
+                _read_pair_pos(subtable, glyph_ids, pairs)
+
+    if 'kern' in font:
+        for table in font['kern'].kernTables:
+            if getattr(table, 'format', None) != 0:
+                continue
+            for (left, right), value in table.kernTable.items():
+                if left in glyph_ids and right in glyph_ids:
+                    pairs[(glyph_ids[left], glyph_ids[right])] = value
+    return pairs
+
+
+def _read_pair_pos(subtable, glyph_ids: Dict[str, int], pairs: Dict[tuple, float]):
+    coverage = subtable.Coverage.glyphs
+    if subtable.Format == 1:
+        for left, pair_set in zip(coverage, subtable.PairSet):
+            for record in pair_set.PairValueRecord:
+                value = getattr(record.Value1, 'XAdvance', 0) if record.Value1 else 0
+                if value and record.SecondGlyph in glyph_ids:
+                    pairs.setdefault((glyph_ids[left], glyph_ids[record.SecondGlyph]), value)
+    elif subtable.Format == 2:
+        class1 = subtable.ClassDef1.classDefs if subtable.ClassDef1 else {}
+        class2 = subtable.ClassDef2.classDefs if subtable.ClassDef2 else {}
+        members2: Dict[int, List[str]] = {}
+        for name in glyph_ids:
+            members2.setdefault(class2.get(name, 0), []).append(name)
+        for left in coverage:
+            row = subtable.Class1Record[class1.get(left, 0)]
+            for c2, record in enumerate(row.Class2Record):
+                value = getattr(record.Value1, 'XAdvance', 0) if record.Value1 else 0
+                if not value:
+                    continue
+                for right in members2.get(c2, []):
+                    pairs.setdefault((glyph_ids[left], glyph_ids[right]), value)
+
+
+# 按字体内容哈希复用排版数据
+_layouts: 'OrderedDict[str, FontLayout]' = OrderedDict()
+_MAX_LAYOUTS = 32
+
+
+def font_layout(font_path: str) -> FontLayout:
+    """获取（或复用）字体的排版数据；字体重新生成后哈希变化，自动使用新数据"""
+    digest = font_hash(font_path)
+    layout = _layouts.get(digest)
+    if layout is None:
+        layout = FontLayout(font_path)
+        _layouts[digest] = layout
+        while len(_layouts) > _MAX_LAYOUTS:
+            _layouts.popitem(last=False)
+    else:
+        _layouts.move_to_end(digest)
+    return layout
+
+
+def main():
+    parser = argparse.ArgumentParser(description='排版文本并输出字形位置（JSON）')
+    parser.add_argument('--font-id', required=True, help='字体ID')
+    parser.add_argument('--text', required=True, help='需要排版的文本')
+    parser.add_argument('--size', type=float, default=48, help='字号（像素）')
+    parser.add_argument('--max-width', type=float, help='断行宽度（像素）')
+    parser.add_argument('--fonts-dir', default=DEFAULT_FONTS_DIR, help='已生成字体所在目录')
+
+    args = parser.parse_args()
+
+    try:
+        layout = font_layout(font_path_for(args.font_id, args.fonts_dir))
+    except (ValueError, FileNotFoundError) as e:
+        print(f"❌ {e}", file=sys.stderr)
+        sys.exit(1)
+
+    runs = layout.layout_paragraph(args.text, args.size, args.max_width)
+    json.dump({
+        'size': args.size,
+        'lineHeight': round(layout.line_height(args.size), 2),
+        'lines': [run.to_dict(layout.glyph_order) for run in runs],
+    }, sys.stdout, ensure_ascii=False, separators=(',', ':'))
+    print()
+
+
+if __name__ == '__main__':
+    main()
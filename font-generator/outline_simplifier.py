@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+轮廓简化
+在写入 glyf 之前一次性清理整套二次曲线字形中的冗余点：
+重复点与零长度线段、共线的中间点、退化为直线的离线控制点，
+以及恰好位于两个离线点中点、可由 TrueType 隐含的在线点
+"""
+
+from array import array
+from typing import Dict
+
+import numpy as np
+from fontTools.ttLib.tables import ttProgram
+from fontTools.ttLib.tables._g_l_y_f import Glyph, GlyphCoordinates, flagCubic, flagOnCurve
+
+# 默认容差（字体单位）。坐标为整数时中点偏差是 0.5 的倍数，
+# 低于 0.5 即只删除恰好位于中点的隐含在线点（与 fontTools 的判定一致）
+DEFAULT_TOLERANCE = 0.25
+
+# 保留的最少点数，更少的轮廓不再简化
+MIN_CONTOUR_POINTS = 3
+
+
+def _segment_distance(p: np.ndarray, a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """各点 p 到线段 a-b 的距离（逐行）"""
+    ab = b - a
+    length2 = (ab * ab).sum(axis=1)
+    t = np.divide(((p - a) * ab).sum(axis=1), length2,
+                  out=np.zeros(len(p)), where=length2 > 0)
+    closest = a + ab * np.clip(t, 0.0, 1.0)[:, None]
+    return np.hypot(*(p - closest).T)
+
+
+def _removable(coords: np.ndarray, on: np.ndarray, prev: np.ndarray,
+               nxt: np.ndarray, tolerance: float) -> np.ndarray:
+    """可单独删除而不改变轮廓形状（容差内）的点"""
+    p, n = coords[prev], coords[nxt]
+    on_prev, on_next = on[prev], on[nxt]
+    to_segment = _segment_distance(coords, p, n)
+
+    # 在线点：两侧都是在线点且落在两者连线上（含重复点、零长度线段）
+    collinear = on & on_prev & on_next & (to_segment <= tolerance)
+    # 在线点：与相邻的在线点重合
+    duplicate = on & (((np.hypot(*(coords - p).T) <= tolerance) & on_prev)
+                      | ((np.hypot(*(coords - n).T) <= tolerance) & on_next))
+    # 在线点：两侧都是离线点且位于其中点（可隐含）
+    implied = on & ~on_prev & ~on_next & (np.hypot(*(coords - (p + n) * 0.5).T) <= tolerance)
+    # 离线点：两侧都是在线点且贴近弦线，曲线退化为直线
+    flat = ~on & on_prev & on_next & (to_segment <= tolerance)
+    return collinear | duplicate | implied | flat
+
+
+def simplify_glyphs(glyphs: Dict[str, Glyph],
+                    tolerance: float = DEFAULT_TOLERANCE) -> Dict[str, Glyph]:
+    """
+    删除整套二次曲线字形中的冗余点
+
+    所有简单字形拼接为一组坐标数组统一处理：每一轮求出可删除的点，
+    同一轮只删除互不相邻的点（每个被删点的两侧邻点都保留，判断依据不会失效），
+    重复直到没有可删除的点。含三次曲线、复合或空字形原样返回。
+
+    glyphs: {字形名: TTGlyph}
+    tolerance: 删除点允许的最大偏差（字体单位）
+    """
+    names = []
+    all_coords = []
+    all_on = []
+    contour_ids = []
+    contour_count = 0
+    for name, glyph in glyphs.items():
+        if glyph.numberOfContours <= 0 or any(f & flagCubic for f in glyph.flags):
+            continue
+        coords = np.frombuffer(glyph.coordinates.array, dtype=float).reshape(-1, 2)
+        end_pts = np.array(glyph.endPtsOfContours, dtype=np.intp)
+        names.append(name)
+        all_coords.append(coords)
+        all_on.append((np.frombuffer(bytes(glyph.flags), dtype=np.uint8) & flagOnCurve) != 0)
+        contour_ids.append(contour_count + np.repeat(np.arange(len(end_pts)),
+                                                     np.diff(end_pts, prepend=-1)))
+        contour_count += len(end_pts)
+
+    if not names:
+        return dict(glyphs)
+
+    coords = np.concatenate(all_coords)
+    on = np.concatenate(all_on)
+    contour = np.concatenate(contour_ids)
+    glyph_of_contour = np.repeat(np.arange(len(names)),
+                                 [glyphs[name].numberOfContours for name in names])
+
+    while True:
+        idx = np.arange(len(coords))
+        starts = np.flatnonzero(np.r_[True, contour[1:] != contour[:-1]])
+        ends = np.r_[starts[1:] - 1, len(coords) - 1]
+        prev = idx - 1
+        prev[starts] = ends
+        nxt = idx + 1
+        nxt[ends] = starts
+
+        candidate = _removable(coords, on, prev, nxt, tolerance)
+
+        # 连续的候选点只隔一个删除一个；轮廓首尾相接处另行避免同时删除
+        run_start = candidate & ~np.r_[False, candidate[:-1] & (contour[1:] == contour[:-1])]
+        last_start = np.maximum.accumulate(np.where(run_start, idx, 0))
+        remove = candidate & ((idx - last_start) % 2 == 0)
+        remove[starts[remove[starts] & remove[ends]]] = False
+
+        # 删除后点数过少的轮廓本轮不简化
+        sizes = np.bincount(contour, minlength=contour_count)
+        removed = np.bincount(contour[remove], minlength=contour_count)
+        remove &= (sizes - removed >= MIN_CONTOUR_POINTS)[contour]
+        if not remove.any():
+            break
+        keep = ~remove
+        coords, on, contour = coords[keep], on[keep], contour[keep]
+
+    simplified = dict(glyphs)
+    sizes = np.bincount(contour, minlength=contour_count)
+    contour_ends = np.cumsum(sizes) - 1
+    glyph_points = np.bincount(glyph_of_contour, weights=sizes, minlength=len(names)).astype(np.intp)
+    glyph_bounds = np.r_[0, np.cumsum(glyph_points)]
+    first_contour = np.r_[0, np.cumsum(np.bincount(glyph_of_contour, minlength=len(names)))]
+    flags = on.astype(np.uint8)
+
+    for i, name in enumerate(names):
+        lo, hi = glyph_bounds[i], glyph_bounds[i + 1]
+        if hi - lo == len(glyphs[name].coordinates):
+            continue
+        new_glyph = Glyph()
+        new_glyph.coordinates = GlyphCoordinates()
+        new_glyph.coordinates.array.frombytes(coords[lo:hi].tobytes())
+        new_glyph.flags = array('B', flags[lo:hi].tobytes())
+        new_glyph.endPtsOfContours = (contour_ends[first_contour[i]:first_contour[i + 1]] - lo).tolist()
+        new_glyph.numberOfContours = len(new_glyph.endPtsOfContours)
+        new_glyph.program = ttProgram.Program()
+        new_glyph.program.fromBytecode(b"")
+        simplified[name] = new_glyph
+
+    return simplified
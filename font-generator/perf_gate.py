@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""
+性能回归门禁
+运行基准测试场景，按中位数与已提交的基线比较：
+本次中位数与最快一次都比基线中位数慢 max(相对阈值 × 基线, 最小绝对差) 以上才判为回归，
+避免计时噪声误报；判为回归的场景再重跑确认，有回归时以非零状态退出
+"""
+
+import argparse
+import fnmatch
+import json
+import os
+import sys
+from typing import Any, Dict, List, NamedTuple, Optional
+
+from benchmark import DEFAULT_REPEAT, DEFAULT_WARMUP, environment, run_benchmarks
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                'benchmark_baseline.json')
+
+# 相对阈值（基线中位数的比例）与最小绝对差（毫秒），两者取大；
+# 共享或单核机器上的计时抖动可达 ±40%，稳定的专用机器可用 --relative 调低
+DEFAULT_RELATIVE = 0.5
+DEFAULT_MIN_DELTA_MS = 0.1
+
+# 判为回归的场景重跑确认的次数
+DEFAULT_CONFIRM = 1
+
+VERDICT_LABELS = {
+    'ok': '✅ 持平',
+    'improved': '🚀 变快',
+    'regressed': '❌ 回归',
+    'new': '🆕 新场景',
+    'missing': '⚠️ 未运行',
+}
+
+
+class Verdict(NamedTuple):
+    name: str
+    baseline_ms: Optional[float]
+    current_ms: Optional[float]
+    verdict: str
+
+    @property
+    def delta_pct(self) -> Optional[float]:
+        if self.baseline_ms is None or self.current_ms is None or self.baseline_ms == 0:
+            return None
+        return (self.current_ms - self.baseline_ms) / self.baseline_ms * 100
+
+
+def compare(baseline: Dict[str, Dict[str, Any]], current: Dict[str, Dict[str, Any]],
+            relative: float = DEFAULT_RELATIVE,
+            min_delta_ms: float = DEFAULT_MIN_DELTA_MS) -> List[Verdict]:
+    """
+    逐场景比较中位数
+
+    返回: 按场景名排序的判定；只在基线中出现的场景为 missing，只在本次结果中出现的为 new。
+    回归还要求本次最快一次也超出阈值，偶发的慢样本不会抬高判定
+    """
+    verdicts = []
+    for name in sorted(set(baseline) | set(current)):
+        base = baseline[name]['median_ms'] if name in baseline else None
+        now = current[name]['median_ms'] if name in current else None
+        if base is None:
+            verdict = 'new'
+        elif now is None:
+            verdict = 'missing'
+        else:
+            threshold = max(base * relative, min_delta_ms)
+            fastest = current[name].get('min_ms', now)
+            if now - base > threshold and fastest - base > threshold:
+                verdict = 'regressed'
+            elif base - now > threshold:
+                verdict = 'improved'
+            else:
+                verdict = 'ok'
+        verdicts.append(Verdict(name, base, now, verdict))
+    return verdicts
+
+
+def format_table(verdicts: List[Verdict]) -> str:
+    def ms(value):
+        return f"{value:.3f}" if value is not None else '-'
+
+    lines = [f"{'场景':<36} {'基线 ms':>10} {'本次 ms':>10} {'变化':>8}  判定"]
+    for v in verdicts:
+        delta = f"{v.delta_pct:+.1f}%" if v.delta_pct is not None else '-'
+        lines.append(f"{v.name:<36} {ms(v.baseline_ms):>10} {ms(v.current_ms):>10} "
+                     f"{delta:>8}  {VERDICT_LABELS[v.verdict]}")
+    return '\n'.join(lines)
+
+
+def load_results(path: str) -> Dict[str, Dict[str, Any]]:
+    """读取 benchmark.py --output 格式的结果文件中的 results"""
+    with open(path, 'r', encoding='utf-8') as f:
+        report = json.load(f)
+    if not isinstance(report, dict) or not isinstance(report.get('results'), dict):
+        raise ValueError(f"不是基准测试结果文件: {path}")
+    return report['results']
+
+
+def main():
+    parser = argparse.ArgumentParser(description='性能回归门禁：基准测试结果与基线比较')
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE, help='基线结果 JSON')
+    parser.add_argument('--results', help='使用已有的结果 JSON，而不是重新运行基准测试')
+    parser.add_argument('--warmup', type=int, default=DEFAULT_WARMUP, help='每个场景的预热次数')
+    parser.add_argument('--repeat', type=int, default=DEFAULT_REPEAT, help='每个场景的测量次数')
+    parser.add_argument('--filter', default='*', help='只运行名称匹配的场景（如 "build.*"）')
+    parser.add_argument('--relative', type=float, default=DEFAULT_RELATIVE,
+                        help='相对阈值，基线中位数的比例（默认 0.5）')
+    parser.add_argument('--min-delta-ms', type=float, default=DEFAULT_MIN_DELTA_MS,
+                        help='最小绝对差，毫秒（默认 0.1）')
+    parser.add_argument('--confirm', type=int, default=DEFAULT_CONFIRM,
+                        help='回归场景重跑确认的次数，取各次中较快的结果（默认 1）')
+    parser.add_argument('--update', action='store_true', help='把本次结果写为新的基线')
+
+    args = parser.parse_args()
+    if args.warmup < 0 or args.repeat < 1:
+        print("❌ --warmup 不能为负，--repeat 至少为 1", file=sys.stderr)
+        sys.exit(1)
+
+    try:
+        if args.results:
+            current = load_results(args.results)
+        else:
+            print(f"🔍 运行基准测试（预热 {args.warmup} 次，测量 {args.repeat} 次）...")
+            current = run_benchmarks(args.warmup, args.repeat, args.filter)
+        if not current:
+            raise ValueError(f"没有匹配的场景: {args.filter}")
+
+        if args.update:
+            report = {
+                'environment': environment(),
+                'warmup': args.warmup,
+                'repeat': args.repeat,
+                'results': current,
+            }
+            with open(args.baseline, 'w', encoding='utf-8') as f:
+                json.dump(report, f, ensure_ascii=False, indent=2)
+                f.write('\n')
+            print(f"✅ 基线已更新（{len(current)} 个场景）: {args.baseline}")
+            return
+
+        baseline = load_results(args.baseline)
+    except Exception as e:
+        print(f"❌ {e}", file=sys.stderr)
+        sys.exit(1)
+
+    # 只运行了部分场景时，其余基线场景不参与比较
+    baseline = {name: stats for name, stats in baseline.items()
+                if fnmatch.fnmatch(name, args.filter)}
+
+    verdicts = compare(baseline, current, args.relative, args.min_delta_ms)
+    if not args.results:
+        for _ in range(args.confirm):
+            regressed = [v.name for v in verdicts if v.verdict == 'regressed']
+            if not regressed:
+                break
+            print(f"🔍 重跑 {len(regressed)} 个回归场景确认...")
+            for name in regressed:
+                rerun = run_benchmarks(args.warmup, args.repeat, name).get(name)
+                if rerun and rerun['median_ms'] < current[name]['median_ms']:
+                    current[name] = rerun
+            verdicts = compare(baseline, current, args.relative, args.min_delta_ms)
+    print(format_table(verdicts))
+
+    regressions = [v for v in verdicts if v.verdict == 'regressed']
+    if regressions:
+        print(f"\n❌ {len(regressions)} 个场景回归（阈值: +{args.relative:.0%} 且至少 "
+              f"{args.min_delta_ms} ms）", file=sys.stderr)
+        sys.exit(1)
+    print(f"\n✅ 无性能回归（{len(verdicts)} 个场景）")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,287 @@
+#!/usr/bin/env python3
+"""
+字体预览渲染
+从已生成的字体把文本排版（layout）并光栅化为 PNG（替代后端的占位预览图），
+字形位图按 (字体哈希, 字形, 字号) 缓存在内存，CLI 另挂磁盘层（后端每次请求启动新进程，
+跨请求只能经磁盘复用），重复的字形只需拼版与编码；
+整张预览 PNG 另有内存 + 磁盘两级缓存（render_cache），命中时不再渲染
+"""
+
+import argparse
+import base64
+import json
+import math
+import os
+import struct
+import sys
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from font_store import DEFAULT_FONTS_DIR, font_path_for, font_store
+from rasterizer import EMPTY_BITMAP, GlyphBitmap, encode_png, glyph_edges, rasterize_edges
+from render_cache import RenderCache, render_key
+from subsetter import font_hash
+
+DEFAULT_TEXT = 'ABCDEFG abcdefg 0123456789'
+DEFAULT_SIZE = 48
+MAX_SIZE = 512
+
+
+class FontRasterSource:
+    """
+    光栅化所需的字体数据
+
+    cmap、度量在加载时读取；字形轮廓在首次使用时展平并缓存（与字号无关）
+    """
+
+    def __init__(self, font_path: str):
+        font = font_store.open(font_path)
+        self.font = font
+        self.units_per_em = font['head'].unitsPerEm
+        self.ascender = font['hhea'].ascent
+        self.descender = font['hhea'].descent
+        self.cmap = font.getBestCmap() or {}
+        self.advances = {name: advance for name, (advance, _) in font['hmtx'].metrics.items()}
+        self._glyf = font['glyf']
+        self._edges: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}
+
+    def edges(self, glyph_name: str) -> Tuple[np.ndarray, np.ndarray]:
+        """展平后的轮廓边 (起点 (E, 2), 终点 (E, 2))，字体单位"""
+        edges = self._edges.get(glyph_name)
+        if edges is None:
+            edges = glyph_edges(self._glyf, glyph_name)
+            self._edges[glyph_name] = edges
+        return edges
+
+
+# 字形位图的序列化头: left, top, 高, 宽
+_BITMAP_HEADER = struct.Struct('<iiII')
+
+
+def pack_bitmap(bitmap: GlyphBitmap) -> bytes:
+    """字形位图 → 字节串（头 + 覆盖率按行排列）"""
+    height, width = bitmap.coverage.shape
+    return (_BITMAP_HEADER.pack(bitmap.left, bitmap.top, height, width)
+            + np.ascontiguousarray(bitmap.coverage).tobytes())
+
+
+def unpack_bitmap(data: bytes) -> GlyphBitmap:
+    """pack_bitmap 的逆运算"""
+    left, top, height, width = _BITMAP_HEADER.unpack_from(data)
+    coverage = np.frombuffer(data, dtype=np.uint8, offset=_BITMAP_HEADER.size)
+    return GlyphBitmap(coverage.reshape(height, width), left, top)
+
+
+class GlyphBitmapCache:
+    """
+    按 (字体哈希, 字形名, 字号) 缓存字形位图的 LRU
+
+    store: 可选的磁盘层（RenderCache），内存未命中时读取、新位图写入；
+    写入时不检查磁盘上限，由 prune() 在一次渲染结束后统一检查
+    """
+
+    def __init__(self, max_entries: int = 8192, store: Optional[RenderCache] = None):
+        self.max_entries = max_entries
+        self.store = store
+        self._entries: 'OrderedDict[Tuple[str, str, float], GlyphBitmap]' = OrderedDict()
+        self._stored = False
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _store_key(key: Tuple[str, str, float]) -> str:
+        digest, glyph_name, size = key
+        return render_key(digest, glyph_name, size, kind='glyphBitmap')
+
+    def get(self, key: Tuple[str, str, float]) -> Optional[GlyphBitmap]:
+        bitmap = self._entries.get(key)
+        if bitmap is not None:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return bitmap
+        if self.store is not None:
+            data = self.store.get(self._store_key(key))
+            if data is not None:
+                bitmap = unpack_bitmap(data)
+                self._remember(key, bitmap)
+                self.disk_hits += 1
+                return bitmap
+        self.misses += 1
+        return None
+
+    def put(self, key: Tuple[str, str, float], bitmap: GlyphBitmap):
+        self._remember(key, bitmap)
+        if self.store is not None:
+            self.store.put(self._store_key(key), pack_bitmap(bitmap), prune=False)
+            self._stored = True
+
+    def prune(self):
+        """写入过磁盘层时检查其上限"""
+        if self._stored:
+            self.store.prune()
+            self._stored = False
+
+    def _remember(self, key: Tuple[str, str, float], bitmap: GlyphBitmap):
+        self._entries[key] = bitmap
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+
+# 进程内缓存：字体数据按内容哈希复用，字形位图全局共享
+_sources: 'OrderedDict[str, FontRasterSource]' = OrderedDict()
+_MAX_SOURCES = 16
+bitmap_cache = GlyphBitmapCache()
+
+# 预览 PNG 缓存（默认仅内存；CLI 会挂上字体目录下的磁盘层）
+preview_cache = RenderCache()
+
+
+def font_source(font_path: str) -> Tuple[str, FontRasterSource]:
+    """
+    加载（或复用）字体的光栅化数据
+
+    返回: (字体内容哈希, FontRasterSource)
+    """
+    digest = font_hash(font_path)
+    source = _sources.get(digest)
+    if source is None:
+        source = FontRasterSource(font_path)
+        _sources[digest] = source
+        while len(_sources) > _MAX_SOURCES:
+            _sources.popitem(last=False)
+    else:
+        _sources.move_to_end(digest)
+    return digest, source
+
+
+def glyph_bitmap(digest: str, source: FontRasterSource,
+                 glyph_name: str, size: float) -> GlyphBitmap:
+    """字号为 size 像素（每 em）的字形位图，命中缓存时不重新光栅化"""
+    key = (digest, glyph_name, size)
+    bitmap = bitmap_cache.get(key)
+    if bitmap is None:
+        a, b = source.edges(glyph_name)
+        bitmap = rasterize_edges(a, b, size / source.units_per_em) if len(a) else EMPTY_BITMAP
+        bitmap_cache.put(key, bitmap)
+    return bitmap
+
+
+def render_text(font_path: str, text: str = DEFAULT_TEXT,
+                size: float = DEFAULT_SIZE, padding: int = 8,
+                max_width: Optional[float] = None) -> np.ndarray:
+    """
+    把文本渲染为覆盖率图（支持换行；给定 max_width 像素时自动断行）
+
+    返回: (高, 宽) uint8 数组，255 为完全覆盖
+    """
+    from layout import font_layout
+
+    if not 0 < size <= MAX_SIZE:
+        raise ValueError(f"字号必须在 (0, {MAX_SIZE}] 像素之间: {size}")
+
+    digest, source = font_source(font_path)
+    layout = font_layout(font_path)
+    runs = layout.layout_paragraph(text, size, max_width)
+
+    # 先由排版结果得到每个字形位图的位置，再一次性分配画布
+    placements: List[Tuple[GlyphBitmap, int, int]] = []
+    for run in runs:
+        baseline = padding + round(run.y)
+        for gid, x in zip(run.glyph_ids, run.x):
+            bitmap = glyph_bitmap(digest, source, layout.glyph_order[gid], size)
+            if bitmap.coverage.size:
+                placements.append((bitmap, padding + round(x) + bitmap.left, baseline - bitmap.top))
+
+    width = math.ceil(max(run.width for run in runs)) + padding * 2
+    height = math.ceil(len(runs) * layout.line_height(size)) + padding * 2
+    canvas = np.zeros((height, width), dtype=np.uint8)
+    for bitmap, x, y in placements:
+        h, w = bitmap.coverage.shape
+        x0, y0 = max(x, 0), max(y, 0)
+        x1, y1 = min(x + w, canvas.shape[1]), min(y + h, canvas.shape[0])
+        if x1 > x0 and y1 > y0:
+            region = canvas[y0:y1, x0:x1]
+            np.maximum(region, bitmap.coverage[y0 - y:y1 - y, x0 - x:x1 - x], out=region)
+    bitmap_cache.prune()
+    return canvas
+
+
+def render_preview_png(font_path: str, text: str = DEFAULT_TEXT,
+                       size: float = DEFAULT_SIZE,
+                       max_width: Optional[float] = None,
+                       padding: int = 8,
+                       cache: Optional[RenderCache] = preview_cache) -> bytes:
+    """
+    白底黑字的预览 PNG
+
+    cache: 渲染缓存，键为 (字体内容哈希, 文本, 字号, 断行宽度, 边距)；None 时不缓存
+    """
+    def render() -> bytes:
+        return encode_png(255 - render_text(font_path, text, size, padding, max_width))
+
+    if cache is None:
+        return render()
+    key = render_key(font_hash(font_path), text, size, max_width=max_width, padding=padding)
+    return cache.get_or_render(key, render)
+
+
+def render_preview_data_url(font_path: str, text: str = DEFAULT_TEXT,
+                            size: float = DEFAULT_SIZE,
+                            max_width: Optional[float] = None,
+                            cache: Optional[RenderCache] = preview_cache) -> str:
+    """预览 PNG 的 data URL（后端 getFontPreview 的返回格式）"""
+    png = render_preview_png(font_path, text, size, max_width, cache=cache)
+    return 'data:image/png;base64,' + base64.b64encode(png).decode('ascii')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='渲染字体预览图')
+    parser.add_argument('--font-id', required=True, help='字体ID')
+    parser.add_argument('--text', default=DEFAULT_TEXT, help='预览文本')
+    parser.add_argument('--size', type=float, default=DEFAULT_SIZE, help='字号（像素）')
+    parser.add_argument('--max-width', type=float, help='断行宽度（像素）')
+    parser.add_argument('--fonts-dir', default=DEFAULT_FONTS_DIR, help='已生成字体所在目录')
+    parser.add_argument('--output', help='PNG输出路径；省略时向标准输出打印 data URL')
+    parser.add_argument('--no-cache', action='store_true', help='不读写预览缓存')
+    parser.add_argument('--cache-ttl', type=float, default=preview_cache.ttl,
+                        help='磁盘缓存有效期（秒）')
+    parser.add_argument('--cache-stats', action='store_true', help='向标准错误打印缓存命中统计')
+
+    args = parser.parse_args()
+
+    # 后端每次请求启动新进程，跨请求的复用依赖磁盘层（整张预览与字形位图）
+    cache = None
+    if not args.no_cache:
+        cache = preview_cache
+        cache.cache_dir = os.path.join(args.fonts_dir, '.previews')
+        cache.ttl = args.cache_ttl
+        # 位图已由 GlyphBitmapCache 缓存在内存，磁盘层不再保留内存副本
+        bitmap_cache.store = RenderCache(max_bytes=0, ttl=args.cache_ttl, suffix='.bin',
+                                         cache_dir=os.path.join(args.fonts_dir, '.glyphs'))
+
+    try:
+        font_path = font_path_for(args.font_id, args.fonts_dir)
+        if args.output:
+            with open(args.output, 'wb') as f:
+                f.write(render_preview_png(font_path, args.text, args.size, args.max_width,
+                                           cache=cache))
+        else:
+            print(render_preview_data_url(font_path, args.text, args.size, args.max_width,
+                                          cache=cache))
+    except (ValueError, FileNotFoundError) as e:
+        print(f"❌ {e}", file=sys.stderr)
+        sys.exit(1)
+
+    if args.cache_stats and cache is not None:
+        stats = cache.stats()
+        stats['glyphBitmaps'] = {'memoryHits': bitmap_cache.hits, 'diskHits': bitmap_cache.disk_hits,
+                                 'misses': bitmap_cache.misses}
+        print(json.dumps(stats), file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,305 @@
+#!/usr/bin/env python3
+"""
+批量三次→二次贝塞尔转换器
+一次性收集整套字形的三次曲线段，以向量化方式计算二次样条并直接写回glyf轮廓
+"""
+
+from array import array
+from typing import Dict, List, Tuple
+
+import numpy as np
+from fontTools.ttLib.tables import ttProgram
+from fontTools.ttLib.tables._g_l_y_f import (
+    Glyph,
+    GlyphCoordinates,
+    flagCubic,
+    flagOnCurve,
+)
+
+# 与 fontTools.cu2qu 保持一致的最大分段数
+MAX_N = 100
+
+# 误差估计时在差值曲线上的采样参数
+_ERROR_SAMPLES = np.linspace(0.0, 1.0, 17)
+_T1 = 1.0 - _ERROR_SAMPLES
+_ERROR_BASIS = np.stack([
+    _T1 ** 3,
+    3 * _T1 ** 2 * _ERROR_SAMPLES,
+    3 * _T1 * _ERROR_SAMPLES ** 2,
+    _ERROR_SAMPLES ** 3,
+], axis=1)  # (S, 4)
+
+
+def _split_cubics(cubics: np.ndarray, n: int) -> np.ndarray:
+    """
+    将每条三次曲线按参数均分为n段
+
+    cubics: (N, 4, 2)
+    返回: (N, n, 4, 2)
+    """
+    p0, p1, p2, p3 = cubics[:, 0], cubics[:, 1], cubics[:, 2], cubics[:, 3]
+    # 幂基系数: a t^3 + b t^2 + c t + d
+    a = p3 - p0 + 3 * (p1 - p2)
+    b = 3 * (p0 + p2) - 6 * p1
+    c = 3 * (p1 - p0)
+    d = p0
+
+    dt = 1.0 / n
+    t0 = (np.arange(n) * dt)[None, :, None]  # (1, n, 1)
+    a, b, c, d = (v[:, None, :] for v in (a, b, c, d))
+
+    a1 = a * dt ** 3
+    b1 = (3 * a * t0 + b) * dt ** 2
+    c1 = (3 * a * t0 ** 2 + 2 * b * t0 + c) * dt
+    d1 = ((a * t0 + b) * t0 + c) * t0 + d
+
+    q0 = d1
+    q1 = q0 + c1 / 3
+    q2 = q1 + (c1 + b1) / 3
+    q3 = d1 + c1 + b1 + a1
+    return np.stack([q0, q1, q2, q3], axis=2)
+
+
+def _intersect_controls(cubics: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    计算单段二次近似的控制点（两端切线交点）
+
+    返回: (控制点 (N, 2), 是否有效 (N,))
+    """
+    p0, p1, p2, p3 = cubics[:, 0], cubics[:, 1], cubics[:, 2], cubics[:, 3]
+    ab = p1 - p0
+    cd = p3 - p2
+    perp = np.stack([-ab[:, 1], ab[:, 0]], axis=1)
+    num = np.sum(perp * (p0 - p2), axis=1)
+    den = np.sum(perp * cd, axis=1)
+
+    valid = den != 0
+    h = np.divide(num, den, out=np.zeros_like(num), where=valid)
+    controls = p2 + cd * h[:, None]
+
+    # 三点或四点重合时仍存在交点，取其中一个控制点
+    degenerate = (~valid) & np.all(p1 == p2, axis=1) & (
+        np.all(p0 == p1, axis=1) | np.all(p2 == p3, axis=1))
+    controls[degenerate] = p1[degenerate]
+    return controls, valid | degenerate
+
+
+def _max_deviation(diff: np.ndarray) -> np.ndarray:
+    """
+    估计差值三次曲线到原点的最大距离（在固定参数网格上采样）
+
+    diff: (..., 4, 2) 差值曲线控制点
+    返回: (...)
+    """
+    samples = _ERROR_BASIS @ diff
+    return np.max(np.hypot(samples[..., 0], samples[..., 1]), axis=-1)
+
+
+def _approx_splines(cubics: np.ndarray, n: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    用n段二次曲线近似每条三次曲线
+
+    返回: (控制点 (N, n, 2), 最大误差 (N,))；无法计算的曲线误差为inf
+    """
+    if n == 1:
+        controls, valid = _intersect_controls(cubics)
+        controls = controls[:, None, :]
+        pieces = cubics[:, None]
+        starts = cubics[:, None, 0]
+        ends = cubics[:, None, 3]
+    else:
+        pieces = _split_cubics(cubics, n)
+        t = (np.arange(n) / (n - 1))[None, :, None]
+        c1 = pieces[:, :, 0] + (pieces[:, :, 1] - pieces[:, :, 0]) * 1.5
+        c2 = pieces[:, :, 3] + (pieces[:, :, 2] - pieces[:, :, 3]) * 1.5
+        controls = c1 + (c2 - c1) * t
+        valid = np.ones(len(cubics), dtype=bool)
+
+        implied = (controls[:, :-1] + controls[:, 1:]) * 0.5
+        starts = np.concatenate([cubics[:, None, 0], implied], axis=1)
+        ends = np.concatenate([implied, cubics[:, None, 3]], axis=1)
+
+    # 二次曲线升阶为三次后与原曲线逐段作差
+    diff = np.stack([
+        starts - pieces[:, :, 0],
+        starts + (controls - starts) * (2 / 3) - pieces[:, :, 1],
+        ends + (controls - ends) * (2 / 3) - pieces[:, :, 2],
+        ends - pieces[:, :, 3],
+    ], axis=2)
+    errors = np.max(_max_deviation(diff), axis=1)
+    errors[~valid] = np.inf
+    return controls, errors
+
+
+def curves_to_quadratic(cubics: np.ndarray,
+                        max_err: float = 1.0,
+                        max_n: int = MAX_N) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    将一组三次贝塞尔曲线批量转换为二次样条
+
+    cubics: (N, 4, 2) 三次曲线控制点
+    max_err: 所有曲线共享的最大允许误差（字体单位）
+    返回: (控制点 (M, 2), 偏移 (N+1,))
+          第i条曲线的二次离线控制点为 controls[offsets[i]:offsets[i+1]]
+    """
+    cubics = np.asarray(cubics, dtype=float).reshape(-1, 4, 2)
+    count = len(cubics)
+    result: List[np.ndarray] = [None] * count
+    remaining = np.arange(count)
+
+    for n in range(1, max_n + 1):
+        if len(remaining) == 0:
+            break
+        controls, errors = _approx_splines(cubics[remaining], n)
+        # 达到最大分段数时接受当前结果，避免整套字体因个别曲线失败
+        done = errors <= max_err if n < max_n else np.isfinite(errors)
+        if n == max_n and not np.all(done):
+            raise ValueError(f"{np.count_nonzero(~done)} 条曲线无法转换为二次曲线")
+        for i, spline in zip(remaining[done], controls[done]):
+            result[i] = spline
+        remaining = remaining[~done]
+
+    lengths = np.array([len(r) for r in result], dtype=np.intp)
+    offsets = np.zeros(count + 1, dtype=np.intp)
+    np.cumsum(lengths, out=offsets[1:])
+    controls = np.concatenate(result) if count else np.zeros((0, 2))
+    return controls, offsets
+
+
+def _glyph_arrays(glyph: Glyph) -> Tuple[np.ndarray, np.ndarray, List[int]]:
+    """
+    读取字形的坐标、标志与轮廓终点
+
+    含三次曲线的轮廓若以离线点开头，则旋转到第一个在线点，
+    保证后续的向量化处理中每条轮廓都从在线点开始。
+    """
+    coords = np.frombuffer(glyph.coordinates.array, dtype=float).reshape(-1, 2)
+    flags = np.frombuffer(bytes(glyph.flags), dtype=np.uint8) & (flagOnCurve | flagCubic)
+    end_pts = list(glyph.endPtsOfContours)
+
+    starts = [0] + [e + 1 for e in end_pts[:-1]]
+    if all(flags[s] & flagOnCurve for s in starts):
+        return coords, flags, end_pts
+
+    coords = coords.copy()
+    flags = flags.copy()
+    for s, e in zip(starts, end_pts):
+        on = np.flatnonzero(flags[s:e + 1] & flagOnCurve)
+        if len(on) and on[0] > 0:
+            coords[s:e + 1] = np.roll(coords[s:e + 1], -on[0], axis=0)
+            flags[s:e + 1] = np.roll(flags[s:e + 1], -on[0])
+    return coords, flags, end_pts
+
+
+def glyphs_to_quadratic(glyphs: Dict[str, Glyph],
+                        max_err: float = 1.0,
+                        max_n: int = MAX_N) -> Dict[str, Glyph]:
+    """
+    将整套字形中的三次曲线一次性转换为二次曲线
+
+    不经过Pen回放：把所有含三次曲线的字形拼接成一组坐标/标志数组，
+    定位全部三次曲线段统一计算，再按输出点数展开写回二次轮廓。
+    不含三次曲线的字形原样返回。
+
+    glyphs: {字形名: TTGlyph}
+    max_err: 整套字体共享的最大误差（字体单位）
+    """
+    names = []
+    all_coords = []
+    all_flags = []
+    contour_starts = []
+    contour_ends = []
+    glyph_bounds = [0]
+    glyph_contours = [0]
+
+    for name, glyph in glyphs.items():
+        if glyph.numberOfContours <= 0 or not any(f & flagCubic for f in glyph.flags):
+            continue
+        coords, flags, end_pts = _glyph_arrays(glyph)
+        base = glyph_bounds[-1]
+        names.append(name)
+        all_coords.append(coords)
+        all_flags.append(flags)
+        contour_starts.extend([base] + [base + e + 1 for e in end_pts[:-1]])
+        contour_ends.extend(base + e for e in end_pts)
+        glyph_bounds.append(base + len(flags))
+        glyph_contours.append(glyph_contours[-1] + len(end_pts))
+
+    if not names:
+        return dict(glyphs)
+
+    coords = np.concatenate(all_coords)
+    flags = np.concatenate(all_flags)
+    contour_starts = np.array(contour_starts, dtype=np.intp)
+    contour_ends = np.array(contour_ends, dtype=np.intp)
+    idx = np.arange(len(flags))
+
+    # 轮廓内的上一个/下一个点（轮廓闭合）
+    nxt = idx + 1
+    nxt[contour_ends] = contour_starts
+    prv = idx - 1
+    prv[contour_starts] = contour_ends
+
+    on = (flags & flagOnCurve) != 0
+    cubic_off = ((flags & flagCubic) != 0) & ~on
+    # 离线点在所属片段中的位置：1,3,5…为三次离线点对的第一个；
+    # 不含在线点的轮廓（全部为隐含在线点）从轮廓起点开始配对
+    point_starts = np.repeat(contour_starts, contour_ends - contour_starts + 1)
+    last_on = np.maximum(np.maximum.accumulate(np.where(on, idx, -1)), point_starts - 1)
+    pos = idx - last_on
+    first = cubic_off & (pos % 2 == 1)
+    second = cubic_off & (pos % 2 == 0)
+
+    c1 = np.flatnonzero(first)
+    c2 = nxt[c1]
+    if not np.all(second[c2]):
+        raise ValueError("三次曲线离线点数量必须为偶数")
+    prev = prv[c1]
+    after = nxt[c2]
+    # 相邻两条三次曲线的离线点之间为隐含在线点（两点的中点）
+    seg_start = np.where(on[prev, None], coords[prev],
+                         (coords[prev] + coords[c1]) * 0.5)
+    seg_end = np.where(on[after, None], coords[after],
+                       (coords[c2] + coords[after]) * 0.5)
+    cubics = np.stack([seg_start, coords[c1], coords[c2], seg_end], axis=1)
+
+    controls, offsets = curves_to_quadratic(cubics, max_err, max_n)
+
+    # 每个原始点展开后的输出点数：
+    # 在线点/二次离线点 → 1，三次点对第一个 → 样条控制点数，
+    # 第二个 → 后随离线点时输出隐含在线点，否则为0
+    counts = np.ones(len(flags), dtype=np.intp)
+    counts[c1] = np.diff(offsets)
+    counts[second] = 0
+    counts[c2[~on[after]]] = 1
+
+    src = np.repeat(idx, counts)
+    out = coords[src]
+    out_flags = on[src].astype(np.uint8)
+    is_control = first[src]
+    out[is_control] = controls
+    is_implied = second[src]
+    out[is_implied] = (coords[src[is_implied]] + coords[nxt[src[is_implied]]]) * 0.5
+    out_flags[is_implied] = flagOnCurve
+    out = np.floor(out + 0.5)
+
+    cum = np.cumsum(counts)
+    new_ends = cum[contour_ends] - 1
+
+    converted = dict(glyphs)
+    for i, name in enumerate(names):
+        lo = cum[glyph_bounds[i] - 1] if glyph_bounds[i] else 0
+        hi = cum[glyph_bounds[i + 1] - 1]
+        ends = new_ends[glyph_contours[i]:glyph_contours[i + 1]] - lo
+
+        new_glyph = Glyph()
+        new_glyph.coordinates = GlyphCoordinates()
+        new_glyph.coordinates.array.frombytes(out[lo:hi].tobytes())
+        new_glyph.flags = array('B', out_flags[lo:hi].tobytes())
+        new_glyph.endPtsOfContours = ends.tolist()
+        new_glyph.numberOfContours = len(ends)
+        new_glyph.program = ttProgram.Program()
+        new_glyph.program.fromBytecode(b"")
+        converted[name] = new_glyph
+
+    return converted
@@ -0,0 +1,270 @@
+#!/usr/bin/env python3
+"""
+扫描线覆盖率光栅化
+把展平后的轮廓边（bezier_utils.flatten_quadratic_contours 的输出）光栅化为
+抗锯齿灰度位图或有符号距离场，并提供无依赖的 PNG 编码
+"""
+
+import math
+import struct
+import zlib
+from typing import List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+
+from bezier_utils import flatten_quadratic_contours
+
+# 每段二次曲线的展平细分数
+FLATTEN_STEPS = 8
+
+# 每个像素行内的采样扫描线数（垂直方向超采样；水平方向按交点位置精确分配覆盖率）
+SUBSAMPLES = 4
+
+
+class GlyphBitmap(NamedTuple):
+    """
+    字形位图
+
+    coverage: (高, 宽) uint8 覆盖率（0-255）
+    left: 位图左边缘相对字形原点的像素偏移
+    top: 位图上边缘相对基线的像素高度（向上为正）
+    """
+    coverage: np.ndarray
+    left: int
+    top: int
+
+
+EMPTY_BITMAP = GlyphBitmap(np.zeros((0, 0), dtype=np.uint8), 0, 0)
+
+
+def glyph_edges(glyf, glyph_name: str,
+                steps: int = FLATTEN_STEPS) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    展平 glyf 表中字形的轮廓
+
+    返回: (起点 (E, 2), 终点 (E, 2))，字体单位；空字形返回两个空数组
+    """
+    glyph = glyf[glyph_name]
+    if glyph.numberOfContours == 0:
+        empty = np.zeros((0, 2))
+        return empty, empty
+    coords, end_pts, flags = glyph.getCoordinates(glyf)
+    a, b, _ = flatten_quadratic_contours(np.array(coords), np.array(flags), list(end_pts), steps)
+    return a, b
+
+
+def _glyph_box(pa: np.ndarray, pb: np.ndarray) -> Tuple[int, int, int, int]:
+    """像素坐标下边集合的整像素包围盒 (left, top, 宽, 高)"""
+    xs_all = np.concatenate([pa[:, 0], pb[:, 0]])
+    ys_all = np.concatenate([pa[:, 1], pb[:, 1]])
+    left = math.floor(xs_all.min())
+    top = math.ceil(ys_all.max())
+    return left, top, math.ceil(xs_all.max()) - left, top - math.floor(ys_all.min())
+
+
+def _coverage(x0: np.ndarray, y0: np.ndarray, x1: np.ndarray, y1: np.ndarray,
+              width: int, height: int, subsamples: int) -> Optional[np.ndarray]:
+    """
+    位图坐标（x 向右、y 向下）中闭合折线的覆盖率（非零环绕规则）
+
+    返回: (高, 宽) float 覆盖率（0-1），没有任何扫描线交点时为 None
+    """
+    dy = y1 - y0
+
+    # 采样扫描线 j 位于 y = (j + 0.5) / S；每条边覆盖半开区间 [ymin, ymax) 内的扫描线
+    s = subsamples
+    lo = np.ceil(np.minimum(y0, y1) * s - 0.5).astype(np.intp)
+    hi = np.ceil(np.maximum(y0, y1) * s - 0.5).astype(np.intp)
+    counts = np.where(dy != 0, np.maximum(hi - lo, 0), 0)
+    total = int(counts.sum())
+    if total == 0:
+        return None
+
+    edge = np.repeat(np.arange(len(counts)), counts)
+    row = lo[edge] + (np.arange(total) - np.repeat(np.cumsum(counts) - counts, counts))
+    t = ((row + 0.5) / s - y0[edge]) / dy[edge]
+    x = np.clip(x0[edge] + t * (x1 - x0)[edge], 0, width)
+    winding = np.where(dy[edge] > 0, 1, -1)
+
+    # 按 (扫描线, x) 排序后累加环绕数；每条扫描线上环绕数之和为0，全局前缀和即逐行环绕数。
+    # 环绕数非零的区间互不重叠，重叠轮廓不会重复累计覆盖率
+    order = np.lexsort((x, row))
+    row, x = row[order], x[order]
+    inside = np.nonzero(np.cumsum(winding[order]) != 0)[0]
+    span_row = row[inside]
+    span_start = x[inside]
+    span_end = x[inside + 1]
+
+    # 区间起点所在像素得到 +(1 - frac)、右侧像素 +frac，终点同理取负；沿行前缀和即覆盖率
+    stride = width + 2
+    positions = np.concatenate([span_start, span_end])
+    weights = np.concatenate([np.ones(len(inside)), -np.ones(len(inside))])
+    ix = np.floor(positions).astype(np.intp)
+    frac = positions - ix
+    base = np.concatenate([span_row, span_row]) * stride + ix
+    acc = np.bincount(np.concatenate([base, base + 1]),
+                      weights=np.concatenate([weights * (1 - frac), weights * frac]),
+                      minlength=height * s * stride)
+    acc = acc[:height * s * stride].reshape(height * s, stride)
+    coverage = np.clip(np.cumsum(acc, axis=1)[:, :width], 0.0, 1.0)
+    return coverage.reshape(height, s, width).mean(axis=1)
+
+
+def _to_uint8(coverage: np.ndarray) -> np.ndarray:
+    return (coverage * 255 + 0.5).astype(np.uint8)
+
+
+def rasterize_edges(a: np.ndarray, b: np.ndarray, scale: float,
+                    subsamples: int = SUBSAMPLES) -> GlyphBitmap:
+    """
+    光栅化闭合折线轮廓（非零环绕规则）
+
+    a, b: (E, 2) 边的起点与终点（字体单位，y 轴向上）
+    scale: 字体单位到像素的缩放
+    返回: GlyphBitmap
+
+    每条边与所有采样扫描线的交点一次性求出，按非零环绕规则得到各扫描线上的
+    填充区间，区间端点按横向位置拆分到相邻像素后用 bincount 累加，再沿行求
+    前缀和得到覆盖率。
+    """
+    if len(a) == 0:
+        return EMPTY_BITMAP
+
+    pa = np.asarray(a, dtype=float) * scale
+    pb = np.asarray(b, dtype=float) * scale
+    left, top, width, height = _glyph_box(pa, pb)
+    if width <= 0 or height <= 0:
+        return EMPTY_BITMAP
+
+    coverage = _coverage(pa[:, 0] - left, top - pa[:, 1], pb[:, 0] - left, top - pb[:, 1],
+                         width, height, subsamples)
+    if coverage is None:
+        return EMPTY_BITMAP
+    return GlyphBitmap(_to_uint8(coverage), left, top)
+
+
+# 批量光栅化时拼版画布的最大宽度（像素）
+BATCH_CANVAS_WIDTH = 2048
+
+
+def rasterize_batch(items: Sequence[Tuple[np.ndarray, np.ndarray, float]],
+                    subsamples: int = SUBSAMPLES) -> List[GlyphBitmap]:
+    """
+    一次光栅化多个 (起点, 终点, 缩放) 轮廓，结果与逐个调用 rasterize_edges 一致（舍入误差内）
+
+    各轮廓的包围盒按整像素偏移拼到同一张画布（逐行摆放、间隔 1 像素），
+    所有边只做一次交点求解与累加，再按包围盒切回各自的位图。
+    """
+    results: List[GlyphBitmap] = [EMPTY_BITMAP] * len(items)
+    placed = []
+    x = y = shelf_height = canvas_width = 0
+    for i, (a, b, scale) in enumerate(items):
+        if len(a) == 0:
+            continue
+        pa = np.asarray(a, dtype=float) * scale
+        pb = np.asarray(b, dtype=float) * scale
+        left, top, width, height = _glyph_box(pa, pb)
+        if width <= 0 or height <= 0:
+            continue
+        if x + width > BATCH_CANVAS_WIDTH and x > 0:
+            y += shelf_height + 1
+            x = shelf_height = 0
+        placed.append((i, pa, pb, left, top, width, height, x, y))
+        x += width + 1
+        shelf_height = max(shelf_height, height)
+        canvas_width = max(canvas_width, x)
+    if not placed:
+        return results
+
+    # 每个轮廓平移到画布上自己的格子里（位图坐标）
+    x0, y0, x1, y1 = (np.concatenate(parts) for parts in zip(*(
+        (pa[:, 0] - left + ox, top - pa[:, 1] + oy, pb[:, 0] - left + ox, top - pb[:, 1] + oy)
+        for _, pa, pb, left, top, _, _, ox, oy in placed)))
+    coverage = _coverage(x0, y0, x1, y1, canvas_width, y + shelf_height, subsamples)
+    if coverage is None:
+        return results
+
+    canvas = _to_uint8(coverage)
+    for i, _, _, left, top, width, height, ox, oy in placed:
+        results[i] = GlyphBitmap(canvas[oy:oy + height, ox:ox + width].copy(), left, top)
+    return results
+
+
+# 距离场计算时每批 (像素数 × 边数) 的上限，约束临时数组的内存
+SDF_BATCH = 1 << 21
+
+
+def signed_distance_field(a: np.ndarray, b: np.ndarray, scale: float,
+                          spread: float = 4.0) -> GlyphBitmap:
+    """
+    单通道有符号距离场
+
+    a, b: (E, 2) 边的起点与终点（字体单位，y 轴向上）
+    spread: 距离场覆盖的像素范围；位图四周各外扩 spread 像素
+    返回: GlyphBitmap，值为 128 + 距离/spread×127（内部为正，128 即轮廓线）
+
+    像素中心到全部边的距离与非零环绕数按批一次性广播求出
+    """
+    if len(a) == 0:
+        return EMPTY_BITMAP
+
+    pa = np.asarray(a, dtype=float) * scale
+    pb = np.asarray(b, dtype=float) * scale
+    pad = math.ceil(spread)
+    xs_all = np.concatenate([pa[:, 0], pb[:, 0]])
+    ys_all = np.concatenate([pa[:, 1], pb[:, 1]])
+    left = math.floor(xs_all.min()) - pad
+    top = math.ceil(ys_all.max()) + pad
+    width = math.ceil(xs_all.max()) + pad - left
+    height = top - (math.floor(ys_all.min()) - pad)
+
+    # 像素中心（字形坐标，y 轴向上），逐行排列
+    px = np.tile(left + np.arange(width) + 0.5, height)
+    py = np.repeat(top - np.arange(height) - 0.5, width)
+
+    ab = pb - pa
+    length2 = np.maximum((ab * ab).sum(axis=1), 1e-12)
+    distance = np.empty(len(px))
+    winding = np.empty(len(px), dtype=np.intp)
+    batch = max(1, SDF_BATCH // len(pa))
+    for start in range(0, len(px), batch):
+        x = px[start:start + batch, None]
+        y = py[start:start + batch, None]
+        dx = x - pa[:, 0]
+        dy = y - pa[:, 1]
+        t = np.clip((dx * ab[:, 0] + dy * ab[:, 1]) / length2, 0.0, 1.0)
+        ex = dx - t * ab[:, 0]
+        ey = dy - t * ab[:, 1]
+        distance[start:start + batch] = np.sqrt((ex * ex + ey * ey).min(axis=1))
+
+        # 向右的射线与边相交时按方向计数
+        cross = ab[:, 0] * dy - dx * ab[:, 1]
+        up = (pa[:, 1] <= y) & (pb[:, 1] > y) & (cross > 0)
+        down = (pb[:, 1] <= y) & (pa[:, 1] > y) & (cross < 0)
+        winding[start:start + batch] = up.sum(axis=1) - down.sum(axis=1)
+
+    signed = np.where(winding != 0, distance, -distance)
+    values = np.clip(128 + signed / spread * 127, 0, 255) + 0.5
+    return GlyphBitmap(values.astype(np.uint8).reshape(height, width), left, top)
+
+
+def _png_chunk(tag: bytes, data: bytes) -> bytes:
+    return struct.pack('>I', len(data)) + tag + data + struct.pack('>I', zlib.crc32(tag + data))
+
+
+def encode_png(pixels: np.ndarray) -> bytes:
+    """
+    编码 8 位 PNG
+
+    pixels: (高, 宽) 灰度，或 (高, 宽, 4) RGBA 的 uint8 数组
+    """
+    pixels = np.ascontiguousarray(pixels, dtype=np.uint8)
+    height, width = pixels.shape[:2]
+    color_type = 6 if pixels.ndim == 3 else 0
+    rows = pixels.reshape(height, -1)
+    # 每行前加过滤类型 0（不过滤）
+    raw = np.hstack([np.zeros((height, 1), dtype=np.uint8), rows]).tobytes()
+    return (b'\x89PNG\r\n\x1a\n'
+            + _png_chunk(b'IHDR', struct.pack('>IIBBBBB', width, height, 8, color_type, 0, 0, 0))
+            + _png_chunk(b'IDAT', zlib.compress(raw, 6))
+            + _png_chunk(b'IEND', b''))
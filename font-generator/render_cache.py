@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+"""
+渲染结果两级缓存
+内存 LRU（按字节预算淘汰）+ 磁盘（按 TTL 过期，超出条目数或字节上限时淘汰最久未用的条目），
+键包含字体内容哈希，字体重新生成后旧条目自然失效
+"""
+
+import hashlib
+import json
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional
+
+# 渲染输出格式变化时递增，使旧的磁盘条目失效
+RENDER_CACHE_VERSION = 1
+
+
+def render_key(font_digest: str, text: str, size: float, **options: Any) -> str:
+    """
+    渲染缓存键
+
+    font_digest: 字体内容哈希；options: 影响输出的其余参数（None 值忽略）
+    """
+    payload = {
+        'v': RENDER_CACHE_VERSION,
+        'font': font_digest,
+        'text': text,
+        'size': size,
+        'options': {k: v for k, v in sorted(options.items()) if v is not None},
+    }
+    data = json.dumps(payload, sort_keys=True, separators=(',', ':'), ensure_ascii=False)
+    return hashlib.sha256(data.encode('utf-8')).hexdigest()
+
+
+class RenderCache:
+    """
+    两级渲染缓存
+
+    max_bytes: 内存层的字节预算，超出时淘汰最久未用的条目
+    cache_dir: 磁盘层目录（None 时只用内存）；条目修改时间超过 ttl 秒即视为过期
+    max_files / max_disk_bytes: 磁盘层的条目数与字节上限，写入后超出时淘汰最久未用的条目
+    （磁盘命中时刷新修改时间）
+    """
+
+    def __init__(self, max_bytes: int = 64 * 1024 * 1024,
+                 cache_dir: Optional[str] = None,
+                 ttl: float = 7 * 24 * 3600,
+                 suffix: str = '.png',
+                 max_files: int = 4096,
+                 max_disk_bytes: int = 256 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.cache_dir = cache_dir
+        self.ttl = ttl
+        self.suffix = suffix
+        self.max_files = max_files
+        self.max_disk_bytes = max_disk_bytes
+        self._entries: 'OrderedDict[str, bytes]' = OrderedDict()
+        self._bytes = 0
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    def _file_path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key[:2], key + self.suffix)
+
+    def get(self, key: str) -> Optional[bytes]:
+        data = self._entries.get(key)
+        if data is not None:
+            self._entries.move_to_end(key)
+            self.memory_hits += 1
+            return data
+
+        if self.cache_dir:
+            path = self._file_path(key)
+            try:
+                if time.time() - os.path.getmtime(path) <= self.ttl:
+                    with open(path, 'rb') as f:
+                        data = f.read()
+                    os.utime(path)
+                else:
+                    os.remove(path)
+            except OSError:
+                data = None
+            if data is not None:
+                self._remember(key, data)
+                self.disk_hits += 1
+                return data
+
+        self.misses += 1
+        return None
+
+    def put(self, key: str, data: bytes, prune: bool = True):
+        """写入两级缓存；prune 为假时不检查磁盘层上限（批量写入后由调用方统一 prune）"""
+        self._remember(key, data)
+        if self.cache_dir:
+            path = self._file_path(key)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            with open(tmp_path, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+            if prune:
+                self.prune()
+
+    def get_or_render(self, key: str, render: Callable[[], bytes]) -> bytes:
+        """命中时直接返回，否则渲染并写入两级缓存"""
+        data = self.get(key)
+        if data is None:
+            data = render()
+            self.put(key, data)
+        return data
+
+    def _remember(self, key: str, data: bytes):
+        if len(data) > self.max_bytes:
+            return
+        previous = self._entries.pop(key, None)
+        if previous is not None:
+            self._bytes -= len(previous)
+        self._entries[key] = data
+        self._bytes += len(data)
+        while self._bytes > self.max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self._bytes -= len(evicted)
+
+    def purge_expired(self) -> int:
+        """删除磁盘层所有过期条目，返回删除数量"""
+        if not self.cache_dir or not os.path.isdir(self.cache_dir):
+            return 0
+        removed = 0
+        deadline = time.time() - self.ttl
+        for root, _, files in os.walk(self.cache_dir):
+            for name in files:
+                path = os.path.join(root, name)
+                try:
+                    if os.path.getmtime(path) < deadline:
+                        os.remove(path)
+                        removed += 1
+                except OSError:
+                    pass
+        return removed
+
+    def prune(self) -> int:
+        """
+        删除磁盘层的过期条目，再按修改时间淘汰最久未用的条目，
+        直到条目数不超过 max_files 且总字节数不超过 max_disk_bytes
+
+        返回: 删除数量
+        """
+        if not self.cache_dir or not os.path.isdir(self.cache_dir):
+            return 0
+        deadline = time.time() - self.ttl
+        entries = []
+        for root, _, files in os.walk(self.cache_dir):
+            for name in files:
+                if name.endswith('.tmp'):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+        entries.sort()
+
+        count = len(entries)
+        total = sum(size for _, size, _ in entries)
+        removed = 0
+        for mtime, size, path in entries:
+            if mtime >= deadline and count <= self.max_files and total <= self.max_disk_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            count -= 1
+            total -= size
+            removed += 1
+        return removed
+
+    def stats(self) -> Dict[str, Any]:
+        """命中/未命中计数与内存占用"""
+        lookups = self.memory_hits + self.disk_hits + self.misses
+        return {
+            'memoryHits': self.memory_hits,
+            'diskHits': self.disk_hits,
+            'misses': self.misses,
+            'hitRate': round((self.memory_hits + self.disk_hits) / lookups, 4) if lookups else 0.0,
+            'memoryEntries': len(self._entries),
+            'memoryBytes': self._bytes,
+        }
@@ -3,45 +3,498 @@
 用于解析和验证设计规格JSON
 """
 
+import copy
+import hashlib
 import json
-from typing import Dict, Any
+import math
+import unicodedata
+from functools import lru_cache
+from typing import Any, Callable, Dict, List
+
+_MISSING = object()
+
+# 校验函数: (值, 字段路径, 错误列表) -> 规范化后的值
+Checker = Callable[[Any, str, List[str]], Any]
+
+
+class SpecValidationError(ValueError):
+    """规格校验失败，errors 中包含全部错误"""
+
+    def __init__(self, errors: List[str]):
+        self.errors = errors
+        super().__init__("设计规格校验失败:\n" + "\n".join(f"  - {e}" for e in errors))
+
+
+# ==================== Schema 定义 ====================
+# 与 shared/types.ts 中的 FontDesignSpec 对应
+# 每个节点: {'type': ..., 'required': bool, 'default': ..., 其他约束}
+
+def _field(type_: str, required: bool = False, default: Any = _MISSING, **options) -> Dict:
+    return dict(type=type_, required=required, default=default, **options)
+
+
+def _obj(fields: Dict[str, Dict], required: bool = False) -> Dict:
+    return _field('object', required, fields=fields)
+
+
+def _enum(values: List[str], default: Any = _MISSING, required: bool = False) -> Dict:
+    return _field('enum', required, default, values=values)
+
+
+FONT_SPEC_SCHEMA = _obj({
+    'metadata': _obj({
+        'specVersion': _field('string', default='1.0'),
+        'generatedAt': _field('string'),
+        'requestId': _field('string'),
+        'fontId': _field('string'),
+        'generator': _field('string'),
+    }, required=True),
+    'basicInfo': _obj({
+        'fontFamily': _field('string', required=True),
+        'fontName': _field('string', required=True),
+        'style': _enum(['serif', 'sans-serif', 'monospace'], 'sans-serif'),
+        'weight': _enum(['thin', 'light', 'normal', 'bold'], 'normal'),
+        'category': _enum(['display', 'text', 'decorative'], 'text'),
+        'language': _field('string', default='latin'),
+        'version': _field('string', default='1.0.0'),
+    }, required=True),
+    'designParameters': _obj({
+        'metrics': _obj({
+            'unitsPerEm': _field('integer', required=True, minimum=16, maximum=16384),
+            'xHeight': _field('integer', required=True, minimum=1),
+            'capHeight': _field('integer', required=True, minimum=1),
+            'ascender': _field('integer', required=True, minimum=1),
+            'descender': _field('integer', required=True, maximum=0),
+            'lineHeight': _field('integer', default=1200, minimum=1),
+            'baseline': _field('integer', default=0),
+        }, required=True),
+        'spacing': _obj({
+            'letterSpacing': _field('number', default=0),
+            'wordSpacing': _field('number', default=250),
+            'tracking': _field('number', default=0),
+            'kerning': _field('boolean', default=True),
+        }),
+        'proportions': _obj({
+            'contrast': _enum(['none', 'low', 'medium', 'high'], 'medium'),
+            'strokeWidth': _field('number', default=80, minimum=1),
+            'xHeightRatio': _field('number', default=0.55, minimum=0),
+            'capHeightRatio': _field('number', default=0.75, minimum=0),
+            'aspectRatio': _enum(['condensed', 'normal', 'extended'], 'normal'),
+        }),
+    }, required=True),
+    'styleDefinition': _obj({
+        'concept': _field('string', default=''),
+        'characteristics': _field('string_list', default=[]),
+        'visualStyle': _obj({
+            'terminals': _enum(['straight', 'curved', 'angled'], 'straight'),
+            'corners': _enum(['sharp', 'rounded', 'soft'], 'rounded'),
+            'aperture': _enum(['closed', 'open', 'semi-open'], 'semi-open'),
+            'axis': _enum(['vertical', 'angled', 'mixed'], 'vertical'),
+            'stress': _enum(['none', 'vertical', 'angled', 'reverse'], 'vertical'),
+        }),
+    }, required=True),
+    'characterSet': _obj({
+        'uppercase': _field('string_list', default=[]),
+        'lowercase': _field('string_list', default=[]),
+        'numbers': _field('string_list', default=[]),
+        'punctuation': _field('string_list', default=[]),
+        'specialChars': _field('string_list'),
+    }, required=True),
+    'designRules': _obj({
+        'consistency': _obj({
+            'strokeWeight': _enum(['uniform', 'varied', 'modulated'], 'uniform'),
+            'characterWidth': _enum(['monospace', 'proportional'], 'proportional'),
+            'baseline': _enum(['aligned', 'varied'], 'aligned'),
+            'opticalCorrection': _field('boolean', default=True),
+        }),
+        'legibility': _obj({
+            'minSize': _field('number', default=8, minimum=0),
+            'maxSize': _field('number', default=144, minimum=0),
+            'screenOptimized': _field('boolean', default=True),
+            'printOptimized': _field('boolean', default=True),
+        }),
+    }),
+    'technicalSpecs': _obj({
+        'format': _field('string_list', default=['TTF']),
+        'encoding': _field('string', default='Unicode'),
+        'hinting': _enum(['none', 'TrueType', 'PostScript'], 'none'),
+        'compression': _enum(['none', 'standard', 'optimized'], 'standard'),
+        'features': _obj({
+            'kerning': _field('boolean', default=True),
+            'ligatures': _field('boolean'),
+            'alternates': _field('boolean'),
+            'numerals': _enum(['lining', 'oldstyle', 'tabular'], 'lining'),
+        }),
+    }),
+    'qualityMetrics': _obj({
+        'readabilityScore': _field('number'),
+        'aestheticScore': _field('number'),
+        'technicalScore': _field('number'),
+        'overallScore': _field('number'),
+    }),
+})
+
+
+# ==================== Schema 编译 ====================
+
+def _check_range(node: Dict, value: float, path: str, errors: List[str]) -> None:
+    if node.get('minimum') is not None and value < node['minimum']:
+        errors.append(f"{path}: 不能小于 {node['minimum']}")
+    if node.get('maximum') is not None and value > node['maximum']:
+        errors.append(f"{path}: 不能大于 {node['maximum']}")
+
+
+def _compile_number(node: Dict) -> Checker:
+    integer = node['type'] == 'integer'
+
+    def check(value, path, errors):
+        if isinstance(value, bool):
+            errors.append(f"{path}: 必须为数值")
+            return value
+        if isinstance(value, str):
+            try:
+                value = float(value.strip())
+            except ValueError:
+                errors.append(f"{path}: 必须为数值，实际为 {value!r}")
+                return value
+        if not isinstance(value, (int, float)):
+            errors.append(f"{path}: 必须为数值，实际为 {type(value).__name__}")
+            return value
+        if not math.isfinite(value):
+            errors.append(f"{path}: 必须为有限数值")
+            return value
+        if integer:
+            if float(value) != int(value):
+                errors.append(f"{path}: 必须为整数，实际为 {value}")
+                return value
+            value = int(value)
+        elif isinstance(value, float) and value.is_integer():
+            value = int(value)
+        _check_range(node, value, path, errors)
+        return value
+
+    return check
+
+
+def _compile_enum(node: Dict) -> Checker:
+    lookup = {v.lower(): v for v in node['values']}
+    allowed = ' | '.join(node['values'])
+
+    def check(value, path, errors):
+        if isinstance(value, str) and value.strip().lower() in lookup:
+            return lookup[value.strip().lower()]
+        errors.append(f"{path}: 取值必须为 {allowed}，实际为 {value!r}")
+        return value
+
+    return check
+
+
+def _check_string(value, path, errors):
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return str(value)
+    if not isinstance(value, str):
+        errors.append(f"{path}: 必须为字符串")
+    return value
+
+
+def _check_boolean(value, path, errors):
+    if isinstance(value, bool):
+        return value
+    if isinstance(value, str) and value.strip().lower() in ('true', 'false'):
+        return value.strip().lower() == 'true'
+    if isinstance(value, (int, float)) and value in (0, 1):
+        return bool(value)
+    errors.append(f"{path}: 必须为布尔值，实际为 {value!r}")
+    return value
+
+
+def _check_string_list(value, path, errors):
+    if isinstance(value, str):
+        # "ABC" 视为逐字符列表
+        return list(value)
+    if not isinstance(value, list):
+        errors.append(f"{path}: 必须为字符串数组")
+        return value
+    for i, item in enumerate(value):
+        if not isinstance(item, str):
+            errors.append(f"{path}[{i}]: 必须为字符串")
+    return value
+
+
+def _compile_object(node: Dict) -> Checker:
+    fields = [(name, child, _compile(child)) for name, child in node['fields'].items()]
+
+    def check(value, path, errors):
+        if not isinstance(value, dict):
+            errors.append(f"{path or '规格'}: 必须为对象")
+            return value
+        result = dict(value)
+        for name, child, checker in fields:
+            child_path = f"{path}.{name}" if path else name
+            if name not in value or value[name] is None:
+                if child['type'] == 'object' and not child['required']:
+                    # 可选对象：以空对象展开以填充其中的默认值
+                    result[name] = checker({}, child_path, errors)
+                elif child['default'] is not _MISSING:
+                    result[name] = copy.deepcopy(child['default'])
+                elif child['required']:
+                    errors.append(f"缺少必需字段: {child_path}")
+                continue
+            result[name] = checker(value[name], child_path, errors)
+        return result
+
+    return check
+
+
+def _compile(node: Dict) -> Checker:
+    type_ = node['type']
+    if type_ == 'object':
+        return _compile_object(node)
+    if type_ in ('number', 'integer'):
+        return _compile_number(node)
+    if type_ == 'enum':
+        return _compile_enum(node)
+    if type_ == 'boolean':
+        return _check_boolean
+    if type_ == 'string_list':
+        return _check_string_list
+    return _check_string
+
+
+@lru_cache(maxsize=None)
+def _compiled_validator() -> Checker:
+    """Schema 只在每个进程中编译一次"""
+    return _compile(FONT_SPEC_SCHEMA)
+
+
+def _check_metrics(spec: Dict[str, Any], errors: List[str]) -> None:
+    """跨字段的度量约束"""
+    try:
+        metrics = spec['designParameters']['metrics']
+        ascender = metrics['ascender']
+        cap_height = metrics['capHeight']
+        x_height = metrics['xHeight']
+    except (KeyError, TypeError):
+        # 缺失字段已由Schema报告
+        return
+    if not all(isinstance(v, int) for v in (ascender, cap_height, x_height)):
+        return
+    if not ascender > cap_height > x_height:
+        errors.append("designParameters.metrics: 度量参数顺序错误，"
+                      f"需满足 ascender > capHeight > xHeight "
+                      f"(实际 {ascender}, {cap_height}, {x_height})")
+
+
+# ==================== 对外接口 ====================
+
+def normalize_spec(spec: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    按Schema校验规格，填充默认值并转换数值类型
+
+    返回规范化后的新规格（不修改传入对象）；
+    有任何错误时一次性抛出包含全部错误的 SpecValidationError
+    """
+    errors: List[str] = []
+    normalized = _compiled_validator()(spec, '', errors)
+    _check_metrics(normalized, errors)
+    if errors:
+        raise SpecValidationError(errors)
+    return normalized
+
 
 def validate_spec(spec: Dict[str, Any]) -> bool:
     """验证规格是否符合要求"""
-    required_fields = [
-        'metadata',
-        'basicInfo',
-        'designParameters',
-        'styleDefinition',
-        'characterSet',
-    ]
-    
-    for field in required_fields:
-        if field not in spec:
-            raise ValueError(f"缺少必需字段: {field}")
-    
-    # 验证度量参数
-    metrics = spec['designParameters']['metrics']
-    if metrics['unitsPerEm'] <= 0:
-        raise ValueError("unitsPerEm必须大于0")
-    
-    if metrics['ascender'] <= metrics['capHeight'] <= metrics['xHeight']:
-        raise ValueError("度量参数顺序错误: ascender > capHeight > xHeight")
-    
+    normalize_spec(spec)
     return True
 
+
 def parse_spec(spec_path: str) -> Dict[str, Any]:
-    """解析规格文件"""
+    """解析规格文件，返回校验并规范化后的规格"""
     with open(spec_path, 'r', encoding='utf-8') as f:
         spec = json.load(f)
-    
-    validate_spec(spec)
-    return spec
+
+    return normalize_spec(spec)
+
+
+# ==================== 字符集 ====================
+
+# 常用标点符号
+PUNCTUATION = '.,;:!?\'"()-[]{}/@#$%&*+=<>'
+
+# characterSet 中的字符类别（按此顺序排列字形）及各类别的默认字符
+CATEGORY_DEFAULTS = {
+    'uppercase': ''.join(chr(i) for i in range(65, 91)),
+    'lowercase': ''.join(chr(i) for i in range(97, 123)),
+    'numbers': ''.join(chr(i) for i in range(48, 58)),
+    'punctuation': PUNCTUATION,
+    'specialChars': '',
+}
+CHARACTER_SET_KEYS = tuple(CATEGORY_DEFAULTS)
+
+# 规格未指定字符时的默认字符集：A-Z、a-z、0-9、常用标点
+DEFAULT_CHARACTERS = ''.join(CATEGORY_DEFAULTS.values())
+
+
+def _is_symbol(char: str) -> bool:
+    # Unicode 标点（P*）与符号（S*）
+    return unicodedata.category(char)[0] in 'PS'
+
+
+# 各类别接受的字符；说明文字（如 "A-Z所有字母" 中的 "所有字母"）不属于任何类别
+_CATEGORY_CHECKS: Dict[str, Callable[[str], bool]] = {
+    'uppercase': lambda char: char.isascii() and char.isupper(),
+    'lowercase': lambda char: char.isascii() and char.islower(),
+    'numbers': lambda char: char.isascii() and char.isdigit(),
+    'punctuation': _is_symbol,
+    'specialChars': _is_symbol,
+}
+
+
+def _expand_entry(entry: str, accepts: Callable[[str], bool]) -> List[str]:
+    """展开一个条目：X-Y 范围（两端均属于该类别）逐个展开，其余字符只保留属于该类别的"""
+    chars = []
+    i = 0
+    while i < len(entry):
+        if (i + 2 < len(entry) and entry[i + 1] == '-' and accepts(entry[i])
+                and accepts(entry[i + 2]) and entry[i] < entry[i + 2]):
+            chars.extend(char for char in map(chr, range(ord(entry[i]), ord(entry[i + 2]) + 1))
+                         if accepts(char))
+            i += 3
+        else:
+            if accepts(entry[i]):
+                chars.append(entry[i])
+            i += 1
+    return chars
+
+
+def expand_character_set(character_set: Dict[str, Any]) -> Dict[str, str]:
+    """
+    按类别展开 characterSet
+
+    条目可以是单个字符、字符串或 "A-Z" 形式的范围；不属于该类别的字符（说明文字等）被丢弃，
+    某类别给出了条目却没有任何有效字符时使用该类别的默认字符。
+    类别内按码位排序并去重，同一字符只归入最先列出它的类别
+
+    返回: {类别: 字符串}，按 CHARACTER_SET_KEYS 顺序
+    """
+    expanded = {}
+    seen = set()
+    for key in CHARACTER_SET_KEYS:
+        entries = character_set.get(key) or []
+        accepts = _CATEGORY_CHECKS[key]
+        group = {char for entry in entries for char in _expand_entry(entry, accepts)}
+        if entries and not group:
+            group = set(CATEGORY_DEFAULTS[key])
+        expanded[key] = ''.join(sorted(group - seen))
+        seen |= group
+    return expanded
+
+
+# ==================== 规范形式与指纹 ====================
+
+# 指纹算法版本；生成逻辑发生不兼容变化时递增，使旧指纹全部失效
+FINGERPRINT_VERSION = 4
+
+# 影响生成结果的字段（其余字段如 metadata、qualityMetrics 不参与指纹）
+FINGERPRINT_FIELDS = (
+    'basicInfo.fontFamily',
+    'basicInfo.fontName',
+    'designParameters.metrics.unitsPerEm',
+    'designParameters.metrics.xHeight',
+    'designParameters.metrics.capHeight',
+    'designParameters.metrics.ascender',
+    'designParameters.metrics.descender',
+    'designParameters.proportions.strokeWidth',
+    'designParameters.proportions.contrast',
+    'styleDefinition.visualStyle.terminals',
+    'styleDefinition.visualStyle.corners',
+    'styleDefinition.visualStyle.aperture',
+    'styleDefinition.visualStyle.axis',
+    'styleDefinition.visualStyle.stress',
+    'characterSet.uppercase',
+    'characterSet.lowercase',
+    'characterSet.numbers',
+    'characterSet.punctuation',
+    'characterSet.specialChars',
+)
+
+# 规范形式中去除的易变字段
+VOLATILE_FIELDS = (
+    'metadata.generatedAt',
+    'metadata.requestId',
+    'metadata.fontId',
+    'qualityMetrics',
+)
+
+
+def _canonical_value(value: Any) -> Any:
+    """浮点数统一精度，整数值的浮点数转为整数"""
+    if isinstance(value, float):
+        value = round(value, 6)
+        return int(value) if value.is_integer() else value
+    if isinstance(value, dict):
+        return {k: _canonical_value(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_canonical_value(v) for v in value]
+    return value
+
+
+def _get_path(spec: Dict[str, Any], path: str) -> Any:
+    value: Any = spec
+    for key in path.split('.'):
+        if not isinstance(value, dict) or key not in value:
+            return None
+        value = value[key]
+    return value
+
+
+def canonicalize_spec(spec: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    生成规格的规范形式
+
+    先经过 normalize_spec 校验与填充默认值，再统一数值格式、去除易变字段，
+    字符集展开为各类别实际生成的字符（见 expand_character_set）。对同一设计的不同请求，规范形式完全相同。
+    """
+    canonical = _canonical_value(normalize_spec(spec))
+    for path in VOLATILE_FIELDS:
+        *parents, last = path.split('.')
+        container = _get_path(canonical, '.'.join(parents)) if parents else canonical
+        if isinstance(container, dict):
+            container.pop(last, None)
+    # 字符集按实际生成的字符比较：["ABC"] 与 ["A", "B", "C"]、"A-Z所有字母" 与 26 个字母相同
+    canonical['characterSet'] = {key: list(chars) for key, chars
+                                 in expand_character_set(canonical['characterSet']).items()}
+    return canonical
+
+
+def canonical_json(value: Any) -> str:
+    """键排序、无多余空白的稳定JSON序列化"""
+    return json.dumps(value, sort_keys=True, separators=(',', ':'), ensure_ascii=False)
 
 
+def fingerprint_inputs(spec: Dict[str, Any]) -> Dict[str, Any]:
+    """参与指纹计算的字段及其规范值 {字段路径: 值}"""
+    canonical = canonicalize_spec(spec)
+    return {path: _get_path(canonical, path) for path in FINGERPRINT_FIELDS}
 
 
+def spec_fingerprint(spec: Dict[str, Any]) -> str:
+    """
+    规格指纹：只覆盖影响生成结果的字段（见 FINGERPRINT_FIELDS）
 
+    输出相同的请求得到相同指纹，可用于批内及跨部署的请求去重
+    """
+    payload = canonical_json({'v': FINGERPRINT_VERSION, 'fields': fingerprint_inputs(spec)})
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
 
 
+def group_by_fingerprint(specs: List[Dict[str, Any]]) -> Dict[str, List[int]]:
+    """
+    按指纹对一批规格分组
 
+    返回: {指纹: [规格下标, ...]}，每组只需生成一次
+    """
+    groups: Dict[str, List[int]] = {}
+    for i, spec in enumerate(specs):
+        groups.setdefault(spec_fingerprint(spec), []).append(i)
+    return groups
@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+"""
+文本子集化服务
+按预览文本从已生成的字体中裁出最小子集（TTF 或 WOFF2），
+子集按 (字体内容哈希, 码位集合, 格式) 做 LRU 缓存
+"""
+
+import argparse
+import hashlib
+import os
+import sys
+from collections import OrderedDict
+from io import BytesIO
+from typing import Dict, Optional, Tuple
+
+from font_store import DEFAULT_FONTS_DIR, font_path_for, font_store
+
+try:
+    import brotli  # noqa: F401  WOFF2 压缩依赖
+    WOFF2_AVAILABLE = True
+except ImportError:
+    WOFF2_AVAILABLE = False
+
+FORMATS = ('ttf', 'woff2')
+
+SubsetKey = Tuple[str, Tuple[int, ...], str]
+
+# 字体哈希缓存 {路径: (修改时间, 大小, 哈希)}
+_font_hashes: Dict[str, Tuple[int, int, str]] = {}
+
+
+def font_hash(font_path: str) -> str:
+    """
+    字体文件内容的 SHA-256
+
+    按路径、修改时间与大小缓存，文件未变化时不重复读取
+    """
+    stat = os.stat(font_path)
+    cached = _font_hashes.get(font_path)
+    if cached and cached[:2] == (stat.st_mtime_ns, stat.st_size):
+        return cached[2]
+    with open(font_path, 'rb') as f:
+        digest = hashlib.sha256(f.read()).hexdigest()
+    _font_hashes[font_path] = (stat.st_mtime_ns, stat.st_size, digest)
+    return digest
+
+
+def text_codepoints(text: str) -> Tuple[int, ...]:
+    """文本中的码位（排序去重）"""
+    return tuple(sorted({ord(char) for char in text}))
+
+
+class SubsetCache:
+    """
+    子集字体的 LRU 缓存
+
+    内存中保留最近使用的 max_entries 个子集；给定 cache_dir 时同时写入磁盘，
+    磁盘文件命中时刷新修改时间，超过 max_files 个时淘汰最久未用的文件。
+    """
+
+    def __init__(self, max_entries: int = 256,
+                 cache_dir: Optional[str] = None,
+                 max_files: int = 2048):
+        self.max_entries = max_entries
+        self.cache_dir = cache_dir
+        self.max_files = max_files
+        self._entries: 'OrderedDict[SubsetKey, bytes]' = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def _file_path(self, key: SubsetKey) -> str:
+        digest, codepoints, fmt = key
+        cp_digest = hashlib.sha1(','.join(map(str, codepoints)).encode('ascii')).hexdigest()
+        return os.path.join(self.cache_dir, f"{digest[:16]}-{cp_digest[:16]}.{fmt}")
+
+    def get(self, key: SubsetKey) -> Optional[bytes]:
+        data = self._entries.get(key)
+        if data is not None:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return data
+        if self.cache_dir:
+            path = self._file_path(key)
+            try:
+                with open(path, 'rb') as f:
+                    data = f.read()
+                os.utime(path)
+            except OSError:
+                data = None
+            if data is not None:
+                self._remember(key, data)
+                self.hits += 1
+                return data
+        self.misses += 1
+        return None
+
+    def put(self, key: SubsetKey, data: bytes):
+        self._remember(key, data)
+        if self.cache_dir:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            path = self._file_path(key)
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            with open(tmp_path, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+            self._evict_files()
+
+    def _remember(self, key: SubsetKey, data: bytes):
+        self._entries[key] = data
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def _evict_files(self):
+        entries = [e for e in os.scandir(self.cache_dir)
+                   if e.is_file() and not e.name.endswith('.tmp')]
+        if len(entries) <= self.max_files:
+            return
+        entries.sort(key=lambda e: e.stat().st_mtime_ns)
+        for entry in entries[:len(entries) - self.max_files]:
+            try:
+                os.remove(entry.path)
+            except OSError:
+                pass
+
+
+# 进程内默认缓存（仅内存）
+_default_cache = SubsetCache()
+
+
+def _build_subset(font_path: str, codepoints: Tuple[int, ...], fmt: str) -> bytes:
+    from fontTools import subset
+
+    options = subset.Options()
+    options.flavor = 'woff2' if fmt == 'woff2' else None
+    options.name_IDs = ['*']
+    options.notdef_outline = True
+    # fontTools 默认丢弃嵌入位图；保留生成时写入的小字号位图字形
+    options.drop_tables = [tag for tag in options.drop_tables if tag not in ('EBDT', 'EBLC')]
+
+    # 子集化会修改字体：在共享映射上新建 TTFont，只读取子集化用到的表
+    font = font_store.load(font_path)
+    subsetter = subset.Subsetter(options)
+    subsetter.populate(unicodes=codepoints)
+    subsetter.subset(font)
+
+    buffer = BytesIO()
+    subset.save_font(font, buffer, options)
+    return buffer.getvalue()
+
+
+def subset_font(font_path: str, text: str, fmt: str = 'ttf',
+                cache: Optional[SubsetCache] = None) -> bytes:
+    """
+    裁出只包含文本所需字符的字体子集
+
+    fmt: 'ttf' 或 'woff2'（需要 brotli）
+    返回: 子集字体文件内容
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"不支持的格式: {fmt}，可选: {', '.join(FORMATS)}")
+    if fmt == 'woff2' and not WOFF2_AVAILABLE:
+        raise RuntimeError("WOFF2 输出需要安装 brotli（pip install brotli）")
+
+    if cache is None:
+        cache = _default_cache
+    codepoints = text_codepoints(text)
+    key = (font_hash(font_path), codepoints, fmt)
+    data = cache.get(key)
+    if data is None:
+        data = _build_subset(font_path, codepoints, fmt)
+        cache.put(key, data)
+    return data
+
+
+def main():
+    parser = argparse.ArgumentParser(description='按文本生成字体子集')
+    parser.add_argument('--font-id', required=True, help='字体ID')
+    parser.add_argument('--text', required=True, help='子集需要覆盖的文本')
+    parser.add_argument('--format', default='ttf', choices=FORMATS, help='输出格式')
+    parser.add_argument('--fonts-dir', default=DEFAULT_FONTS_DIR, help='已生成字体所在目录')
+    parser.add_argument('--output', required=True, help='子集字体输出路径')
+
+    args = parser.parse_args()
+
+    try:
+        font_path = font_path_for(args.font_id, args.fonts_dir)
+        cache = SubsetCache(cache_dir=os.path.join(args.fonts_dir, '.subsets'))
+        data = subset_font(font_path, args.text, args.format, cache)
+    except (ValueError, FileNotFoundError, RuntimeError) as e:
+        print(f"❌ {e}", file=sys.stderr)
+        sys.exit(1)
+
+    with open(args.output, 'wb') as f:
+        f.write(data)
+    source = '缓存' if cache.hits else '新生成'
+    print(f"✅ 子集字体（{source}，{len(data)} 字节）: {args.output}")
+
+
+if __name__ == '__main__':
+    main()
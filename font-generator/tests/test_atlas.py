@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+图集：货架打包不重叠、不越界，图集中的字形与单独光栅化一致
+运行: cd font-generator && python -m unittest discover tests
+"""
+
+import contextlib
+import io
+import os
+import random
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from atlas import build_atlas, pack_shelves
+from benchmark import make_spec
+from generator import build_font
+from preview_renderer import font_source
+from rasterizer import rasterize_edges
+
+
+class PackShelvesTest(unittest.TestCase):
+
+    def assertPacked(self, sizes, max_width, padding):
+        positions, width, height = pack_shelves(sizes, max_width, padding)
+        self.assertEqual(len(positions), len(sizes))
+        boxes = []
+        for (w, h), (x, y) in zip(sizes, positions):
+            if not (w and h):
+                continue
+            self.assertGreaterEqual(x, padding)
+            self.assertGreaterEqual(y, padding)
+            self.assertLessEqual(x + w + padding, width)
+            self.assertLessEqual(y + h + padding, height)
+            boxes.append((x, y, w, h))
+        # 含间距的矩形两两不相交
+        for i, (x0, y0, w0, h0) in enumerate(boxes):
+            for x1, y1, w1, h1 in boxes[i + 1:]:
+                apart = (x0 + w0 + padding <= x1 or x1 + w1 + padding <= x0 or
+                         y0 + h0 + padding <= y1 or y1 + h1 + padding <= y0)
+                self.assertTrue(apart, ((x0, y0, w0, h0), (x1, y1, w1, h1)))
+        if max(w for w, _ in sizes) + 2 * padding <= max_width:
+            self.assertLessEqual(width, max_width)
+        return positions, width, height
+
+    def test_random_sizes_never_overlap(self):
+        rng = random.Random(0)
+        for trial in range(50):
+            sizes = [(rng.randint(0, 40), rng.randint(0, 40))
+                     for _ in range(rng.randint(1, 120))]
+            for padding in (0, 1, 3):
+                with self.subTest(trial=trial, padding=padding):
+                    self.assertPacked(sizes, max_width=128, padding=padding)
+
+    def test_wider_than_max_width(self):
+        positions, width, _ = self.assertPacked([(10, 10), (300, 5), (10, 10)], 64, 1)
+        self.assertEqual(width, 302)
+
+    def test_empty(self):
+        self.assertEqual(pack_shelves([(0, 0), (5, 0)]), ([(0, 0), (0, 0)], 0, 0))
+
+
+class BuildAtlasTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls._tmp = tempfile.TemporaryDirectory()
+        spec = make_spec()
+        spec['characterSet']['uppercase'] = ['A-Z所有字母']
+        with contextlib.redirect_stdout(io.StringIO()):
+            font = build_font(spec)
+        cls.font_path = os.path.join(cls._tmp.name, 'atlas.ttf')
+        font.save(cls.font_path)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls._tmp.cleanup()
+
+    def test_glyphs_match_individual_rasterization(self):
+        sizes = (12, 30)
+        atlas, index = build_atlas(self.font_path, sizes, max_width=256)
+        self.assertEqual(atlas.shape, (index['height'], index['width']))
+        _, source = font_source(self.font_path)
+        for size in sizes:
+            scale = size / source.units_per_em
+            for glyph_name, rect in index['glyphs'][f"{size:g}"].items():
+                with self.subTest(size=size, glyph=glyph_name):
+                    a, b = source.edges(glyph_name)
+                    if not len(a):
+                        self.assertEqual((rect['w'], rect['h']), (0, 0))
+                        continue
+                    bitmap = rasterize_edges(a, b, scale)
+                    region = atlas[rect['y']:rect['y'] + rect['h'], rect['x']:rect['x'] + rect['w']]
+                    np.testing.assert_array_equal(region, bitmap.coverage)
+                    self.assertEqual((rect['left'], rect['top']), (bitmap.left, bitmap.top))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+Path 作为 Pen 记录生成字体中的字形（含无在线点的二次轮廓）
+运行: cd font-generator && python -m unittest discover tests
+"""
+
+import contextlib
+import io
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fontTools.pens.areaPen import AreaPen
+from fontTools.pens.boundsPen import BoundsPen
+
+from benchmark import make_spec
+from bezier_utils import Path
+from generator import build_font
+
+
+def area(draw):
+    pen = AreaPen()
+    draw(pen)
+    return pen.value
+
+
+def bounds(draw):
+    pen = BoundsPen(None)
+    draw(pen)
+    return pen.bounds
+
+
+class PathDrawTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        with contextlib.redirect_stdout(io.StringIO()):
+            cls.font = build_font(make_spec())
+        cls.glyph_set = cls.font.getGlyphSet()
+
+    def test_every_generated_glyph(self):
+        for glyph_name in self.font.getGlyphOrder():
+            with self.subTest(glyph=glyph_name):
+                glyph = self.glyph_set[glyph_name]
+                path = Path(glyph_set=self.glyph_set)
+                glyph.draw(path)
+                self.assertAlmostEqual(area(path.draw), area(glyph.draw), places=6)
+                self.assertEqual(bounds(path.draw), bounds(glyph.draw))
+
+    def test_contour_without_on_curve_points(self):
+        path = Path()
+        path.qCurveTo((0, 100), (100, 100), (100, 0), (0, 0), None)
+        path.closePath()
+        self.assertEqual(path[0], ('M', [(0.0, 50.0)]))
+        self.assertEqual(path.bounds(), (0.0, 0.0, 100.0, 100.0))
+        # 四个离线点构成的圆角方形，面积与 fontTools 的分解一致
+        expected = area(lambda pen: (pen.qCurveTo((0, 100), (100, 100), (100, 0), (0, 0), None),
+                                     pen.closePath()))
+        self.assertAlmostEqual(area(path.draw), expected)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+嵌入式位图字形：EBLC/EBDT 保存后重新加载仍与光栅化结果一致，子集化时保留
+运行: cd font-generator && python -m unittest discover tests
+"""
+
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+from fontTools.ttLib import TTFont
+
+from benchmark import make_spec
+from bitmap_strikes import BIT_DEPTHS, add_bitmap_strikes, pack_rows, parse_strike_sizes
+from generator import build_font
+from rasterizer import glyph_edges, rasterize_edges
+from subsetter import SubsetCache, subset_font
+
+SIZES = (10, 13)
+
+
+def unpack_rows(data, bit_depth, width, height):
+    """pack_rows 的逆：返回 (高, 宽) 量化级别"""
+    per_byte = 8 // bit_depth
+    packed = np.frombuffer(data, dtype=np.uint8).reshape(height, -1)
+    shifts = np.arange(per_byte - 1, -1, -1) * bit_depth
+    levels = (packed[:, :, None] >> shifts) & ((1 << bit_depth) - 1)
+    return levels.reshape(height, -1)[:, :width]
+
+
+def reload(font):
+    buffer = io.BytesIO()
+    font.save(buffer)
+    buffer.seek(0)
+    return TTFont(buffer)
+
+
+class BitmapStrikesTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        with contextlib.redirect_stdout(io.StringIO()):
+            cls.font = build_font(make_spec())
+        cls.glyf = cls.font['glyf']
+
+    def expected_bitmaps(self, ppem):
+        scale = ppem / self.font['head'].unitsPerEm
+        bitmaps = {}
+        for glyph_name in self.font.getGlyphOrder():
+            a, b = glyph_edges(self.glyf, glyph_name)
+            if len(a):
+                bitmap = rasterize_edges(a, b, scale)
+                if bitmap.coverage.size:
+                    bitmaps[glyph_name] = bitmap
+        return bitmaps
+
+    def test_round_trip(self):
+        hmtx = self.font['hmtx']
+        for bit_depth in BIT_DEPTHS:
+            with self.subTest(bit_depth=bit_depth):
+                self.assertEqual(add_bitmap_strikes(self.font, SIZES, bit_depth)[0], len(SIZES))
+                loaded = reload(self.font)
+                strikes = loaded['EBLC'].strikes
+                self.assertEqual([s.bitmapSizeTable.ppemX for s in strikes], list(SIZES))
+                for ppem, strike, data in zip(SIZES, strikes, loaded['EBDT'].strikeData):
+                    self.assertEqual(strike.bitmapSizeTable.bitDepth, bit_depth)
+                    expected = self.expected_bitmaps(ppem)
+                    names = [name for index in strike.indexSubTables for name in index.names]
+                    self.assertEqual(names, sorted(expected, key=loaded.getGlyphID))
+                    scale = ppem / self.font['head'].unitsPerEm
+                    for glyph_name, bitmap in expected.items():
+                        glyph = data[glyph_name]
+                        height, width = bitmap.coverage.shape
+                        metrics = glyph.metrics
+                        self.assertEqual((metrics.width, metrics.height), (width, height))
+                        self.assertEqual((metrics.BearingX, metrics.BearingY),
+                                         (bitmap.left, bitmap.top))
+                        self.assertEqual(metrics.Advance, round(hmtx[glyph_name][0] * scale))
+                        # 批量光栅化与单独光栅化可能相差一个舍入级
+                        levels = unpack_rows(glyph.imageData, bit_depth, width, height)
+                        reference = unpack_rows(pack_rows(bitmap.coverage, bit_depth),
+                                                bit_depth, width, height)
+                        np.testing.assert_allclose(levels, reference, atol=1)
+
+    def test_empty_sizes_remove_strikes(self):
+        add_bitmap_strikes(self.font, SIZES)
+        self.assertEqual(add_bitmap_strikes(self.font, ()), (0, 0))
+        loaded = reload(self.font)
+        self.assertNotIn('EBLC', loaded)
+        self.assertNotIn('EBDT', loaded)
+
+    def test_subset_keeps_strikes(self):
+        add_bitmap_strikes(self.font, SIZES)
+        with tempfile.TemporaryDirectory() as tmp:
+            font_path = os.path.join(tmp, 'strikes.ttf')
+            self.font.save(font_path)
+            subset = TTFont(io.BytesIO(subset_font(font_path, 'ab', cache=SubsetCache())))
+        names = {name for strike in subset['EBLC'].strikes
+                 for index in strike.indexSubTables for name in index.names}
+        self.assertEqual(names, {'.notdef', 'a', 'b'})
+
+
+class PackRowsTest(unittest.TestCase):
+
+    def test_quantize_and_pad_rows(self):
+        coverage = np.array([[0, 255, 128, 255, 0, 0, 0, 0, 255]], dtype=np.uint8)
+        self.assertEqual(pack_rows(coverage, 8), coverage.tobytes())
+        self.assertEqual(pack_rows(coverage, 1), bytes([0b01110000, 0b10000000]))
+        self.assertEqual(pack_rows(coverage, 2), bytes([0b00111011, 0b00000000, 0b11000000]))
+        self.assertEqual(pack_rows(coverage, 4), bytes([0x0F, 0x8F, 0x00, 0x00, 0xF0]))
+
+    def test_parse_strike_sizes(self):
+        self.assertEqual(parse_strike_sizes('12, 10,12'), [10, 12])
+        for value in ('0', '101', 'a'):
+            with self.subTest(value=value), self.assertRaises(ValueError):
+                parse_strike_sizes(value)
+
+
+if __name__ == '__main__':
+    unittest.main()
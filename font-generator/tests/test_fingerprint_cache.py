@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+规格指纹的字符集规范化与指纹缓存的淘汰
+运行: cd font-generator && python -m unittest discover tests
+"""
+
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmark import make_spec
+from generator import evict_fingerprint_cache
+from spec_parser import spec_fingerprint
+
+
+def with_character_set(**character_set):
+    spec = make_spec()
+    spec['characterSet'] = character_set
+    return spec
+
+
+class FingerprintCharacterSetTest(unittest.TestCase):
+
+    def test_entry_splitting_does_not_change_fingerprint(self):
+        self.assertEqual(spec_fingerprint(with_character_set(uppercase=['ABC'])),
+                         spec_fingerprint(with_character_set(uppercase=['A', 'B', 'C'])))
+
+    def test_range_matches_listed_characters(self):
+        letters = [chr(code) for code in range(ord('A'), ord('Z') + 1)]
+        self.assertEqual(spec_fingerprint(with_character_set(uppercase=['A-Z所有字母'])),
+                         spec_fingerprint(with_character_set(uppercase=letters)))
+
+    def test_different_characters_change_fingerprint(self):
+        self.assertNotEqual(spec_fingerprint(with_character_set(uppercase=['AB'])),
+                            spec_fingerprint(with_character_set(uppercase=['ABC'])))
+
+
+class EvictFingerprintCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.cache_dir = self._tmp.name
+        # a 最久未用，d 最近使用
+        for age, name in enumerate('dcba'):
+            path = os.path.join(self.cache_dir, f"{name}.ttf")
+            with open(path, 'wb') as f:
+                f.write(b'\0' * 100)
+            os.utime(path, ns=(0, (1000 - age) * 10 ** 9))
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def remaining(self):
+        return sorted(os.listdir(self.cache_dir))
+
+    def test_evicts_least_recently_used_over_count(self):
+        self.assertEqual(evict_fingerprint_cache(self.cache_dir, max_files=2), 2)
+        self.assertEqual(self.remaining(), ['c.ttf', 'd.ttf'])
+
+    def test_evicts_over_size(self):
+        evict_fingerprint_cache(self.cache_dir, max_bytes=250)
+        self.assertEqual(self.remaining(), ['c.ttf', 'd.ttf'])
+
+    def test_within_limits_keeps_everything(self):
+        self.assertEqual(evict_fingerprint_cache(self.cache_dir), 0)
+        self.assertEqual(len(self.remaining()), 4)
+
+
+if __name__ == '__main__':
+    unittest.main()
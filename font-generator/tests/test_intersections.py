@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+构建期轮廓相交检测：自相交、轮廓间相交与同一轮廓模式
+运行: cd font-generator && python -m unittest discover tests
+"""
+
+import contextlib
+import io
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fontTools.pens.ttGlyphPen import TTGlyphPen
+
+from benchmark import make_spec
+from bezier_utils import find_intersections
+from generator import build_font
+
+
+def polygon_glyph(*contours):
+    pen = TTGlyphPen(None)
+    for points in contours:
+        pen.moveTo(points[0])
+        for point in points[1:]:
+            pen.lineTo(point)
+        pen.closePath()
+    return pen.glyph()
+
+
+BOWTIE = [(0, 0), (100, 100), (100, 0), (0, 100)]
+SQUARE = [(0, 0), (100, 0), (100, 100), (0, 100)]
+SHIFTED_SQUARE = [(50, 50), (150, 50), (150, 150), (50, 150)]
+
+
+class FindIntersectionsTest(unittest.TestCase):
+
+    def test_self_intersection(self):
+        glyphs = {'bowtie': polygon_glyph(BOWTIE), 'square': polygon_glyph(SQUARE)}
+        for self_only in (False, True):
+            with self.subTest(self_only=self_only):
+                hits = find_intersections(glyphs, self_only=self_only)
+                self.assertEqual(list(hits), ['bowtie'])
+                self.assertEqual(hits['bowtie'], [(0, 0, (50.0, 50.0))])
+
+    def test_crossing_contours_only_reported_without_self_only(self):
+        glyphs = {'rings': polygon_glyph(SQUARE, SHIFTED_SQUARE)}
+        hits = find_intersections(glyphs)
+        self.assertEqual(sorted(point for _, _, point in hits['rings']),
+                         [(50.0, 100.0), (100.0, 50.0)])
+        self.assertTrue(all((a, b) == (0, 1) for a, b, _ in hits['rings']))
+        self.assertEqual(find_intersections(glyphs, self_only=True), {})
+
+    def test_default_build_does_not_warn(self):
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            build_font(make_spec())
+        self.assertNotIn('自相交', output.getvalue())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+排版：整批单行排版（含空行）、段落断行、缺字与字偶距（GPOS 单对/分类与 kern 表）
+运行: cd font-generator && python -m unittest discover tests
+"""
+
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+from fontTools.feaLib.builder import addOpenTypeFeaturesFromString
+from fontTools.ttLib import newTable
+from fontTools.ttLib.tables._k_e_r_n import KernTable_format_0
+
+from benchmark import make_spec
+from generator import build_font
+from layout import FontLayout
+
+SIZE = 100
+KERN_AV = -80
+KERN_CLASS = -40
+KERN_TABLE_AW = -120
+
+
+class LayoutTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls._tmp = tempfile.TemporaryDirectory()
+        with contextlib.redirect_stdout(io.StringIO()):
+            font = build_font(make_spec())
+        addOpenTypeFeaturesFromString(font, f"""
+            feature kern {{
+                pos A V {KERN_AV};
+                pos A W {KERN_AV};
+                pos [T L] [o a] {KERN_CLASS};
+            }} kern;""")
+        # 同一字形对 kern 表优先于 GPOS
+        kern = newTable('kern')
+        kern.version = 0
+        subtable = KernTable_format_0()
+        subtable.version, subtable.coverage, subtable.format = 0, 1, 0
+        subtable.kernTable = {('A', 'W'): KERN_TABLE_AW}
+        kern.kernTables = [subtable]
+        font['kern'] = kern
+        cls.font_path = os.path.join(cls._tmp.name, 'layout.ttf')
+        font.save(cls.font_path)
+        cls.layout = FontLayout(cls.font_path)
+        cls.scale = SIZE / font['head'].unitsPerEm
+        cls.advance = {name: width for name, (width, _) in font['hmtx'].metrics.items()}
+
+    @classmethod
+    def tearDownClass(cls):
+        cls._tmp.cleanup()
+
+    def assertRunsEqual(self, run, expected):
+        self.assertEqual(run.text, expected.text)
+        np.testing.assert_array_equal(run.glyph_ids, expected.glyph_ids)
+        np.testing.assert_allclose(run.x, expected.x)
+        self.assertAlmostEqual(run.width, expected.width)
+
+    def test_layout_lines_with_blank_lines(self):
+        texts = ['ab', '', 'cd', '']
+        runs = self.layout.layout_lines(texts, SIZE)
+        self.assertEqual(len(runs), len(texts))
+        for run, text in zip(runs, texts):
+            with self.subTest(text=text):
+                self.assertEqual(len(run.x), len(run.glyph_ids))
+                self.assertRunsEqual(run, self.layout.layout_line(text, SIZE))
+
+    def test_layout_lines_does_not_kern_across_texts(self):
+        first, second = self.layout.layout_lines(['A', 'V'], SIZE)
+        self.assertAlmostEqual(first.width, self.advance['A'] * self.scale)
+        self.assertAlmostEqual(second.width, self.advance['V'] * self.scale)
+
+    def test_kerning(self):
+        run = self.layout.layout_line('AV', SIZE)
+        self.assertAlmostEqual(run.x[1], (self.advance['A'] + KERN_AV) * self.scale)
+        self.assertAlmostEqual(run.width,
+                               (self.advance['A'] + KERN_AV + self.advance['V']) * self.scale)
+        unkerned = self.layout.layout_line('VA', SIZE)
+        self.assertAlmostEqual(unkerned.x[1], self.advance['V'] * self.scale)
+
+    def test_class_kerning_and_kern_table(self):
+        for pair in ('To', 'La', 'Ta'):
+            with self.subTest(pair=pair):
+                run = self.layout.layout_line(pair, SIZE)
+                self.assertAlmostEqual(run.x[1], (self.advance[pair[0]] + KERN_CLASS) * self.scale)
+        run = self.layout.layout_line('AW', SIZE)
+        self.assertAlmostEqual(run.x[1], (self.advance['A'] + KERN_TABLE_AW) * self.scale)
+
+    def test_missing_characters_use_notdef(self):
+        run = self.layout.layout_line('a\u4e2db', SIZE)
+        names = [self.layout.glyph_order[gid] for gid in run.glyph_ids]
+        self.assertEqual(names, ['a', '.notdef', 'b'])
+        self.assertAlmostEqual(run.x[2], (self.advance['a'] + self.advance['.notdef']) * self.scale)
+
+    def test_paragraph_blank_line_and_breaking(self):
+        runs = self.layout.layout_paragraph('ab\n\ncd', SIZE)
+        self.assertEqual([run.text for run in runs], ['ab', '', 'cd'])
+        self.assertEqual(len(runs[1].x), 0)
+        line_height = self.layout.line_height(SIZE)
+        self.assertAlmostEqual(runs[2].y - runs[0].y, 2 * line_height)
+
+        word = self.layout.layout_line('ab', SIZE).width
+        wrapped = self.layout.layout_paragraph('ab ab ab', SIZE, max_width=word * 1.5)
+        self.assertEqual([run.text for run in wrapped], ['ab ', 'ab ', 'ab'])
+        for run in wrapped:
+            self.assertAlmostEqual(run.width, word)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+轮廓简化：删除各类冗余点，简化后的轮廓与原轮廓的偏差不超过容差
+运行: cd font-generator && python -m unittest discover tests
+"""
+
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+from fontTools.pens.ttGlyphPen import TTGlyphPen
+
+from benchmark import make_spec
+from bezier_utils import flatten_quadratic_contours
+from design_params import DesignParams
+from generator import design_glyph, glyph_plan, requested_characters
+from glyph_designer import GlyphDesigner
+from outline_simplifier import DEFAULT_TOLERANCE, simplify_glyphs
+from quadratic_converter import glyphs_to_quadratic
+from rasterizer import rasterize_edges
+from spec_parser import normalize_spec
+
+
+def glyph_edges(glyph, steps=16):
+    coords = np.frombuffer(glyph.coordinates.array, dtype=float).reshape(-1, 2)
+    flags = np.frombuffer(bytes(glyph.flags), dtype=np.uint8)
+    return flatten_quadratic_contours(coords, flags, list(glyph.endPtsOfContours), steps)
+
+
+def max_distance(points, a, b):
+    """各点到折线 a-b 的最近距离中的最大值"""
+    ab = b - a
+    length2 = np.maximum((ab * ab).sum(axis=1), 1e-12)
+    offset = points[:, None, :] - a
+    t = np.clip((offset * ab).sum(axis=2) / length2, 0.0, 1.0)
+    error = offset - ab * t[..., None]
+    return np.hypot(error[..., 0], error[..., 1]).min(axis=1).max()
+
+
+def outline(draw):
+    pen = TTGlyphPen(None)
+    draw(pen)
+    return pen.glyph()
+
+
+class SimplifyGlyphsTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        spec = normalize_spec(make_spec())
+        designer = GlyphDesigner(DesignParams.from_spec(spec))
+        glyphs = {glyph_name: design_glyph(designer, char, width, height)[0]
+                  for glyph_name, char, width, height
+                  in glyph_plan(spec['designParameters']['metrics'], requested_characters(spec))}
+        cls.glyphs = glyphs_to_quadratic(glyphs, max_err=1.0)
+
+    def test_outline_within_tolerance(self):
+        for tolerance in (DEFAULT_TOLERANCE, 1.0, 4.0):
+            simplified = simplify_glyphs(self.glyphs, tolerance)
+            removed = 0
+            for glyph_name, glyph in self.glyphs.items():
+                if glyph.numberOfContours <= 0:
+                    continue
+                with self.subTest(tolerance=tolerance, glyph=glyph_name):
+                    result = simplified[glyph_name]
+                    self.assertEqual(result.numberOfContours, glyph.numberOfContours)
+                    removed += len(glyph.coordinates) - len(result.coordinates)
+                    a0, b0, contour0 = glyph_edges(glyph)
+                    a1, b1, contour1 = glyph_edges(result)
+                    for contour in range(glyph.numberOfContours):
+                        before, after = contour0 == contour, contour1 == contour
+                        self.assertLessEqual(
+                            max_distance(a1[after], a0[before], b0[before]), tolerance)
+                        self.assertLessEqual(
+                            max_distance(a0[before], a1[after], b1[after]), tolerance)
+            self.assertGreater(removed, 0)
+
+    def test_default_tolerance_renders_identically(self):
+        simplified = simplify_glyphs(self.glyphs)
+        for glyph_name, glyph in self.glyphs.items():
+            if glyph.numberOfContours <= 0:
+                continue
+            with self.subTest(glyph=glyph_name):
+                before = rasterize_edges(*glyph_edges(glyph)[:2], 0.05)
+                after = rasterize_edges(*glyph_edges(simplified[glyph_name])[:2], 0.05)
+                self.assertEqual((before.left, before.top), (after.left, after.top))
+                np.testing.assert_allclose(after.coverage, before.coverage, atol=1)
+
+    def test_redundant_points(self):
+        def draw(pen):
+            pen.moveTo((0, 0))
+            pen.lineTo((0, 0))          # 零长度线段
+            pen.lineTo((0, 50))         # 共线中间点
+            pen.lineTo((0, 100))
+            pen.qCurveTo((50, 100), (100, 100))   # 贴在弦线上的离线点
+            pen.qCurveTo((150, 100), (150, 50))   # 真正的曲线，保留
+            pen.qCurveTo((150, 25), (150, 0))     # 贴在弦线上的离线点
+            pen.closePath()
+        result = simplify_glyphs({'g': outline(draw)})['g']
+        self.assertEqual([tuple(point) for point in result.coordinates],
+                         [(0, 0), (0, 100), (100, 100), (150, 100), (150, 50), (150, 0)])
+        self.assertEqual(list(result.flags), [1, 1, 1, 0, 1, 1])
+        self.assertEqual(result.endPtsOfContours, [5])
+
+    def test_implied_on_curve_point(self):
+        glyph = outline(lambda pen: (pen.moveTo((0, 0)),
+                                     pen.qCurveTo((0, 100), (50, 100)),
+                                     pen.qCurveTo((100, 100), (100, 0)),
+                                     pen.closePath()))
+        result = simplify_glyphs({'g': glyph})['g']
+        points = [tuple(point) for point in result.coordinates]
+        self.assertNotIn((50, 100), points)
+        self.assertEqual(len(points), len(glyph.coordinates) - 1)
+
+    def test_small_and_empty_glyphs_unchanged(self):
+        degenerate = outline(lambda pen: (pen.moveTo((0, 0)), pen.lineTo((0, 0)),
+                                        pen.lineTo((100, 0)), pen.closePath()))
+        empty = TTGlyphPen(None).glyph()
+        result = simplify_glyphs({'degenerate': degenerate, 'space': empty})
+        self.assertIs(result['degenerate'], degenerate)
+        self.assertIs(result['space'], empty)
+
+
+if __name__ == '__main__':
+    unittest.main()
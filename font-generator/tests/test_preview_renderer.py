@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+预览渲染：字形位图经磁盘层跨进程复用
+运行: cd font-generator && python -m unittest discover tests
+"""
+
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+import preview_renderer
+from benchmark import make_spec
+from generator import build_font
+from preview_renderer import GlyphBitmapCache, pack_bitmap, render_text, unpack_bitmap
+from render_cache import RenderCache
+
+
+class GlyphBitmapStoreTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls._tmp = tempfile.TemporaryDirectory()
+        with contextlib.redirect_stdout(io.StringIO()):
+            font = build_font(make_spec())
+        cls.font_path = os.path.join(cls._tmp.name, 'preview.ttf')
+        font.save(cls.font_path)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls._tmp.cleanup()
+
+    def setUp(self):
+        self._saved_cache = preview_renderer.bitmap_cache
+        self.store_dir = tempfile.mkdtemp(dir=self._tmp.name)
+
+    def tearDown(self):
+        preview_renderer.bitmap_cache = self._saved_cache
+
+    def fresh_cache(self):
+        # 模拟后端为每个请求启动的新进程：内存层为空，磁盘层共享
+        cache = GlyphBitmapCache(store=RenderCache(max_bytes=0, cache_dir=self.store_dir,
+                                                   suffix='.bin'))
+        preview_renderer.bitmap_cache = cache
+        return cache
+
+    def test_bitmaps_reused_across_processes(self):
+        text = 'Hamburg 0'
+        first = self.fresh_cache()
+        expected = render_text(self.font_path, text, 32)
+        self.assertEqual((first.disk_hits, first.misses), (0, len(set(text))))
+
+        second = self.fresh_cache()
+        canvas = render_text(self.font_path, text, 32)
+        self.assertEqual((second.disk_hits, second.misses), (len(set(text)), 0))
+        np.testing.assert_array_equal(canvas, expected)
+
+    def test_pack_round_trip(self):
+        self.fresh_cache()
+        source_digest, source = preview_renderer.font_source(self.font_path)
+        bitmap = preview_renderer.glyph_bitmap(source_digest, source, 'g', 40)
+        restored = unpack_bitmap(pack_bitmap(bitmap))
+        self.assertEqual((restored.left, restored.top), (bitmap.left, bitmap.top))
+        np.testing.assert_array_equal(restored.coverage, bitmap.coverage)
+
+
+if __name__ == '__main__':
+    unittest.main()
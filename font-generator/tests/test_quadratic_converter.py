@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+批量三次→二次转换与 fontTools.cu2qu 的比较（含隐含在线点的输入）
+运行: cd font-generator && python -m unittest discover tests
+"""
+
+import os
+import sys
+import unittest
+from array import array
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fontTools.misc.roundTools import otRound
+from fontTools.pens.cu2quPen import Cu2QuPen
+from fontTools.pens.recordingPen import RecordingPen
+from fontTools.pens.ttGlyphPen import TTGlyphPen
+from fontTools.ttLib.tables._g_l_y_f import Glyph, GlyphCoordinates, flagCubic
+
+from quadratic_converter import glyphs_to_quadratic
+
+
+def draw_two_cubics(pen):
+    # 两条相邻的三次曲线：dropImpliedOnCurves 时中间的在线点被省略
+    pen.moveTo((100, 100))
+    pen.curveTo((150, 300), (300, 250), (350, 150))
+    pen.curveTo((400, 50), (300, 0), (200, 20))
+    pen.closePath()
+    pen.moveTo((500, 0))
+    pen.curveTo((600, 100), (700, 100), (800, 0))
+    pen.curveTo((700, -100), (600, -100), (500, 0))
+    pen.closePath()
+
+
+def recorded(glyph):
+    pen = RecordingPen()
+    glyph.draw(pen, None)
+    return pen.value
+
+
+def rounded_cu2qu(draw):
+    pen = RecordingPen()
+    draw(Cu2QuPen(pen, 1.0, reverse_direction=False))
+    return [(op, tuple((otRound(x), otRound(y)) for x, y in points)) for op, points in pen.value]
+
+
+class ImpliedOnCurveTest(unittest.TestCase):
+
+    def test_matches_cu2qu_with_implied_on_curves(self):
+        pen = TTGlyphPen(None)
+        draw_two_cubics(pen)
+        glyph = pen.glyph(dropImpliedOnCurves=True)
+        self.assertLess(len(glyph.coordinates), 13)
+
+        converted = glyphs_to_quadratic({'a': glyph}, max_err=1.0)['a']
+        self.assertEqual(recorded(converted), rounded_cu2qu(draw_two_cubics))
+
+    def test_contour_without_on_curve_points(self):
+        # 四条三次曲线组成的闭合轮廓，在线点全部是相邻离线点的中点
+        offs = [(0, 100), (0, 200), (100, 300), (200, 300),
+                (300, 200), (300, 100), (200, 0), (100, 0)]
+
+        implied = Glyph()
+        implied.coordinates = GlyphCoordinates(offs)
+        implied.flags = array('B', [flagCubic] * len(offs))
+        implied.endPtsOfContours = [len(offs) - 1]
+        implied.numberOfContours = 1
+
+        def draw(pen):
+            mid = lambda a, b: ((a[0] + b[0]) / 2, (a[1] + b[1]) / 2)
+            pen.moveTo(mid(offs[7], offs[0]))
+            for i in range(0, 8, 2):
+                pen.curveTo(offs[i], offs[i + 1], mid(offs[i + 1], offs[(i + 2) % 8]))
+            pen.closePath()
+
+        explicit_pen = TTGlyphPen(None)
+        draw(explicit_pen)
+        explicit = glyphs_to_quadratic({'a': explicit_pen.glyph()}, max_err=1.0)['a']
+        converted = glyphs_to_quadratic({'a': implied}, max_err=1.0)['a']
+
+        # 同一几何：展开后的点集与显式在线点版本一致
+        self.assertEqual(sorted(converted.coordinates), sorted(explicit.coordinates))
+
+
+if __name__ == '__main__':
+    unittest.main()
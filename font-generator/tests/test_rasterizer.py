@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+光栅化与距离场：覆盖率、非零环绕规则、批量一致性与距离场的符号和数值
+运行: cd font-generator && python -m unittest discover tests
+"""
+
+import contextlib
+import io
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+from fontTools.pens.pointInsidePen import PointInsidePen
+
+from benchmark import make_spec
+from generator import build_font
+from rasterizer import glyph_edges, rasterize_batch, rasterize_edges, signed_distance_field
+
+
+def polygon_edges(*contours):
+    a = np.concatenate([np.asarray(points, dtype=float) for points in contours])
+    b = np.concatenate([np.roll(np.asarray(points, dtype=float), -1, axis=0)
+                        for points in contours])
+    return a, b
+
+
+def square(x0, y0, x1, y1):
+    return [(x0, y0), (x0, y1), (x1, y1), (x1, y0)]
+
+
+class RasterizeTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        spec = make_spec()
+        spec['characterSet']['uppercase'] = ['A-Z所有字母']
+        with contextlib.redirect_stdout(io.StringIO()):
+            cls.font = build_font(spec)
+
+    def test_square_coverage(self):
+        a, b = polygon_edges(square(0.5, 0.5, 4.5, 4.5))
+        bitmap = rasterize_edges(a, b, 1.0)
+        self.assertEqual((bitmap.left, bitmap.top), (0, 5))
+        expected = np.full((5, 5), 255, dtype=np.uint8)
+        expected[[0, -1], :] = expected[:, [0, -1]] = 128
+        expected[[0, 0, -1, -1], [0, -1, 0, -1]] = 64
+        np.testing.assert_array_equal(bitmap.coverage, expected)
+
+    def test_nonzero_winding(self):
+        outer = square(0, 0, 8, 8)
+        a, b = polygon_edges(outer)
+        reference = rasterize_edges(a, b, 1.0).coverage
+        # 方向相反、重复叠放的轮廓都按非零规则填充，覆盖率不叠加
+        for contours in ([outer[::-1]], [outer, outer], [outer, square(2, 2, 6, 6)]):
+            with self.subTest(contours=contours):
+                np.testing.assert_array_equal(
+                    rasterize_edges(*polygon_edges(*contours), 1.0).coverage, reference)
+        # 方向相反的内轮廓挖出空洞
+        holed = rasterize_edges(*polygon_edges(outer, square(2, 2, 6, 6)[::-1]), 1.0).coverage
+        self.assertEqual(holed[4, 4], 0)
+        self.assertEqual(holed.sum(), 255 * (64 - 16))
+
+    def test_glyph_coverage_matches_point_inside(self):
+        glyph_set = self.font.getGlyphSet()
+        glyf = self.font['glyf']
+        scale = 0.02
+        for glyph_name in self.font.getGlyphOrder():
+            a, b = glyph_edges(glyf, glyph_name)
+            if not len(a):
+                continue
+            with self.subTest(glyph=glyph_name):
+                bitmap = rasterize_edges(a, b, scale)
+                # 全覆盖与全空的像素，其中心必须分别在轮廓内外（非零环绕规则）
+                for row, col in zip(*np.nonzero((bitmap.coverage == 0) | (bitmap.coverage == 255))):
+                    point = ((bitmap.left + col + 0.5) / scale, (bitmap.top - row - 0.5) / scale)
+                    pen = PointInsidePen(glyph_set, point)
+                    glyph_set[glyph_name].draw(pen)
+                    self.assertEqual(pen.getResult(), bitmap.coverage[row, col] == 255, point)
+
+    def test_batch_matches_individual(self):
+        glyf = self.font['glyf']
+        items = [glyph_edges(glyf, name) + (scale,)
+                 for name in self.font.getGlyphOrder() for scale in (0.012, 0.03)]
+        for (a, b, scale), bitmap in zip(items, rasterize_batch(items)):
+            single = rasterize_edges(a, b, scale)
+            self.assertEqual((bitmap.left, bitmap.top), (single.left, single.top))
+            np.testing.assert_allclose(bitmap.coverage, single.coverage, atol=1)
+
+
+class SignedDistanceFieldTest(unittest.TestCase):
+
+    def test_square_distances(self):
+        spread = 4.0
+        a, b = polygon_edges(square(0, 0, 10, 10))
+        sdf = signed_distance_field(a, b, 1.0, spread)
+        self.assertEqual((sdf.left, sdf.top), (-4, 14))
+        self.assertEqual(sdf.coverage.shape, (18, 18))
+
+        # 像素中心到正方形边界的解析距离（内部为正）
+        height, width = sdf.coverage.shape
+        x = sdf.left + np.arange(width)[None, :] + 0.5
+        y = sdf.top - np.arange(height)[:, None] - 0.5
+        outside = np.hypot(np.maximum(np.maximum(-x, x - 10), 0),
+                           np.maximum(np.maximum(-y, y - 10), 0))
+        inside = np.minimum(np.minimum(x, 10 - x), np.minimum(y, 10 - y))
+        signed = np.where(inside > 0, inside, -outside)
+        expected = np.clip(128 + signed / spread * 127, 0, 255)
+        np.testing.assert_allclose(sdf.coverage, expected, atol=1)
+
+    def test_sign_follows_winding(self):
+        outer, inner = square(0, 0, 12, 12), square(4, 4, 8, 8)
+        sdf = signed_distance_field(*polygon_edges(outer, inner[::-1]), 1.0, 2.0)
+        # 空洞中心在外部，环形笔画中间在内部
+        hole = sdf.coverage[sdf.top - 6, 6 - sdf.left]
+        ring = sdf.coverage[sdf.top - 6, 2 - sdf.left]
+        self.assertLess(hole, 128)
+        self.assertGreater(ring, 128)
+        same_direction = signed_distance_field(*polygon_edges(outer, inner), 1.0, 2.0)
+        self.assertGreater(same_direction.coverage[sdf.top - 6, 6 - sdf.left], 128)
+
+
+if __name__ == '__main__':
+    unittest.main()
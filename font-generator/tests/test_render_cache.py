@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+渲染缓存磁盘层的过期与淘汰
+运行: cd font-generator && python -m unittest discover tests
+"""
+
+import os
+import sys
+import tempfile
+import time
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from render_cache import RenderCache, render_key
+
+
+def disk_keys(cache):
+    return sorted(name[:-len(cache.suffix)] for _, _, files in os.walk(cache.cache_dir)
+                  for name in files)
+
+
+class RenderCacheDiskTest(unittest.TestCase):
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.cache_dir = self._tmp.name
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def age(self, cache, key, seconds):
+        path = cache._file_path(key)
+        mtime = time.time() - seconds
+        os.utime(path, (mtime, mtime))
+
+    def test_put_evicts_least_recently_used_over_file_limit(self):
+        cache = RenderCache(cache_dir=self.cache_dir, max_files=2)
+        keys = [render_key('font', text, 48) for text in 'abc']
+        cache.put(keys[0], b'a')
+        cache.put(keys[1], b'b')
+        self.age(cache, keys[0], 20)
+        self.age(cache, keys[1], 10)
+        # 读取磁盘层刷新修改时间：keys[0] 变为最近使用
+        self.assertEqual(RenderCache(cache_dir=self.cache_dir).get(keys[0]), b'a')
+        cache.put(keys[2], b'c')
+        self.assertEqual(disk_keys(cache), sorted([keys[0], keys[2]]))
+
+    def test_put_evicts_over_byte_limit(self):
+        cache = RenderCache(cache_dir=self.cache_dir, max_disk_bytes=250)
+        keys = [render_key('font', text, 48) for text in 'abc']
+        for age, key in zip((30, 20, 10), keys):
+            cache.put(key, b'\0' * 100)
+            self.age(cache, key, age)
+        cache.prune()
+        self.assertEqual(disk_keys(cache), sorted(keys[1:]))
+
+    def test_prune_removes_expired_entries(self):
+        cache = RenderCache(cache_dir=self.cache_dir, ttl=60)
+        fresh, stale = render_key('font', 'fresh', 48), render_key('font', 'stale', 48)
+        cache.put(fresh, b'f')
+        cache.put(stale, b's')
+        self.age(cache, stale, 120)
+        self.assertEqual(cache.prune(), 1)
+        self.assertEqual(disk_keys(cache), [fresh])
+
+
+if __name__ == '__main__':
+    unittest.main()
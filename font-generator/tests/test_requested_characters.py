@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+characterSet 展开：AI 分析器示例规格中的范围与说明文字
+运行: cd font-generator && python -m unittest discover tests
+"""
+
+import os
+import string
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from generator import requested_characters
+from spec_parser import DEFAULT_CHARACTERS, PUNCTUATION, expand_character_set
+
+# backend/src/services/aiAnalyzer.ts 提示词中的 characterSet 示例
+ANALYZER_CHARACTER_SET = {
+    'uppercase': ['A-Z所有字母'],
+    'lowercase': ['a-z所有字母'],
+    'numbers': ['0-9所有数字'],
+    'punctuation': ['.', ',', '!', '?', ';', ':', "'", '"', '-', '(', ')', '[', ']',
+                    '{', '}', '/', '\\', '@', '#', '$', '%', '&', '*', '+', '='],
+}
+
+
+class RequestedCharactersTest(unittest.TestCase):
+
+    def test_analyzer_example_spec(self):
+        expanded = expand_character_set(ANALYZER_CHARACTER_SET)
+        self.assertEqual(expanded['uppercase'], string.ascii_uppercase)
+        self.assertEqual(expanded['lowercase'], string.ascii_lowercase)
+        self.assertEqual(expanded['numbers'], string.digits)
+        self.assertEqual(set(expanded['punctuation']), set(ANALYZER_CHARACTER_SET['punctuation']))
+
+        characters = requested_characters({'characterSet': ANALYZER_CHARACTER_SET})
+        self.assertEqual(len(characters), 26 + 26 + 10 + 25)
+        # 说明文字不产生字形
+        self.assertFalse(set('所有字母数') & set(characters))
+
+    def test_strings_and_single_characters_are_equivalent(self):
+        self.assertEqual(expand_character_set({'uppercase': ['CAB']}),
+                         expand_character_set({'uppercase': ['A', 'B', 'C']}))
+
+    def test_prose_only_entry_falls_back_to_category_default(self):
+        expanded = expand_character_set({'uppercase': ['所有大写字母'], 'punctuation': ['常用标点']})
+        self.assertEqual(expanded['uppercase'], string.ascii_uppercase)
+        self.assertEqual(set(expanded['punctuation']), set(PUNCTUATION))
+
+    def test_characters_outside_category_are_dropped(self):
+        expanded = expand_character_set({'uppercase': ['A', 'b', '1'], 'numbers': ['0-3']})
+        self.assertEqual(expanded['uppercase'], 'A')
+        self.assertEqual(expanded['numbers'], '0123')
+
+    def test_empty_character_set_uses_defaults(self):
+        self.assertEqual(requested_characters({'characterSet': {}}), DEFAULT_CHARACTERS)
+
+
+if __name__ == '__main__':
+    unittest.main()
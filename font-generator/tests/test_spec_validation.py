@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+规格校验：一次报告全部错误、默认值填充与数值类型转换
+运行: cd font-generator && python -m unittest discover tests
+"""
+
+import copy
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmark import make_spec
+from spec_parser import SpecValidationError, normalize_spec
+
+
+class NormalizeSpecTest(unittest.TestCase):
+
+    def assertErrors(self, spec, expected):
+        with self.assertRaises(SpecValidationError) as ctx:
+            normalize_spec(spec)
+        self.assertEqual(len(ctx.exception.errors), len(expected), ctx.exception.errors)
+        for error, fragment in zip(ctx.exception.errors, expected):
+            self.assertIn(fragment, error)
+
+    def test_valid_spec(self):
+        spec = make_spec()
+        original = copy.deepcopy(spec)
+        normalized = normalize_spec(spec)
+        self.assertEqual(spec, original)
+        self.assertEqual(normalized['designParameters']['metrics']['unitsPerEm'], 1000)
+
+    def test_reports_every_error(self):
+        spec = make_spec()
+        del spec['basicInfo']['fontName']
+        spec['basicInfo']['weight'] = 'heavy'
+        metrics = spec['designParameters']['metrics']
+        metrics['unitsPerEm'] = 8
+        metrics['descender'] = 10
+        spec['designParameters']['proportions']['strokeWidth'] = 'thick'
+        spec['characterSet']['uppercase'] = ['A', 1]
+        self.assertErrors(spec, [
+            '缺少必需字段: basicInfo.fontName',
+            'basicInfo.weight',
+            'designParameters.metrics.unitsPerEm: 不能小于',
+            'designParameters.metrics.descender: 不能大于',
+            'designParameters.proportions.strokeWidth: 必须为数值',
+            'characterSet.uppercase[1]',
+        ])
+
+    def test_schema_and_cross_field_errors_together(self):
+        spec = make_spec()
+        del spec['metadata']
+        spec['designParameters']['metrics']['xHeight'] = 900
+        self.assertErrors(spec, ['缺少必需字段: metadata', '度量参数顺序错误'])
+
+    def test_defaults_and_coercion(self):
+        spec = make_spec()
+        del spec['designRules']
+        spec['designParameters']['metrics']['unitsPerEm'] = '2048'
+        spec['designParameters']['proportions']['strokeWidth'] = 90.0
+        normalized = normalize_spec(spec)
+        self.assertEqual(normalized['designParameters']['metrics']['unitsPerEm'], 2048)
+        self.assertIsInstance(normalized['designParameters']['proportions']['strokeWidth'], int)
+        self.assertEqual(normalized['designRules']['legibility']['minSize'], 8)
+
+    def test_non_integer_metric(self):
+        spec = make_spec()
+        spec['designParameters']['metrics']['capHeight'] = 720.5
+        self.assertErrors(spec, ['designParameters.metrics.capHeight: 必须为整数'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+子集缓存：内存 LRU 淘汰、磁盘文件按最近使用淘汰，以及 subset_font 的命中
+运行: cd font-generator && python -m unittest discover tests
+"""
+
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fontTools.ttLib import TTFont
+
+from benchmark import make_spec
+from generator import build_font
+from subsetter import SubsetCache, subset_font
+
+
+def key(name):
+    return ('0' * 40, tuple(map(ord, name)), 'ttf')
+
+
+class SubsetCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.cache_dir = self._tmp.name
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def age_files(self, cache, names):
+        """按给定顺序把文件的修改时间设为由旧到新"""
+        for age, name in enumerate(names):
+            os.utime(cache._file_path(key(name)), ns=(0, (1000 + age) * 10 ** 9))
+
+    def test_memory_lru(self):
+        cache = SubsetCache(max_entries=2)
+        cache.put(key('a'), b'a')
+        cache.put(key('b'), b'b')
+        self.assertEqual(cache.get(key('a')), b'a')
+        cache.put(key('c'), b'c')
+        self.assertIsNone(cache.get(key('b')))
+        self.assertEqual(cache.get(key('a')), b'a')
+        self.assertEqual(cache.get(key('c')), b'c')
+        self.assertEqual((cache.hits, cache.misses), (3, 1))
+
+    def test_disk_evicts_least_recently_used(self):
+        cache = SubsetCache(max_entries=1, cache_dir=self.cache_dir, max_files=2)
+        cache.put(key('a'), b'a')
+        cache.put(key('b'), b'b')
+        self.age_files(cache, 'ab')
+        # 磁盘命中刷新 a 的修改时间，淘汰的是 b
+        self.assertEqual(cache.get(key('a')), b'a')
+        cache.put(key('c'), b'c')
+        self.assertEqual(len(os.listdir(self.cache_dir)), 2)
+
+        fresh = SubsetCache(cache_dir=self.cache_dir)
+        self.assertEqual(fresh.get(key('a')), b'a')
+        self.assertEqual(fresh.get(key('c')), b'c')
+        self.assertIsNone(fresh.get(key('b')))
+
+    def test_disk_survives_memory_eviction(self):
+        cache = SubsetCache(max_entries=1, cache_dir=self.cache_dir)
+        cache.put(key('a'), b'a')
+        cache.put(key('b'), b'b')
+        self.assertEqual(list(cache._entries), [key('b')])
+        self.assertEqual(cache.get(key('a')), b'a')
+        self.assertEqual(cache.misses, 0)
+
+
+class SubsetFontTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls._tmp = tempfile.TemporaryDirectory()
+        spec = make_spec()
+        spec['characterSet']['uppercase'] = ['A-Z所有字母']
+        with contextlib.redirect_stdout(io.StringIO()):
+            font = build_font(spec)
+        cls.font_path = os.path.join(cls._tmp.name, 'subset.ttf')
+        font.save(cls.font_path)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls._tmp.cleanup()
+
+    def test_subset_and_cache_hit(self):
+        cache = SubsetCache()
+        data = subset_font(self.font_path, 'ABBA', cache=cache)
+        self.assertIs(subset_font(self.font_path, 'BA', cache=cache), data)
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+        self.assertEqual(set(TTFont(io.BytesIO(data)).getBestCmap()), {ord('A'), ord('B')})
+
+
+if __name__ == '__main__':
+    unittest.main()